@@ -247,6 +247,7 @@ const Auth = {
                 
                 this.showMainScreen();
                 Utils.showToast(data.message);
+                LiveUpdates.connect();
                 await Dashboard.init();
             }
         } catch (error) {
@@ -273,6 +274,7 @@ const Auth = {
     },
     
     logout() {
+        LiveUpdates.disconnect();
         AppState.clearCurrentUser();
         this.showAuthScreen();
         Utils.showToast('ログアウトしました');
@@ -301,6 +303,7 @@ const Auth = {
             try {
                 AppState.currentUser = JSON.parse(userStr);
                 this.showMainScreen();
+                LiveUpdates.connect();
                 Dashboard.init();
                 return true;
             } catch (error) {
@@ -666,6 +669,78 @@ const Categories = {
     }
 };
 
+// === リアルタイム更新（Server-Sent Events） ===
+const LiveUpdates = {
+    source: null,
+    refreshTimer: null,
+    reconnectTimer: null,
+    lastEventId: null,
+    RECONNECT_DELAY_MS: 3000,
+    EVENTS: ['task.created', 'task.updated', 'task.deleted', 'tasks.imported',
+             'category.created', 'category.updated', 'category.deleted', 'reset'],
+    
+    async connect() {
+        if (!localStorage.getItem(CONFIG.TOKEN_KEY) || !window.EventSource) return;
+        
+        this.disconnect();
+        // EventSource はヘッダーを付けられないため、URL には短時間だけ有効なストリーム用トークンを付ける
+        // （アクセストークンはアクセスログに残る URL に載せない）
+        let data;
+        try {
+            data = await APIClient.post('/events/token', {});
+        } catch (error) {
+            this.scheduleReconnect();
+            return;
+        }
+        // トークン取得中にログアウトした場合は接続しない
+        if (!data || !localStorage.getItem(CONFIG.TOKEN_KEY)) return;
+        
+        const params = new URLSearchParams({ token: data.token });
+        if (this.lastEventId) params.set('last_event_id', this.lastEventId);
+        this.source = new EventSource(`${CONFIG.API_BASE_URL}/events?${params}`);
+        this.EVENTS.forEach(name => {
+            this.source.addEventListener(name, (event) => {
+                this.lastEventId = event.lastEventId || this.lastEventId;
+                this.scheduleRefresh();
+            });
+        });
+        // 自動再接続（Last-Event-ID 付き）がトークンの期限切れなどで拒否されたら、トークンを取り直して接続し直す
+        this.source.onerror = () => {
+            if (this.source && this.source.readyState === EventSource.CLOSED) {
+                this.scheduleReconnect();
+            }
+        };
+    },
+    
+    scheduleReconnect() {
+        clearTimeout(this.reconnectTimer);
+        this.reconnectTimer = setTimeout(() => this.connect(), this.RECONNECT_DELAY_MS);
+    },
+    
+    disconnect() {
+        if (this.source) {
+            this.source.close();
+            this.source = null;
+        }
+        clearTimeout(this.refreshTimer);
+        clearTimeout(this.reconnectTimer);
+    },
+    
+    // 連続した通知は1回の再読み込みにまとめる
+    scheduleRefresh() {
+        clearTimeout(this.refreshTimer);
+        this.refreshTimer = setTimeout(() => {
+            if (AppState.currentView === 'dashboard') {
+                Dashboard.init();
+            } else if (AppState.currentView === 'tasks') {
+                filterTasks();
+            } else if (AppState.currentView === 'categories') {
+                Categories.loadCategories();
+            }
+        }, 300);
+    }
+};
+
 // === イベントハンドラー ===
 async function handleLogin(event) {
     event.preventDefault();
@@ -7,24 +7,62 @@ from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from app.config import config
 from app.database import db, init_database
+from app.utils.cache import get_lookup_cache, init_lookup_cache
+from app.utils.events import EventHub
+from app.utils.passwords import init_password_hasher
+from app.utils.throttle import get_auth_throttle, init_auth_throttle
+from app.utils.json_provider import APIJSONProvider
+from app.utils.compression import init_compression
+from app.utils.logger import init_logging, logger
+from app.utils.wire_formats import APIRequest
 
 
 def create_app(config_name='development'):
     """Flaskアプリケーションファクトリ"""
     app = Flask(__name__)
     
+    # CBOR / MessagePack のリクエストボディにも対応
+    app.request_class = APIRequest
+    
     # 設定読み込み
     app.config.from_object(config[config_name])
     
+    # ログの出力形式・ローテーション・サンプリング（書き込みは専用スレッド）
+    init_logging(app)
+    
+    # JSONエンコード設定（orjson があれば使用）
+    app.json = APIJSONProvider(app, app.config['JSON_ENCODER'])
+    app.json.sort_keys = app.config['JSON_SORT_KEYS']
+    app.json.compact = app.config['JSON_COMPACT']
+    
     # JWT設定
     jwt = JWTManager(app)
     
     # CORS設定（フロントエンドからのアクセスを許可）
     CORS(app, origins=["http://localhost:8080", "http://127.0.0.1:8080", "file://"])
     
+    # パスワードのハッシュ計算（専用のプロセスプール、初期データ作成でも使用）
+    init_password_hasher(app)
+    
+    # ログイン・登録の試行回数の制限
+    init_auth_throttle(app)
+    
     # データベース初期化
     init_database(app)
     
+    # レスポンス圧縮
+    init_compression(app)
+    
+    # 変更通知のイベントハブ（プロセス内）
+    app.extensions['event_hub'] = EventHub(
+        history_size=app.config['EVENTS_HISTORY_SIZE'],
+        queue_size=app.config['EVENTS_QUEUE_SIZE'],
+        dumps=app.json.dumps
+    )
+    
+    # ユーザー情報・カテゴリ所有の参照キャッシュ（プロセス内）
+    init_lookup_cache(app)
+    
     # エラーハンドラー
     @app.errorhandler(404)
     def not_found(error):
@@ -41,12 +79,18 @@ def create_app(config_name='development'):
         return jsonify({
             'status': 'OK',
             'message': 'タスク管理API は正常に動作中です',
-            'version': '1.0.0'
+            'version': '1.0.0',
+            'cache': get_lookup_cache().stats(),
+            'auth_throttle': get_auth_throttle().stats(),
+            'logging': logger.stats()
         })
     
     # ルート登録
     register_blueprints(app)
     
+    # CLIコマンド登録
+    register_commands(app)
+    
     return app
 
 
@@ -55,7 +99,22 @@ def register_blueprints(app):
     from app.routers.auth import auth_bp
     from app.routers.tasks import tasks_bp
     from app.routers.categories import categories_bp
+    from app.routers.events import events_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(tasks_bp, url_prefix='/api/tasks')
-    app.register_blueprint(categories_bp, url_prefix='/api/categories')
\ No newline at end of file
+    app.register_blueprint(categories_bp, url_prefix='/api/categories')
+    app.register_blueprint(events_bp, url_prefix='/api/events')
+
+
+def register_commands(app):
+    """管理用CLIコマンドの登録"""
+    import click
+    from app.utils.task_stats import rebuild_task_stats
+    
+    @app.cli.command('rebuild-task-stats')
+    @click.option('--user-id', type=int, default=None, help='対象ユーザーID（省略時は全ユーザー）')
+    def rebuild_task_stats_command(user_id):
+        """タスク統計カウンタを tasks テーブルから再構築"""
+        rows = rebuild_task_stats(user_id)
+        click.echo(f'統計カウンタを再構築しました（{rows} 行）')
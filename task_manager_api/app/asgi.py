@@ -0,0 +1,422 @@
+"""
+ASGI エントリーポイント
+タスク一覧・タスク詳細・エクスポート・カテゴリ一覧の GET と SSE を非同期ドライバ（aiosqlite）のコルーチンで処理し、
+それ以外のリクエスト（書き込み・認証のほか、統計・検索・差分取得・カテゴリ別タスク一覧などの GET）は
+Flask（WSGI）アプリケーションへスレッドで委譲する
+
+モデル・バリデーション・クエリの組み立て・ETag・圧縮・エラーレスポンスは同期のブループリントと共通。
+SSE・エクスポートもコルーチンで配信するため、待機の長い接続がスレッドを占有しない。
+
+SSE のイベントはプロセス内のイベントハブで配信し、プリフォークサーバーのようなワーカー間の中継はないため、
+1ワーカーで起動する（起動時にインスタンスディレクトリのロックファイルを取得し、2つ目のワーカーは起動に失敗する）。
+
+必要なパッケージ: pip install aiosqlite greenlet asgiref uvicorn（requirements.txt に記載）
+"""
+import asyncio
+import io
+import os
+import sys
+from datetime import datetime
+
+from flask import Response, current_app, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import func, select
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import Map, Rule
+
+from app.database import db, is_memory_sqlite, read_only_pragmas, read_only_sqlite_url, register_sqlite_pragmas
+from app.models import Category, Task
+from app.routers.tasks import apply_task_filters
+from app.utils.compression import StreamCompressor
+from app.utils.decorators import is_not_modified, set_conditional_headers
+from app.utils.events import aiter_sse, get_event_hub, stream_user_id
+from app.utils.export import EXPORT_BATCH_SIZE, EXPORT_FORMATS, TASK_EXPORT_FIELDS, iter_csv, iter_ndjson
+from app.utils.fields import parse_category_fields, parse_task_fields
+from app.utils.pagination import order_by_created_at, parse_limit, split_page, wants_total
+from app.utils.validators import ValidationError
+from app.utils.versioning import compute_etag, data_version_select
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+except ImportError:  # 未インストールの場合は create_asgi_app で案内する
+    WsgiToAsgi = None
+
+try:
+    import fcntl
+except ImportError:  # Windows ではワーカー数を確認しない
+    fcntl = None
+
+# 1ワーカーで起動していることを確認するロックファイル（インスタンスディレクトリに作成）
+WORKER_LOCK_FILE = 'asgi.lock'
+
+
+class StreamingResponse(Response):
+    """本文を非同期イテレータで送るレスポンス（ヘッダーは after_request で通常どおり加工する）"""
+
+    def __init__(self, body, **kwargs):
+        super().__init__(iter(()), **kwargs)
+        self.async_body = body
+
+
+def create_async_read_engine(app):
+    """非同期の読み込み専用エンジンを作成（対象がない場合は None で、すべて Flask へ委譲する）"""
+    url = app.config['ASYNC_DATABASE_URI']
+    if not url:
+        with app.app_context():
+            primary_url = db.engine.url
+        if primary_url.get_backend_name() != 'sqlite' or is_memory_sqlite(primary_url):
+            return None
+        url = read_only_sqlite_url(primary_url, 'sqlite+aiosqlite')
+
+    engine = create_async_engine(
+        url,
+        pool_size=app.config['ASYNC_DB_POOL_SIZE'],
+        max_overflow=app.config['ASYNC_DB_MAX_OVERFLOW']
+    )
+    register_sqlite_pragmas(engine.sync_engine, read_only_pragmas(app))
+    return engine
+
+
+def build_environ(scope):
+    """ASGI の HTTP スコープから Flask のリクエストコンテキスト用の WSGI environ を作る（本文なし）"""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'REMOTE_ADDR': scope['client'][0] if scope.get('client') else '',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE' or name == 'CONTENT_LENGTH':
+            key = name
+        else:
+            key = f'HTTP_{name}'
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def access_token_user_id():
+    """Authorization ヘッダーのアクセストークンのユーザーID（jwt_required と同じ検証）"""
+    verify_jwt_in_request()
+    return int(get_jwt_identity())
+
+
+async def wait_for_disconnect(receive):
+    """クライアントの切断まで待つ"""
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+class AsyncReadApp:
+    """
+    参照エンドポイントをコルーチンで処理する ASGI アプリケーション
+
+    非同期エンジンがない場合（インメモリ SQLite など）や対象外のパスは Flask へ委譲する。
+    リクエストごとに Flask のリクエストコンテキストを作り、JWT の検証・after_request・エラーハンドラーを共通化する。
+    """
+
+    # コルーチンで処理する GET のパスとハンドラ名
+    ROUTES = [
+        ('/api/tasks/', 'list_tasks'),
+        ('/api/tasks/<int:task_id>', 'get_task'),
+        ('/api/tasks/export', 'export_tasks'),
+        ('/api/categories/', 'list_categories'),
+        ('/api/events', 'stream_events'),
+    ]
+
+    # アクセストークン以外で認証するハンドラ（EventSource はヘッダーを付けられないためストリーム用トークンも受け付ける）
+    AUTHENTICATORS = {'stream_events': stream_user_id}
+
+    def __init__(self, app):
+        self.app = app
+        self.lock_path = os.path.join(app.instance_path, WORKER_LOCK_FILE)
+        self._lock_file = None
+        self.wsgi = WsgiToAsgi(app)
+        self.engine = create_async_read_engine(app)
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False) if self.engine else None
+        url_map = Map([Rule(path, endpoint=name, methods=['GET']) for path, name in self.ROUTES])
+        self.urls = url_map.bind('localhost')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] == 'http' and scope['method'] == 'GET' and self.engine is not None:
+            try:
+                name, values = self.urls.match(scope['path'], scope['method'])
+            except HTTPException:
+                pass
+            else:
+                await self.dispatch(name, values, scope, receive, send)
+                return
+        await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        """
+        起動・停止の処理
+
+        起動時はワーカーのロックを取得し（他のワーカーが起動済みなら起動に失敗する）、
+        停止時は SSE の接続を閉じ、接続プール・ハッシュ計算用のプロセスを破棄してロックを解放する。
+        """
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    self.acquire_worker_lock()
+                except RuntimeError as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.app.extensions['event_hub'].close()
+                if self.engine is not None:
+                    await self.engine.dispose()
+                self.app.extensions['password_hasher'].shutdown(wait=True)
+                self.release_worker_lock()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def acquire_worker_lock(self):
+        """ロックファイルを排他ロックし、取得できなければ（別のワーカーが起動済み）RuntimeError"""
+        if fcntl is None:
+            return
+        os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+        lock_file = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise RuntimeError(
+                f'別の ASGI ワーカーが起動しています（{self.lock_path}）。SSE のイベントはワーカー間で共有されないため、1ワーカーで起動してください'
+            )
+        self._lock_file = lock_file
+
+    def release_worker_lock(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    async def dispatch(self, name, values, scope, receive, send):
+        """リクエストコンテキスト内でハンドラを実行し、Flask と同じ後処理をしてから送信"""
+        ctx = self.app.request_context(build_environ(scope))
+        ctx.push()
+        try:
+            try:
+                try:
+                    rv = await getattr(self, name)(self.AUTHENTICATORS.get(name, access_token_user_id)(), **values)
+                except Exception as e:
+                    # JWT のエラーなどは登録済みのエラーハンドラーでレスポンスにする
+                    rv = self.app.handle_user_exception(e)
+                response = self.app.finalize_request(rv)
+            except Exception as e:
+                response = self.app.handle_exception(e)
+            try:
+                await self.send_response(response, receive, send)
+            finally:
+                # 本文を送る前に切断された場合も call_on_close の処理（SSE の購読解除など）を実行
+                response.close()
+        finally:
+            ctx.pop()
+
+    async def send_response(self, response, receive, send):
+        headers = [(key.lower().encode('latin-1'), value.encode('latin-1')) for key, value in response.headers.items()]
+        await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+        if not isinstance(response, StreamingResponse):
+            await send({'type': 'http.response.body', 'body': response.get_data()})
+            return
+
+        # 切断されたら送信を止める（SSE は切断まで終わらない）
+        sender = asyncio.ensure_future(self.send_stream(response, send))
+        watcher = asyncio.ensure_future(wait_for_disconnect(receive))
+        done, pending = await asyncio.wait({sender, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if sender in done:
+            sender.result()
+
+    async def send_stream(self, response, send):
+        """ストリーミングレスポンスの本文を送信（after_request で圧縮が選ばれた場合はチャンクごとに圧縮）"""
+        encoding = response.headers.get('Content-Encoding')
+        compressor = StreamCompressor(encoding, self.app.config['COMPRESSION_LEVEL']) if encoding else None
+        async for chunk in response.async_body:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if compressor is not None:
+                chunk = compressor.compress(chunk, flush=True)
+            if chunk:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': compressor.finish() if compressor else b''})
+
+    async def conditional_get(self, user_id, build):
+        """conditional_get デコレータのコルーチン版（build はセッションを受け取ってレスポンスを返す）"""
+        async with self.sessionmaker() as session:
+            etag = compute_etag(user_id, await session.scalar(data_version_select(user_id)) or 0)
+            if is_not_modified(etag):
+                return set_conditional_headers(current_app.response_class(status=304), etag)
+            response = make_response(await build(session))
+        if response.status_code != 200:
+            return response
+        return set_conditional_headers(response, etag)
+
+    async def list_tasks(self, user_id):
+        """タスク一覧取得（GET /api/tasks/ と同じ結果）"""
+        async def build(session):
+            try:
+                limit = parse_limit(request.args.get('limit'))
+                cursor = request.args.get('cursor')
+                fields = parse_task_fields(request.args)
+
+                stmt = select(Task).options(*Task.load_fields(fields)).filter_by(user_id=user_id)
+                stmt = apply_task_filters(stmt, request.args)
+
+                page = order_by_created_at(stmt, Task, cursor)
+                if limit is None:
+                    tasks, next_cursor = (await session.scalars(page)).all(), None
+                else:
+                    tasks, next_cursor = split_page((await session.scalars(page.limit(limit + 1))).all(), limit)
+
+                result = {
+                    'tasks': [task.to_dict(fields) for task in tasks],
+                    'next_cursor': next_cursor
+                }
+                if limit is None and not cursor:
+                    result['total'] = len(tasks)
+                elif wants_total(request.args):
+                    result['total'] = await session.scalar(select(func.count()).select_from(stmt.subquery()))
+                return jsonify(result)
+
+            except ValidationError as e:
+                return jsonify({'error': e.message}), 400
+            except Exception as e:
+                return jsonify({'error': f'タスク取得でエラーが発生しました: {str(e)}'}), 500
+
+        return await self.conditional_get(user_id, build)
+
+    async def get_task(self, user_id, task_id):
+        """特定のタスク取得（GET /api/tasks/<id> と同じ結果）"""
+        async def build(session):
+            try:
+                fields = parse_task_fields(request.args)
+                stmt = select(Task).options(*Task.load_fields(fields)).filter_by(id=task_id, user_id=user_id)
+                task = (await session.scalars(stmt)).first()
+
+                if not task:
+                    return jsonify({'error': 'タスクが見つかりません'}), 404
+
+                return jsonify({'task': task.to_dict(fields)})
+
+            except ValidationError as e:
+                return jsonify({'error': e.message}), 400
+            except Exception as e:
+                return jsonify({'error': f'タスク取得でエラーが発生しました: {str(e)}'}), 500
+
+        return await self.conditional_get(user_id, build)
+
+    async def list_categories(self, user_id):
+        """カテゴリ一覧取得（GET /api/categories/ と同じ結果）"""
+        async def build(session):
+            try:
+                fields = parse_category_fields(request.args)
+                rows = (await session.execute(Category.select_with_task_counts(user_id, fields))).all()
+
+                return jsonify({
+                    'categories': [
+                        category.to_dict(task_count=task_count, status_counts=status_counts, fields=fields)
+                        for category, task_count, status_counts in Category.rows_with_task_counts(rows)
+                    ]
+                })
+
+            except ValidationError as e:
+                return jsonify({'error': e.message}), 400
+            except Exception as e:
+                return jsonify({'error': f'カテゴリ取得でエラーが発生しました: {str(e)}'}), 500
+
+        return await self.conditional_get(user_id, build)
+
+    async def export_tasks(self, user_id):
+        """タスクの全件エクスポート（GET /api/tasks/export と同じ結果）"""
+        try:
+            export_format = request.args.get('format', 'ndjson')
+            if export_format not in EXPORT_FORMATS:
+                return jsonify({'error': f'format は {", ".join(EXPORT_FORMATS)} のいずれかで指定してください'}), 400
+            fields = parse_task_fields(request.args)
+
+            stmt = select(Task).options(*Task.load_fields(fields)).filter_by(user_id=user_id)
+            stmt = apply_task_filters(stmt, request.args).order_by(Task.id)
+
+            filename = f'tasks_{datetime.utcnow().strftime("%Y%m%d%H%M%S")}.{export_format}'
+            return StreamingResponse(
+                self.iter_export(stmt, export_format, fields),
+                mimetype=EXPORT_FORMATS[export_format],
+                headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+            )
+
+        except ValidationError as e:
+            return jsonify({'error': e.message}), 400
+        except Exception as e:
+            return jsonify({'error': f'タスクエクスポートでエラーが発生しました: {str(e)}'}), 500
+
+    async def iter_export(self, stmt, export_format, fields):
+        """サーバー側カーソルから EXPORT_BATCH_SIZE 件ずつ読み出して出力（全件をメモリに載せない）"""
+        columns = fields or TASK_EXPORT_FIELDS
+        header = True
+        async with self.sessionmaker() as session:
+            result = await session.stream_scalars(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            async for tasks in result.partitions():
+                rows = [task.to_dict(fields) for task in tasks]
+                if export_format == 'ndjson':
+                    chunks = iter_ndjson(rows)
+                else:
+                    chunks = iter_csv(rows, columns, header=header)
+                    header = False
+                for chunk in chunks:
+                    yield chunk
+        if export_format == 'csv' and header:
+            # 0件でもヘッダー行は出力する
+            for chunk in iter_csv([], columns):
+                yield chunk
+
+    async def stream_events(self, user_id):
+        """変更通知のストリーム（GET /api/events と同じ形式、待機中はスレッドを使わない）"""
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+
+        hub = get_event_hub()
+        subscription = hub.subscribe(user_id, last_event_id)
+        stream = aiter_sse(
+            hub,
+            subscription,
+            heartbeat=current_app.config['EVENTS_HEARTBEAT_SECONDS'],
+            retry_ms=current_app.config['EVENTS_RETRY_MS']
+        )
+
+        response = StreamingResponse(stream, mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+        # 本文を送り始める前に切断された場合も購読を解除する
+        response.call_on_close(lambda: hub.unsubscribe(subscription))
+        return response
+
+
+def create_asgi_app(app):
+    """Flask アプリケーションから ASGI アプリケーションを作成"""
+    if WsgiToAsgi is None:
+        raise RuntimeError('ASGI での起動には aiosqlite / greenlet / asgiref のインストールが必要です')
+    return AsyncReadApp(app)
@@ -12,10 +12,99 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///task_manager.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # 読み込み専用のデータベース（未指定ならファイルの SQLite を読み込み専用で開く）と接続プールの大きさ
+    SQLALCHEMY_READ_DATABASE_URI = os.environ.get('DATABASE_READ_URL')
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = 10
+    DB_READ_POOL_SIZE = int(os.environ.get('DB_READ_POOL_SIZE', 10))
+    DB_READ_MAX_OVERFLOW = 10
+    
+    # SQLite の接続ごとの PRAGMA（WAL で読み込みと書き込みを並行させ、ロック待ちは busy_timeout ミリ秒まで待つ、
+    # 外部キー制約を有効にして削除済みのカテゴリを参照するタスクを書き込ませない）
+    SQLITE_PRAGMAS = {
+        'foreign_keys': 'ON',
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # 負の値は KiB 単位（64MiB）
+        'temp_store': 'MEMORY',
+    }
+    
     # JWT設定
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-string'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+    
+    # 全文検索設定（FTS5のトークナイザ: trigram は日本語の部分一致に対応、unicode61 は単語単位）
+    TASK_SEARCH_TOKENIZER = os.environ.get('TASK_SEARCH_TOKENIZER') or 'trigram'
+    
+    # JSON 設定（エンコーダ: auto は orjson があれば使用、キーの並べ替え、整形出力: None はデバッグ時のみ整形）
+    JSON_ENCODER = os.environ.get('JSON_ENCODER') or 'auto'
+    JSON_SORT_KEYS = True
+    JSON_COMPACT = None
+    
+    # レスポンス圧縮設定（Accept-Encoding に応じて gzip / deflate / br、しきい値未満のレスポンスは圧縮しない）
+    COMPRESSION_ENABLED = True
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_LEVEL = 6
+    
+    # イベント配信設定（SSE のハートビート間隔・再接続待ち・購読者ごとのキュー上限・再送用の履歴件数・接続用トークンの有効期間）
+    EVENTS_HEARTBEAT_SECONDS = 15
+    EVENTS_RETRY_MS = 3000
+    EVENTS_QUEUE_SIZE = 100
+    EVENTS_HISTORY_SIZE = 1000
+    EVENTS_TOKEN_EXPIRES = timedelta(seconds=60)
+    
+    # 参照キャッシュ設定（ユーザー情報・カテゴリ所有の LRU 件数上限と有効期間（秒））
+    LOOKUP_CACHE_SIZE = int(os.environ.get('LOOKUP_CACHE_SIZE', 1024))
+    USER_CACHE_TTL = 300
+    CATEGORY_CACHE_TTL = 60
+    
+    # パスワードハッシュ設定（方式・PBKDF2 の反復回数、計算用プロセス数: 0 はリクエストスレッドで計算、
+    # 実行中・待機中の上限: None は計算用プロセス数の2倍。待つ間はリクエストスレッドを占有するため SERVER_THREADS の半分まで）
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'pbkdf2:sha256'
+    PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', 600000))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ['PASSWORD_HASH_MAX_PENDING']) if os.environ.get('PASSWORD_HASH_MAX_PENDING') else None
+    
+    # 認証のスロットリング設定（(試行回数, 秒数) のトークンバケット、保持するキー数の上限）
+    # バケットはプロセスごとのため、本番用サーバーでは SERVER_WORKERS で割った速さで各ワーカーに補充する（合計が設定どおり）
+    AUTH_THROTTLE_ENABLED = True
+    LOGIN_THROTTLE_PER_USER = (5, 60)
+    LOGIN_THROTTLE_PER_CLIENT = (30, 60)
+    REGISTER_THROTTLE_PER_CLIENT = (10, 3600)
+    AUTH_THROTTLE_MAX_KEYS = 10000
+    
+    # 本番用サーバー設定（ワーカープロセス数、プロセスごとのスレッド数、停止時に処理中のリクエストを待つ秒数）
+    SERVER_HOST = os.environ.get('HOST') or '0.0.0.0'
+    SERVER_PORT = int(os.environ.get('PORT', 5001))
+    SERVER_WORKERS = int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1))
+    SERVER_THREADS = int(os.environ.get('WEB_THREADS', 16))
+    SERVER_GRACEFUL_TIMEOUT = int(os.environ.get('GRACEFUL_TIMEOUT', 30))
+    # ワーカーごとの SSE の接続数の上限（None はスレッド数の半分、接続ごとにスレッドを占有するためスレッド数未満、超えた接続は 503）
+    SERVER_MAX_STREAMS = int(os.environ['WEB_MAX_STREAMS']) if os.environ.get('WEB_MAX_STREAMS') else None
+    # ワーカーごとにスレッドの空きを待てる接続数（超えたら受付を止める）と、接続の送受信のタイムアウト秒数
+    SERVER_QUEUE_SIZE = int(os.environ.get('WEB_QUEUE_SIZE', 16))
+    SERVER_TIMEOUT = float(os.environ.get('WEB_TIMEOUT', 30))
+    
+    # ASGI エントリーポイント設定（非同期の読み込み用データベース: 未指定ならファイルの SQLite を aiosqlite で読み込み専用で開く、接続プールの大きさ）
+    ASYNC_DATABASE_URI = os.environ.get('ASYNC_DATABASE_URL')
+    ASYNC_DB_POOL_SIZE = int(os.environ.get('ASYNC_DB_POOL_SIZE', 10))
+    ASYNC_DB_MAX_OVERFLOW = 10
+    
+    # ログ設定（出力先、形式: text / json、ローテーション: size / time / watch / none、書き込み待ちキューの上限）
+    LOG_DIR = os.environ.get('LOG_DIR') or 'logs'
+    LOG_FORMAT = os.environ.get('LOG_FORMAT') or 'text'
+    LOG_ROTATION = os.environ.get('LOG_ROTATION') or 'size'
+    LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024))
+    LOG_BACKUP_COUNT = 5
+    LOG_ROTATE_WHEN = 'midnight'
+    LOG_QUEUE_SIZE = 10000
+    
+    # 成功したリクエストのログのサンプリング率（エンドポイント別の指定がなければ LOG_SAMPLE_RATE、エラーは常に出力）
+    LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 1.0))
+    LOG_SAMPLE_RATES = {}
 
 
 class DevelopmentConfig(Config):
@@ -29,12 +118,32 @@ class TestingConfig(Config):
     DEBUG = True
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    
+    # テストではハッシュ計算を軽くし、リクエストスレッドで計算
+    PASSWORD_HASH_ITERATIONS = 1000
+    PASSWORD_HASH_WORKERS = 0
+    
+    # テスト用の一時データベースは耐久性が不要なため WAL ファイルを作らない
+    SQLITE_PRAGMAS = {
+        **Config.SQLITE_PRAGMAS,
+        'journal_mode': 'MEMORY',
+        'synchronous': 'OFF',
+    }
 
 
 class ProductionConfig(Config):
     """本番環境設定"""
     DEBUG = False
     TESTING = False
+    
+    # 本番ではキーの並べ替え・整形出力をしない
+    JSON_SORT_KEYS = False
+    JSON_COMPACT = True
+    
+    # 本番ではログ基盤で集計しやすい JSON 形式で出力
+    LOG_FORMAT = os.environ.get('LOG_FORMAT') or 'json'
+    # 本番用サーバーは複数プロセスで同じファイルに書き込むため、ローテーションは logrotate などに任せて開き直すだけにする
+    LOG_ROTATION = os.environ.get('LOG_ROTATION') or 'watch'
 
 
 config = {
@@ -2,27 +2,162 @@
 データベース設定とセットアップ
 SQLite + SQLAlchemyを使用
 """
+from contextlib import contextmanager
+from urllib.parse import quote
+
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+
+class RoutingSession(Session):
+    """
+    読み込み専用ブロック内の参照を読み込み用エンジンへ振り分けるセッション
+
+    flush 中や INSERT / UPDATE / DELETE 文、読み込み用エンジンがない場合は常にプライマリを使う。
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get('read_only') and not self._flushing and not getattr(clause, 'is_dml', False):
+            read_engine = current_app.extensions.get('read_engine')
+            if read_engine is not None:
+                return read_engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
 
 # SQLAlchemyインスタンス
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+@contextmanager
+def read_only_session():
+    """ブロック内のセッションの参照を読み込み用エンジンで行う（ブロック内で書き込みはしない）"""
+    session = db.session()
+    previous = session.info.get('read_only', False)
+    session.info['read_only'] = True
+    try:
+        yield session
+    finally:
+        session.info['read_only'] = previous
 
 
 def init_database(app):
     """データベースを初期化"""
+    # プライマリの接続プール（インメモリ SQLite は単一接続のため指定しない）
+    if not is_memory_sqlite(app.config['SQLALCHEMY_DATABASE_URI']):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'pool_size': app.config['DB_POOL_SIZE'],
+            'max_overflow': app.config['DB_MAX_OVERFLOW'],
+            **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        }
+    
     db.init_app(app)
     
     # モデルのインポート（テーブル作成前に必要）
-    from app.models import User, Task, Category
+    from app.models import User, Task, Category, UserTaskStats, UserOpenDueStats, UserDataVersion, SyncChange
+    from app.utils.task_stats import CLOSED_STATUSES, register_stats_listeners, rebuild_task_stats
+    from app.utils.versioning import register_version_listeners
+    
+    # タスク変更時に統計カウンタを更新
+    register_stats_listeners()
+    
+    # タスク・カテゴリ変更時にデータバージョン（ETag）を更新
+    register_version_listeners()
     
     with app.app_context():
+        # 接続ごとの PRAGMA（WAL など）を最初の接続より前に登録
+        register_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
+        
+        # GET ハンドラ用の読み込み専用エンジン（レプリカ URL、またはファイルの SQLite を mode=ro で開く）
+        app.extensions['read_engine'] = create_read_engine(app)
+        
         # テーブル作成
         db.create_all()
         
+        # 既存テーブルへのインデックス追加
+        ensure_indexes()
+        
+        # 統計カウンタ（期限日別カウンタを含む）導入前のデータベースではタスクから再構築
+        if Task.query.first() and not UserTaskStats.query.first():
+            rebuild_task_stats()
+        elif not UserOpenDueStats.query.first() and Task.query.filter(
+            Task.due_date.isnot(None), Task.status.notin_(CLOSED_STATUSES)
+        ).first():
+            rebuild_task_stats()
+        
+        # 差分同期用の変更ログ
+        from app.utils.sync import ensure_sync_log
+        ensure_sync_log()
+        
+        # 全文検索インデックス（FTS5）
+        from app.utils.search import ensure_search_index
+        app.extensions['task_search'] = ensure_search_index(app.config['TASK_SEARCH_TOKENIZER'])
+        
         # 初期データの投入
         create_initial_data()
 
 
+def register_sqlite_pragmas(engine, pragmas):
+    """新しい接続ごとに PRAGMA を設定（SQLite 以外・設定なしの場合は何もしない）"""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+    
+    statements = [f'PRAGMA {name} = {value}' for name, value in pragmas.items()]
+    
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+def is_memory_sqlite(url):
+    """インメモリの SQLite かどうか"""
+    url = make_url(url)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def create_read_engine(app):
+    """読み込み専用エンジンを作成（対象がない場合は None で、参照もプライマリを使う）"""
+    url = app.config['SQLALCHEMY_READ_DATABASE_URI']
+    primary_url = db.engine.url
+    if not url:
+        if primary_url.get_backend_name() != 'sqlite' or is_memory_sqlite(primary_url):
+            return None
+        url = read_only_sqlite_url(primary_url)
+    
+    engine = create_engine(
+        url,
+        pool_size=app.config['DB_READ_POOL_SIZE'],
+        max_overflow=app.config['DB_READ_MAX_OVERFLOW']
+    )
+    register_sqlite_pragmas(engine, read_only_pragmas(app))
+    return engine
+
+
+def read_only_sqlite_url(primary_url, drivername='sqlite'):
+    """ファイルの SQLite を読み込み専用（mode=ro）で開く URL"""
+    # WAL では読み込み専用の接続が書き込み中もブロックされずに参照できる
+    return f'{drivername}:///file:{quote(primary_url.database)}?mode=ro&uri=true'
+
+
+def read_only_pragmas(app):
+    """読み込み専用の接続に設定する PRAGMA（journal_mode の変更は書き込みになるためプライマリ側でのみ設定）"""
+    return {name: value for name, value in app.config['SQLITE_PRAGMAS'].items() if name != 'journal_mode'}
+
+
+def ensure_indexes():
+    """モデルに定義されたインデックスのうち未作成のものを作成"""
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+
 def create_initial_data():
     """初期データの作成（デモ用）"""
     from app.models import User, Category
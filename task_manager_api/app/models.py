@@ -3,8 +3,11 @@
 User, Task, Categoryの関係を定義
 """
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import joinedload, load_only
 from app.database import db
+from app.utils.validators import TaskValidator
+from app.utils.passwords import get_password_hasher
 
 
 class User(db.Model):
@@ -23,22 +26,16 @@ class User(db.Model):
     categories = db.relationship('Category', backref='user', lazy=True)
 
     def set_password(self, password):
-        """パスワードをハッシュ化して保存（PBKDF2固定）"""
-        # 一部の環境では scrypt が利用できないため、方式を PBKDF2 に固定
-        self.password_hash = generate_password_hash(
-            password,
-            method='pbkdf2:sha256',
-            salt_length=16
-        )
+        """パスワードをハッシュ化して保存（方式・反復回数は設定に従い、プロセスプールで計算）"""
+        self.password_hash = get_password_hasher().hash(password)
 
     def check_password(self, password):
         """パスワードをチェック"""
-        try:
-            return check_password_hash(self.password_hash, password)
-        except (ValueError, AttributeError):
-            # 旧ハッシュ方式（例: scrypt）が使われている環境では検証不可
-            # セキュアに移行するには、パスワード再設定を行う
-            return False
+        return get_password_hasher().verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        """保存済みハッシュが現在の設定と異なる方式・反復回数かどうか"""
+        return get_password_hasher().needs_rehash(self.password_hash)
 
     def to_dict(self):
         """辞書形式で返す（パスワードは除外）"""
@@ -46,7 +43,7 @@ class User(db.Model):
             'id': self.id,
             'username': self.username,
             'email': self.email,
-            'created_at': self.created_at.isoformat(),
+            'created_at': self.created_at,
             'is_active': self.is_active
         }
 
@@ -54,6 +51,12 @@ class User(db.Model):
 class Category(db.Model):
     """タスクカテゴリモデル"""
     __tablename__ = 'categories'
+    __table_args__ = (
+        # 一覧（名前順）と同名チェック
+        db.Index('uq_categories_user_name', 'user_id', 'name', unique=True),
+        # 削除したカテゴリの ID を再利用しない（他のプロセスのキャッシュに残った ID が別のユーザーのカテゴリを指さないように）
+        {'sqlite_autoincrement': True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
@@ -65,21 +68,105 @@ class Category(db.Model):
     # リレーション
     tasks = db.relationship('Task', backref='category', lazy=True)
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'color': self.color,
-            'description': self.description,
-            'user_id': self.user_id,
-            'created_at': self.created_at.isoformat(),
-            'task_count': len(self.tasks)
-        }
+    # ?fields= で選択できるフィールド（to_dict の出力順）
+    FIELDS = ('id', 'name', 'color', 'description', 'user_id', 'created_at', 'task_count', 'status_counts')
+    COUNT_FIELDS = ('task_count', 'status_counts')
+
+    @classmethod
+    def load_fields(cls, fields):
+        """指定フィールドの列だけを SELECT するローダーオプション（読み込まない列へのアクセスはエラー）"""
+        columns = [getattr(cls, field) for field in cls.FIELDS if field in fields and field not in cls.COUNT_FIELDS]
+        return load_only(cls.id, *columns, raiseload=True)
+
+    @classmethod
+    def list_with_task_counts(cls, user_id, fields=None):
+        """
+        カテゴリ一覧をタスク件数（合計・ステータス別）付きで取得
+
+        件数はタスクを読み込まず、GROUP BY したサブクエリを外部結合して1クエリで求める。
+        fields 指定時は必要な列だけを SELECT し、件数が不要なら集計もしない。
+        戻り値は (Category, task_count, status_counts) のリスト。
+        """
+        rows = db.session.execute(cls.select_with_task_counts(user_id, fields)).all()
+        return cls.rows_with_task_counts(rows)
+
+    @classmethod
+    def select_with_task_counts(cls, user_id, fields=None):
+        """list_with_task_counts の SELECT 文（非同期セッションからも実行できる）"""
+        if fields is not None and not any(field in fields for field in cls.COUNT_FIELDS):
+            return select(cls).options(cls.load_fields(fields)).filter(cls.user_id == user_id).order_by(cls.name)
+
+        statuses = sorted(TaskValidator.VALID_STATUSES)
+        counts = select(
+            Task.category_id.label('category_id'),
+            func.count(Task.id).label('task_count'),
+            *[func.sum(case((Task.status == status, 1), else_=0)).label(status) for status in statuses]
+        ).filter(
+            Task.user_id == user_id,
+            Task.category_id.isnot(None)
+        ).group_by(Task.category_id).subquery()
+
+        stmt = select(
+            cls,
+            func.coalesce(counts.c.task_count, 0),
+            *[func.coalesce(counts.c[status], 0) for status in statuses]
+        ).outerjoin(
+            counts, counts.c.category_id == cls.id
+        ).filter(cls.user_id == user_id).order_by(cls.name)
+        if fields is not None:
+            stmt = stmt.options(cls.load_fields(fields))
+        return stmt
+
+    @staticmethod
+    def rows_with_task_counts(rows):
+        """select_with_task_counts の結果行を (Category, task_count, status_counts) に変換"""
+        statuses = sorted(TaskValidator.VALID_STATUSES)
+        result = []
+        for category, *counts in rows:
+            if not counts:
+                result.append((category, None, None))
+                continue
+            task_count, *status_values = counts
+            result.append((category, task_count, dict(zip(statuses, status_values))))
+        return result
+
+    def to_dict(self, task_count=None, status_counts=None, fields=None):
+        """
+        辞書形式で返す（件数が集計済みの場合はそれを使用）
+
+        fields 指定時はそのフィールドだけを返し、読み込んでいない列や件数には触れない。
+        """
+        if fields is None:
+            fields = self.FIELDS
+        if task_count is None and 'task_count' in fields:
+            task_count = Task.query.filter_by(user_id=self.user_id, category_id=self.id).count()
+
+        result = {}
+        for field in self.FIELDS:
+            if field not in fields:
+                continue
+            if field == 'task_count':
+                result[field] = task_count
+            elif field == 'status_counts':
+                # ステータス別件数は集計済みの場合のみ返す
+                if status_counts is not None:
+                    result[field] = status_counts
+            else:
+                result[field] = getattr(self, field)
+        return result
 
 
 class Task(db.Model):
     """タスクモデル"""
     __tablename__ = 'tasks'
+    __table_args__ = (
+        # 一覧: user_id で絞り込み created_at 降順（id は rowid として索引に含まれる）
+        db.Index('ix_tasks_user_created', 'user_id', 'created_at'),
+        # フィルタ付き一覧
+        db.Index('ix_tasks_user_status_created', 'user_id', 'status', 'created_at'),
+        db.Index('ix_tasks_user_priority_created', 'user_id', 'priority', 'created_at'),
+        db.Index('ix_tasks_user_category_created', 'user_id', 'category_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -93,27 +180,125 @@ class Task(db.Model):
     
     # 外部キー
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'))
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), index=True)
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'status': self.status,
-            'priority': self.priority,
-            # 期限日は日付のみ返す（YYYY-MM-DD）
-            'due_date': self.due_date.date().isoformat() if self.due_date else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'user_id': self.user_id,
-            'category_id': self.category_id,
-            'category_name': self.category.name if self.category else None
-        }
+    # ?fields= で選択できるフィールド（to_dict の出力順）
+    FIELDS = (
+        'id', 'title', 'description', 'status', 'priority', 'due_date', 'completed_at',
+        'created_at', 'updated_at', 'user_id', 'category_id', 'category_name'
+    )
+    # 一覧表示に必要な最小限のフィールド（fields=compact）
+    COMPACT_FIELDS = ('id', 'title', 'status', 'priority', 'due_date', 'category_name')
+
+    @classmethod
+    def query_with_category(cls):
+        """カテゴリを同一クエリでJOINして取得する一覧用クエリ（N+1回避）"""
+        return cls.query.options(joinedload(cls.category))
+
+    @classmethod
+    def load_fields(cls, fields):
+        """
+        指定フィールドの列だけを SELECT するローダーオプション
+
+        created_at はキーセットページングのカーソルに使うため常に読み込む。
+        カテゴリ名が不要な場合は categories を JOIN しない。
+        読み込まない列へのアクセスは遅延ロードせずエラーにする。
+        """
+        if fields is None:
+            return [joinedload(cls.category)]
+
+        columns = [
+            getattr(cls, field) for field in cls.FIELDS
+            if field in fields and field not in ('id', 'created_at', 'category_name')
+        ]
+        options = [load_only(cls.id, cls.created_at, *columns, raiseload=True)]
+        if 'category_name' in fields:
+            options.append(joinedload(cls.category).load_only(Category.name, raiseload=True))
+        return options
+
+    @classmethod
+    def query_with_fields(cls, fields=None):
+        """指定フィールドの列だけを取得する一覧用クエリ（fields が None なら query_with_category と同じ）"""
+        return cls.query.options(*cls.load_fields(fields))
+
+    def to_dict(self, fields=None):
+        """辞書形式で返す（fields 指定時はそのフィールドだけを返し、読み込んでいない列には触れない）"""
+        if fields is None:
+            fields = self.FIELDS
+        return {field: TASK_SERIALIZERS[field](self) for field in self.FIELDS if field in fields}
 
     def mark_completed(self):
         """タスクを完了マーク"""
         self.status = 'completed'
         self.completed_at = datetime.utcnow()
-        db.session.commit()
\ No newline at end of file
+        db.session.commit()
+
+
+# Task.to_dict のフィールドごとの値（要求されたフィールドの列だけに触れる、日時は JSON エンコード時に ISO 8601 へ変換）
+TASK_SERIALIZERS = {
+    'id': lambda task: task.id,
+    'title': lambda task: task.title,
+    'description': lambda task: task.description,
+    'status': lambda task: task.status,
+    'priority': lambda task: task.priority,
+    # 期限日は日付のみ返す（YYYY-MM-DD）
+    'due_date': lambda task: task.due_date.date() if task.due_date else None,
+    'completed_at': lambda task: task.completed_at,
+    'created_at': lambda task: task.created_at,
+    'updated_at': lambda task: task.updated_at,
+    'user_id': lambda task: task.user_id,
+    'category_id': lambda task: task.category_id,
+    'category_name': lambda task: task.category.name if task.category else None,
+}
+
+
+class UserTaskStats(db.Model):
+    """ユーザー別タスク件数カウンタ（ステータス×優先度ごと）"""
+    __tablename__ = 'user_task_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    priority = db.Column(db.String(10), primary_key=True)
+    task_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class UserOpenDueStats(db.Model):
+    """
+    ユーザー別の未完了タスクの期限日別件数カウンタ（期限切れ件数の集計用）
+
+    完了・キャンセル済み・期限日なしのタスクは含めず、件数が 0 になった行は削除する。
+    """
+    __tablename__ = 'user_open_due_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    due_date = db.Column(db.Date, primary_key=True)
+    priority = db.Column(db.String(10), primary_key=True)
+    task_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class UserDataVersion(db.Model):
+    """ユーザー別データバージョン（タスク・カテゴリの書き込みごとに増加、ETag に使用）"""
+    __tablename__ = 'user_data_versions'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class SyncChange(db.Model):
+    """
+    差分同期用の変更ログ（エンティティごとに最新の変更1行、削除は墓標として残す）
+
+    tasks / categories のトリガーで更新され、seq は再利用されない単調増加の連番。
+    """
+    __tablename__ = 'sync_changes'
+    __table_args__ = (
+        db.UniqueConstraint('entity_type', 'entity_id', name='uq_sync_changes_entity'),
+        db.Index('ix_sync_changes_user_seq', 'user_id', 'seq'),
+        {'sqlite_autoincrement': True},
+    )
+    
+    seq = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    entity_type = db.Column(db.String(20), nullable=False)  # task, category
+    entity_id = db.Column(db.Integer, nullable=False)
+    deleted = db.Column(db.Boolean, nullable=False, default=False)
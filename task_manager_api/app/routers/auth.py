@@ -7,7 +7,10 @@ from flask_jwt_extended import create_access_token, create_refresh_token, jwt_re
 from app.models import User
 from app.database import db
 from app.utils.validators import UserValidator, ValidationError
-from app.utils.decorators import combined_decorator, handle_errors
+from app.utils.decorators import combined_decorator, handle_errors, read_only
+from app.utils.cache import get_user_record, invalidate_user
+from app.utils.passwords import get_password_hasher
+from app.utils.throttle import reset_login_throttle, throttle_login, throttle_register
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -24,6 +27,9 @@ def register():
     email = validated_data['email']
     password = validated_data['password']
     
+    # 同一クライアントからの大量登録はハッシュ計算の前に拒否
+    throttle_register()
+    
     # 既存ユーザーチェック
     if User.query.filter_by(username=username).first():
         return jsonify({'error': 'このユーザー名は既に使用されています'}), 409
@@ -37,6 +43,7 @@ def register():
     
     db.session.add(user)
     db.session.commit()
+    invalidate_user(user.id)
     
     return jsonify({
         'message': 'ユーザー登録が完了しました',
@@ -56,23 +63,30 @@ def login():
     if not all([username, password]):
         raise ValidationError('ユーザー名とパスワードは必須項目です')
     
-    # ユーザー認証
+    # ユーザー名・クライアントごとの試行回数の超過はハッシュ計算の前に拒否
+    throttle_login(str(username))
+    
+    # ユーザー認証（存在しないユーザーも同じ計算量で検証し、応答を区別しない）
     user = User.query.filter_by(username=username).first()
     
-    if not user:
-        return jsonify({
-            'error': '入力されたユーザー名が見つかりません。', 
-            'details': 'ユーザー名を確認して再度お試しください。'
-        }), 401
+    if user is None:
+        get_password_hasher().verify_unknown(password)
     
-    if not user.check_password(password):
+    if user is None or not user.check_password(password):
         return jsonify({
-            'error': 'パスワードが正しくありません。',
-            'details': 'パスワードを確認して再度お試しください。'
+            'error': 'ユーザー名またはパスワードが正しくありません',
+            'details': '入力内容を確認して再度お試しください。'
         }), 401
+    
+    reset_login_throttle(str(username))
         
     if not user.is_active:
         return jsonify({'error': 'アカウントが無効になっています'}), 401
+    
+    # ハッシュの方式・反復回数が変わっていれば、平文がわかるログイン成功時に再ハッシュ
+    if user.password_needs_rehash():
+        user.set_password(password)
+        db.session.commit()
         
     # トークン生成
     access_token = create_access_token(identity=str(user.id))
@@ -92,9 +106,9 @@ def login():
 def refresh():
     """アクセストークン更新"""
     current_user_id = int(get_jwt_identity())
-    user = User.query.get(current_user_id)
+    user = get_user_record(current_user_id)
     
-    if not user or not user.is_active:
+    if not user or not user['is_active']:
         return jsonify({'error': 'ユーザーが見つからないか無効です'}), 401
         
     new_token = create_access_token(identity=str(current_user_id))
@@ -106,15 +120,16 @@ def refresh():
 
 @auth_bp.route('/me', methods=['GET'])
 @jwt_required()
+@read_only
 @handle_errors
 def get_current_user():
     """現在のユーザー情報取得"""
     current_user_id = int(get_jwt_identity())
-    user = User.query.get(current_user_id)
+    user = get_user_record(current_user_id)
     
     if not user:
         return jsonify({'error': 'ユーザーが見つかりません'}), 404
         
     return jsonify({
-        'user': user.to_dict()
+        'user': user
     })
\ No newline at end of file
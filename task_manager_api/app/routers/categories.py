@@ -6,22 +6,36 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import Category, Task
 from app.database import db
+from app.utils.validators import ValidationError
+from app.utils.decorators import conditional_get, read_only
+from app.utils.events import publish_event
+from app.utils.cache import invalidate_categories
+from app.utils.fields import parse_category_fields, parse_task_fields
+from app.utils.pagination import paginate_by_created_at, parse_limit, wants_total
 
 categories_bp = Blueprint('categories', __name__)
 
 
 @categories_bp.route('/', methods=['GET'])
 @jwt_required()
+@read_only
+@conditional_get
 def get_categories():
     """カテゴリ一覧取得"""
     try:
         current_user_id = int(get_jwt_identity())
-        categories = Category.query.filter_by(user_id=current_user_id).order_by(Category.name).all()
+        fields = parse_category_fields(request.args)
+        categories = Category.list_with_task_counts(current_user_id, fields)
         
         return jsonify({
-            'categories': [category.to_dict() for category in categories]
+            'categories': [
+                category.to_dict(task_count=task_count, status_counts=status_counts, fields=fields)
+                for category, task_count, status_counts in categories
+            ]
         })
         
+    except ValidationError as e:
+        return jsonify({'error': e.message}), 400
     except Exception as e:
         return jsonify({'error': f'カテゴリ取得でエラーが発生しました: {str(e)}'}), 500
 
@@ -56,10 +70,14 @@ def create_category():
         
         db.session.add(category)
         db.session.commit()
+        invalidate_categories(current_user_id)
+        
+        category_data = category.to_dict()
+        publish_event(current_user_id, 'category.created', {'id': category.id, 'category': category_data})
         
         return jsonify({
             'message': 'カテゴリを作成しました',
-            'category': category.to_dict()
+            'category': category_data
         }), 201
         
     except Exception as e:
@@ -97,9 +115,12 @@ def update_category(category_id):
             
         db.session.commit()
         
+        category_data = category.to_dict()
+        publish_event(current_user_id, 'category.updated', {'id': category.id, 'category': category_data})
+        
         return jsonify({
             'message': 'カテゴリを更新しました',
-            'category': category.to_dict()
+            'category': category_data
         })
         
     except Exception as e:
@@ -119,12 +140,15 @@ def delete_category(category_id):
             return jsonify({'error': 'カテゴリが見つかりません'}), 404
             
         # カテゴリに紐づいているタスクがあるかチェック
-        task_count = Task.query.filter_by(category_id=category_id).count()
+        task_count = Task.query.filter_by(user_id=current_user_id, category_id=category_id).count()
         if task_count > 0:
             return jsonify({'error': f'このカテゴリには {task_count} 個のタスクが存在するため削除できません'}), 409
             
         db.session.delete(category)
         db.session.commit()
+        invalidate_categories(current_user_id)
+        
+        publish_event(current_user_id, 'category.deleted', {'id': category_id})
         
         return jsonify({'message': 'カテゴリを削除しました'})
         
@@ -135,6 +159,8 @@ def delete_category(category_id):
 
 @categories_bp.route('/<int:category_id>/tasks', methods=['GET'])
 @jwt_required()
+@read_only
+@conditional_get
 def get_category_tasks(category_id):
     """特定カテゴリのタスク一覧"""
     try:
@@ -145,12 +171,24 @@ def get_category_tasks(category_id):
         if not category:
             return jsonify({'error': 'カテゴリが見つかりません'}), 404
         
-        tasks = Task.query.filter_by(category_id=category_id, user_id=current_user_id).order_by(Task.created_at.desc()).all()
+        limit = parse_limit(request.args.get('limit'))
+        cursor = request.args.get('cursor')
+        fields = parse_task_fields(request.args)
         
-        return jsonify({
+        query = Task.query_with_fields(fields).filter_by(category_id=category_id, user_id=current_user_id)
+        tasks, next_cursor = paginate_by_created_at(query, Task, limit, cursor)
+        
+        result = {
             'category': category.to_dict(),
-            'tasks': [task.to_dict() for task in tasks]
-        })
+            'tasks': [task.to_dict(fields) for task in tasks],
+            'next_cursor': next_cursor
+        }
+        if limit is not None and wants_total(request.args):
+            result['total'] = query.count()
+        
+        return jsonify(result)
         
+    except ValidationError as e:
+        return jsonify({'error': e.message}), 400
     except Exception as e:
         return jsonify({'error': f'カテゴリタスク取得でエラーが発生しました: {str(e)}'}), 500
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""
+イベント配信APIエンドポイント
+タスク・カテゴリの変更通知を Server-Sent Events で配信
+"""
+from flask import Blueprint, Response, current_app, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.utils.decorators import handle_errors
+from app.utils.events import TooManySubscribers, create_stream_token, get_event_hub, iter_sse, stream_user_id
+
+events_bp = Blueprint('events', __name__)
+
+
+@events_bp.route('/token', methods=['POST'])
+@jwt_required()
+@handle_errors
+def create_events_token():
+    """ストリーム接続用トークンの発行（EventSource の URL に付ける、有効期間は EVENTS_TOKEN_EXPIRES）"""
+    current_user_id = int(get_jwt_identity())
+    return jsonify({
+        'token': create_stream_token(current_user_id),
+        'expires_in': int(current_app.config['EVENTS_TOKEN_EXPIRES'].total_seconds())
+    })
+
+
+@events_bp.route('', methods=['GET'])
+def stream_events():
+    """
+    変更通知のストリーム（text/event-stream）
+
+    EventSource はヘッダーを付けられないため、/api/events/token で発行したトークンをクエリ文字列（?token=）で受け付ける。
+    再接続時の Last-Event-ID ヘッダー（または last_event_id パラメータ）以降のイベントを再送する。
+    このプロセスの接続数が上限（EventHub.max_subscribers）に達している場合は 503。
+    """
+    current_user_id = stream_user_id()
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+
+    hub = get_event_hub()
+    try:
+        subscription = hub.subscribe(current_user_id, last_event_id)
+    except TooManySubscribers as e:
+        # プリフォークサーバーでは接続ごとにリクエストスレッドを占有するため、上限を超えた接続は断る
+        retry_after = -(-current_app.config['EVENTS_RETRY_MS'] // 1000)
+        return jsonify({'error': e.message}), 503, {'Retry-After': str(retry_after)}
+    stream = iter_sse(
+        hub,
+        subscription,
+        heartbeat=current_app.config['EVENTS_HEARTBEAT_SECONDS'],
+        retry_ms=current_app.config['EVENTS_RETRY_MS']
+    )
+
+    response = Response(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # 本文を読み始める前に切断された場合（ジェネレータの finally が実行されない）も購読を解除し、接続数の上限に数えない
+    response.call_on_close(lambda: hub.unsubscribe(subscription))
+    return response
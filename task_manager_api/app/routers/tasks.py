@@ -3,48 +3,231 @@
 CRUD操作とタスクステータス管理
 """
 from datetime import datetime
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import Task, Category
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from app.models import Category, Task
 from app.database import db
 from app.utils.validators import TaskValidator, ValidationError
-from app.utils.decorators import combined_decorator, handle_errors
+from app.utils.decorators import combined_decorator, conditional_get, handle_errors, read_only
+from app.utils.pagination import paginate_by_created_at, parse_limit, wants_total
+from app.utils.task_stats import read_task_stats
+from app.utils.search import match_tasks
+from app.utils.bulk import insert_tasks, task_row
+from app.utils.export import EXPORT_BATCH_SIZE, EXPORT_FORMATS, TASK_EXPORT_FIELDS, iter_csv, iter_ndjson
+from app.utils.importer import ImportAborted, TaskImporter
+from app.utils.sync import fetch_changes
+from app.utils.events import publish_event
+from app.utils.cache import get_owned_category_ids, invalidate_categories, owns_category
+from app.utils.fields import parse_task_fields
+
+# 検索結果・差分同期の既定件数
+DEFAULT_SEARCH_LIMIT = 20
+DEFAULT_CHANGES_LIMIT = 100
+
+# バッチAPIで1リクエストに含められる操作数の上限
+MAX_BATCH_OPERATIONS = 500
+BATCH_OPERATIONS = ('create', 'update', 'delete')
+
+# バッチ操作ごとに配信するイベント名（task.<名前>）
+BATCH_EVENTS = {'create': 'created', 'update': 'updated', 'delete': 'deleted'}
 
 tasks_bp = Blueprint('tasks', __name__)
 
 
 @tasks_bp.route('/', methods=['GET'])
 @jwt_required()
+@read_only
+@conditional_get
 def get_tasks():
     """タスク一覧取得"""
     try:
         current_user_id = int(get_jwt_identity())
         
         # クエリパラメータ
-        status = request.args.get('status')
-        priority = request.args.get('priority')
-        category_id = request.args.get('category_id')
+        limit = parse_limit(request.args.get('limit'))
+        cursor = request.args.get('cursor')
+        fields = parse_task_fields(request.args)
         
-        # ベースクエリ
-        query = Task.query.filter_by(user_id=current_user_id)
+        # ベースクエリ（必要な列だけを SELECT、カテゴリ名はJOINで同時取得）
+        query = Task.query_with_fields(fields).filter_by(user_id=current_user_id)
         
         # フィルタリング
-        if status:
-            query = query.filter_by(status=status)
-        if priority:
-            query = query.filter_by(priority=priority)
-        if category_id:
-            query = query.filter_by(category_id=int(category_id))
+        query = apply_task_filters(query, request.args)
             
-        tasks = query.order_by(Task.created_at.desc()).all()
+        tasks, next_cursor = paginate_by_created_at(query, Task, limit, cursor)
+        
+        result = {
+            'tasks': [task.to_dict(fields) for task in tasks],
+            'next_cursor': next_cursor
+        }
+        
+        # 件数: ページングなしは取得件数、ページング時は要求された場合のみ別クエリで集計
+        if limit is None and not cursor:
+            result['total'] = len(tasks)
+        elif wants_total(request.args):
+            result['total'] = query.count()
+        
+        return jsonify(result)
+        
+    except ValidationError as e:
+        return jsonify({'error': e.message}), 400
+    except Exception as e:
+        return jsonify({'error': f'タスク取得でエラーが発生しました: {str(e)}'}), 500
+
+
+@tasks_bp.route('/search', methods=['GET'])
+@jwt_required()
+@read_only
+@conditional_get
+def search_tasks():
+    """タスクの全文検索（タイトル・説明文）"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        if not current_app.extensions.get('task_search'):
+            return jsonify({'error': '全文検索は現在利用できません'}), 503
+        
+        # クエリパラメータ
+        q = request.args.get('q')
+        limit = parse_limit(request.args.get('limit')) or DEFAULT_SEARCH_LIMIT
+        cursor = request.args.get('cursor')
+        fields = parse_task_fields(request.args)
+        
+        query = Task.query_with_fields(fields).filter_by(user_id=current_user_id)
+        query = apply_task_filters(query, request.args)
+        
+        tasks, next_cursor = match_tasks(
+            query, q, current_app.config['TASK_SEARCH_TOKENIZER'], limit, cursor
+        )
         
         return jsonify({
-            'tasks': [task.to_dict() for task in tasks],
-            'total': len(tasks)
+            'tasks': [task.to_dict(fields) for task in tasks],
+            'next_cursor': next_cursor
         })
         
+    except ValidationError as e:
+        return jsonify({'error': e.message}), 400
     except Exception as e:
-        return jsonify({'error': f'タスク取得でエラーが発生しました: {str(e)}'}), 500
+        return jsonify({'error': f'タスク検索でエラーが発生しました: {str(e)}'}), 500
+
+
+@tasks_bp.route('/changes', methods=['GET'])
+@jwt_required()
+@read_only
+@conditional_get
+def get_changes():
+    """
+    差分同期: since 以降に変更されたタスク・カテゴリを変更順に取得
+
+    削除された行は deleted=true の墓標として返す。
+    レスポンスの next_since を次回の since に指定する。
+    """
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        try:
+            since = int(request.args.get('since', 0))
+        except ValueError:
+            raise ValidationError('since は整数で指定してください', 'since')
+        if since < 0:
+            raise ValidationError('since は0以上で指定してください', 'since')
+        limit = parse_limit(request.args.get('limit')) or DEFAULT_CHANGES_LIMIT
+        
+        changes, next_since, has_more = fetch_changes(current_user_id, since, limit)
+        
+        return jsonify({
+            'changes': changes,
+            'next_since': next_since,
+            'has_more': has_more
+        })
+        
+    except ValidationError as e:
+        return jsonify({'error': e.message}), 400
+    except Exception as e:
+        return jsonify({'error': f'変更取得でエラーが発生しました: {str(e)}'}), 500
+
+
+@tasks_bp.route('/export', methods=['GET'])
+@jwt_required()
+@read_only
+def export_tasks():
+    """タスクの全件エクスポート（NDJSON / CSV をストリーミング出力）"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f'format は {", ".join(EXPORT_FORMATS)} のいずれかで指定してください'}), 400
+        fields = parse_task_fields(request.args)
+        
+        stmt = select(Task).options(*Task.load_fields(fields)).filter_by(user_id=current_user_id)
+        stmt = apply_task_filters(stmt, request.args).order_by(Task.id)
+        
+        # サーバー側カーソルから一定件数ずつ読み出す（全件をメモリに載せない）
+        result = db.session.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE)).scalars()
+        rows = (task.to_dict(fields) for task in result)
+        body = iter_ndjson(rows) if export_format == 'ndjson' else iter_csv(rows, fields or TASK_EXPORT_FIELDS)
+        
+        filename = f'tasks_{datetime.utcnow().strftime("%Y%m%d%H%M%S")}.{export_format}'
+        return Response(
+            stream_with_context(body),
+            mimetype=EXPORT_FORMATS[export_format],
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+        )
+        
+    except ValidationError as e:
+        return jsonify({'error': e.message}), 400
+    except Exception as e:
+        return jsonify({'error': f'タスクエクスポートでエラーが発生しました: {str(e)}'}), 500
+
+
+@tasks_bp.route('/import', methods=['POST'])
+@jwt_required()
+@handle_errors
+def import_tasks():
+    """
+    タスクの一括インポート（NDJSON / CSV）
+
+    multipart の file またはリクエストボディをそのまま1行ずつ読み込み、
+    チャンク単位で一括INSERTする。却下した行はサマリーで返す。
+    途中で中止した場合（CSV の形式不正・書き込みの競合）は 400 で、それまでに取り込んだ件数をサマリーで返す。
+    """
+    current_user_id = int(get_jwt_identity())
+    
+    upload = request.files.get('file')
+    if upload:
+        stream = upload.stream
+        source_type = upload.mimetype or ''
+        filename = upload.filename or ''
+    else:
+        stream = request.stream
+        source_type = request.mimetype or ''
+        filename = ''
+    
+    import_format = request.args.get('format')
+    if not import_format:
+        is_csv = 'csv' in source_type or filename.lower().endswith('.csv')
+        import_format = 'csv' if is_csv else 'ndjson'
+    
+    create_categories = request.args.get('create_categories', '').lower() in ('1', 'true', 'yes')
+    error = None
+    try:
+        summary = TaskImporter(current_user_id, create_categories=create_categories).run(stream, import_format)
+    except ImportAborted as e:
+        summary, error = e.summary, e.message
+    if create_categories or error:
+        invalidate_categories(current_user_id)
+    if summary['imported']:
+        publish_event(current_user_id, 'tasks.imported', {'imported': summary['imported']})
+    if error:
+        return jsonify({'error': error, **summary}), 400
+    
+    return jsonify({
+        'message': f'{summary["imported"]} 件のタスクをインポートしました',
+        **summary
+    })
 
 
 @tasks_bp.route('/', methods=['POST'])
@@ -56,61 +239,48 @@ def create_task():
     data = request.get_json()
     
     # バリデーション実行
-    validated_data = TaskValidator.validate_task_data(data)
-    title = validated_data['title']
+    TaskValidator.validate_task_data(data)
     
     # カテゴリの存在確認
     category_id = data.get('category_id')
     if category_id:
-        category = Category.query.filter_by(id=category_id, user_id=current_user_id).first()
-        if not category:
+        if not owns_category(current_user_id, category_id):
             return jsonify({'error': '指定されたカテゴリが見つかりません'}), 404
     
-    # 新規タスク作成
-    task = Task(
-        title=title,
-        description=data.get('description', ''),
-        priority=data.get('priority', 'medium'),
-        status=data.get('status', 'pending'),
-        user_id=current_user_id,
-        category_id=category_id
-    )
-    
-    # 期限日の設定（YYYY-MM-DD 形式を優先、なければISO8601を許可）
-    due_date_str = data.get('due_date')
-    if due_date_str:
-        try:
-            if isinstance(due_date_str, str) and len(due_date_str) == 10:
-                # 日付のみ
-                task.due_date = datetime.strptime(due_date_str, '%Y-%m-%d')
-            else:
-                # 互換用: 旧クライアントからの日時も受容
-                task.due_date = datetime.fromisoformat(due_date_str.replace('Z', '+00:00'))
-        except ValueError:
-            return jsonify({'error': '期限日の形式が正しくありません（YYYY-MM-DD）'}), 400
+    # 新規タスク作成（期限日の形式不正は ValidationError）
+    task = build_task(data, current_user_id)
     
     db.session.add(task)
-    db.session.commit()
+    if not commit_task_changes(current_user_id, [int(category_id)] if category_id else ()):
+        return jsonify({'error': '指定されたカテゴリが見つかりません'}), 404
+    
+    task_data = task.to_dict()
+    publish_event(current_user_id, 'task.created', {'id': task.id, 'task': task_data})
     
     return jsonify({
         'message': 'タスクを作成しました',
-        'task': task.to_dict()
+        'task': task_data
     }), 201
 
 
 @tasks_bp.route('/<int:task_id>', methods=['GET'])
 @jwt_required()
+@read_only
+@conditional_get
 def get_task(task_id):
     """特定のタスク取得"""
     try:
         current_user_id = int(get_jwt_identity())
-        task = Task.query.filter_by(id=task_id, user_id=current_user_id).first()
+        fields = parse_task_fields(request.args)
+        task = Task.query_with_fields(fields).filter_by(id=task_id, user_id=current_user_id).first()
         
         if not task:
             return jsonify({'error': 'タスクが見つかりません'}), 404
             
-        return jsonify({'task': task.to_dict()})
+        return jsonify({'task': task.to_dict(fields)})
         
+    except ValidationError as e:
+        return jsonify({'error': e.message}), 400
     except Exception as e:
         return jsonify({'error': f'タスク取得でエラーが発生しました: {str(e)}'}), 500
 
@@ -130,48 +300,30 @@ def update_task(task_id):
         if not data:
             return jsonify({'error': 'JSONデータが必要です'}), 400
         
+        # バッチの更新と同じバリデーション
+        TaskValidator.validate_task_update(data)
+        
+        # カテゴリの存在確認
+        if data.get('category_id'):
+            if not owns_category(current_user_id, data['category_id']):
+                return jsonify({'error': '指定されたカテゴリが見つかりません'}), 404
+        
         # フィールド更新
-        if 'title' in data:
-            task.title = data['title']
-        if 'description' in data:
-            task.description = data['description']
-        if 'status' in data:
-            task.status = data['status']
-            # 完了状態の場合、完了日時を設定
-            if data['status'] == 'completed':
-                task.completed_at = datetime.utcnow()
-        if 'priority' in data:
-            task.priority = data['priority']
-        if 'category_id' in data:
-            # カテゴリの存在確認
-            if data['category_id']:
-                category = Category.query.filter_by(id=data['category_id'], user_id=current_user_id).first()
-                if not category:
-                    return jsonify({'error': '指定されたカテゴリが見つかりません'}), 404
-            task.category_id = data['category_id']
-        
-        # 期限日の更新（YYYY-MM-DD 形式を優先、なければISO8601を許可）
-        if 'due_date' in data:
-            due_date_str = data['due_date']
-            if due_date_str:
-                try:
-                    if isinstance(due_date_str, str) and len(due_date_str) == 10:
-                        task.due_date = datetime.strptime(due_date_str, '%Y-%m-%d')
-                    else:
-                        task.due_date = datetime.fromisoformat(due_date_str.replace('Z', '+00:00'))
-                except ValueError:
-                    return jsonify({'error': '期限日の形式が正しくありません（YYYY-MM-DD）'}), 400
-            else:
-                task.due_date = None
-                
-        task.updated_at = datetime.utcnow()
-        db.session.commit()
+        apply_task_update(task, data)
+        if not commit_task_changes(current_user_id, [data['category_id']] if data.get('category_id') else ()):
+            return jsonify({'error': '指定されたカテゴリが見つかりません'}), 404
+        
+        task_data = task.to_dict()
+        publish_event(current_user_id, 'task.updated', {'id': task.id, 'task': task_data})
         
         return jsonify({
             'message': 'タスクを更新しました',
-            'task': task.to_dict()
+            'task': task_data
         })
         
+    except ValidationError as e:
+        db.session.rollback()
+        return jsonify({'error': e.message}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'タスク更新でエラーが発生しました: {str(e)}'}), 500
@@ -191,6 +343,8 @@ def delete_task(task_id):
         db.session.delete(task)
         db.session.commit()
         
+        publish_event(current_user_id, 'task.deleted', {'id': task_id})
+        
         return jsonify({'message': 'タスクを削除しました'})
         
     except Exception as e:
@@ -198,33 +352,242 @@ def delete_task(task_id):
         return jsonify({'error': f'タスク削除でエラーが発生しました: {str(e)}'}), 500
 
 
+@tasks_bp.route('/batch', methods=['POST'])
+@jwt_required()
+@combined_decorator
+def batch_tasks():
+    """
+    タスクの一括作成・更新・削除
+
+    検証・所有確認をまとめて行い、1トランザクションで反映する。
+    atomic=true（既定）の場合は1件でも不正な操作があれば何も反映しない。
+    """
+    current_user_id = int(get_jwt_identity())
+    data = request.get_json()
+    
+    operations = data.get('operations') if isinstance(data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        raise ValidationError('operations は1件以上の配列で指定してください')
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise ValidationError(f'operations は{MAX_BATCH_OPERATIONS}件以内で指定してください')
+    atomic = data.get('atomic', True) is not False
+    
+    results = [None] * len(operations)
+    
+    # 各操作の形式・内容をまとめて検証
+    for index, operation in enumerate(operations):
+        try:
+            validate_batch_operation(operation)
+        except ValidationError as e:
+            results[index] = batch_error(index, operation, 400, e.message)
+    
+    valid = [(index, operation) for index, operation in enumerate(operations) if results[index] is None]
+    
+    # カテゴリの所有確認は参照キャッシュ、タスクの所有確認は IN クエリ1回で実施
+    category_ids = {
+        operation['data']['category_id'] for _, operation in valid
+        if operation['op'] != 'delete' and operation['data'].get('category_id')
+    }
+    owned_category_ids = set()
+    if category_ids:
+        owned_category_ids = category_ids & get_owned_category_ids(current_user_id, category_ids)
+    
+    task_ids = {operation['id'] for _, operation in valid if operation['op'] != 'create'}
+    tasks_by_id = {}
+    if task_ids:
+        tasks_by_id = {
+            task.id: task for task in Task.query.filter(
+                Task.user_id == current_user_id, Task.id.in_(task_ids)
+            )
+        }
+    
+    # 操作を順に反映（作成は最後に一括INSERT、コミットは1回）
+    now = datetime.utcnow()
+    created = {}
+    created_ids = []
+    deleted_ids = set()
+    for index, operation in valid:
+        op = operation['op']
+        payload = operation.get('data') or {}
+        
+        if payload.get('category_id') and payload['category_id'] not in owned_category_ids:
+            results[index] = batch_error(index, operation, 404, '指定されたカテゴリが見つかりません')
+            continue
+        
+        if op == 'create':
+            created[index] = task_row(payload, current_user_id, now)
+            continue
+        
+        task = tasks_by_id.get(operation['id'])
+        if task is None or task.id in deleted_ids:
+            results[index] = batch_error(index, operation, 404, 'タスクが見つかりません')
+            continue
+        
+        if op == 'update':
+            apply_task_update(task, payload)
+            results[index] = {'index': index, 'op': op, 'status': 200, 'id': task.id}
+        else:
+            db.session.delete(task)
+            deleted_ids.add(task.id)
+            results[index] = {'index': index, 'op': op, 'status': 200, 'id': task.id}
+    
+    failed = [result for result in results if result is not None and result['status'] >= 400]
+    if failed and atomic:
+        db.session.rollback()
+        for index, operation in enumerate(operations):
+            if results[index] is None or results[index]['status'] < 400:
+                results[index] = batch_error(index, operation, 424, 'バッチ内の他の操作が失敗したため反映されませんでした')
+        return jsonify({
+            'error': 'バッチ内に不正な操作があるため反映しませんでした',
+            'results': results
+        }), 400
+    
+    # 他のプロセスで削除されたカテゴリを参照していれば何も反映しない
+    if not commit_task_changes(current_user_id, owned_category_ids,
+                               lambda: created_ids.extend(insert_tasks(list(created.values())))):
+        return jsonify({'error': '指定されたカテゴリが見つかりません'}), 404
+    for index, task_id in zip(created, created_ids):
+        results[index] = {'index': index, 'op': 'create', 'status': 201, 'id': task_id}
+    
+    # 作成・更新したタスクをカテゴリ込みで1クエリで再取得
+    changed_ids = [result['id'] for result in results if result['status'] in (200, 201) and result['op'] != 'delete']
+    if changed_ids:
+        tasks = {task.id: task for task in Task.query_with_category().filter(Task.id.in_(changed_ids))}
+        for result in results:
+            if result['status'] in (200, 201) and result['op'] != 'delete':
+                result['task'] = tasks[result['id']].to_dict()
+    
+    for result in results:
+        if result['status'] < 400:
+            event = {'id': result['id']}
+            if 'task' in result:
+                event['task'] = result['task']
+            publish_event(current_user_id, f"task.{BATCH_EVENTS[result['op']]}", event)
+    
+    return jsonify({
+        'message': f'{len(operations) - len(failed)} 件の操作を反映しました',
+        'results': results
+    }), 207 if failed else 200
+
+
 @tasks_bp.route('/stats', methods=['GET'])
 @jwt_required()
+@read_only
+@conditional_get
 def get_task_stats():
     """タスク統計情報"""
     try:
         current_user_id = int(get_jwt_identity())
         
-        total_tasks = Task.query.filter_by(user_id=current_user_id).count()
-        pending_tasks = Task.query.filter_by(user_id=current_user_id, status='pending').count()
-        in_progress_tasks = Task.query.filter_by(user_id=current_user_id, status='in_progress').count()
-        completed_tasks = Task.query.filter_by(user_id=current_user_id, status='completed').count()
-        
-        # 優先度別統計
-        high_priority = Task.query.filter_by(user_id=current_user_id, priority='high').count()
-        urgent_priority = Task.query.filter_by(user_id=current_user_id, priority='urgent').count()
-        
+        # カウンタテーブルから取得（タスク件数に比例しない）
         return jsonify({
-            'stats': {
-                'total_tasks': total_tasks,
-                'pending_tasks': pending_tasks,
-                'in_progress_tasks': in_progress_tasks,
-                'completed_tasks': completed_tasks,
-                'completion_rate': round((completed_tasks / total_tasks * 100), 2) if total_tasks > 0 else 0,
-                'high_priority_tasks': high_priority,
-                'urgent_priority_tasks': urgent_priority
-            }
+            'stats': read_task_stats(current_user_id)
         })
         
     except Exception as e:
-        return jsonify({'error': f'統計情報取得でエラーが発生しました: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'error': f'統計情報取得でエラーが発生しました: {str(e)}'}), 500
+
+
+def build_task(data, user_id):
+    """検証済みデータから新規タスクを生成"""
+    return Task(
+        title=data['title'],
+        description=data.get('description', ''),
+        priority=data.get('priority', 'medium'),
+        status=data.get('status', 'pending'),
+        user_id=user_id,
+        category_id=data.get('category_id'),
+        # 期限日（YYYY-MM-DD 形式を優先、なければISO8601を許可）
+        due_date=TaskValidator.parse_due_date(data.get('due_date'))
+    )
+
+
+def commit_task_changes(current_user_id, category_ids=(), write=None):
+    """
+    タスクの変更（write があれば先に実行）をコミットし、所有していないカテゴリを参照していれば取り消して False
+
+    カテゴリの所有確認は参照キャッシュで行うため、書き込んだ後に同じトランザクション内で category_ids が
+    (id, user_id) の組で存在することを確認する（書き込み中はデータベースのロックを保持しているため、確認からコミットまでに他のプロセスは変更できない）。
+    他のプロセスで削除された・別のユーザーのものになったカテゴリを検出した場合はキャッシュを破棄する。
+    """
+    category_ids = set(category_ids)
+    try:
+        db.session.flush()
+        if write is not None:
+            write()
+        owned = not category_ids or db.session.query(Category.id).filter(
+            Category.id.in_(category_ids), Category.user_id == current_user_id
+        ).count() == len(category_ids)
+        if owned:
+            db.session.commit()
+            return True
+    except IntegrityError:
+        pass
+    db.session.rollback()
+    invalidate_categories(current_user_id)
+    return False
+
+
+def apply_task_update(task, data):
+    """部分更新データをタスクに反映（カテゴリの所有確認は呼び出し側で行う）"""
+    if 'title' in data:
+        task.title = data['title']
+    if 'description' in data:
+        task.description = data['description']
+    if 'status' in data:
+        task.status = data['status']
+        # 完了状態の場合、完了日時を設定
+        if data['status'] == 'completed':
+            task.completed_at = datetime.utcnow()
+    if 'priority' in data:
+        task.priority = data['priority']
+    if 'category_id' in data:
+        task.category_id = data['category_id']
+    if 'due_date' in data:
+        task.due_date = TaskValidator.parse_due_date(data['due_date'])
+    task.updated_at = datetime.utcnow()
+
+
+def validate_batch_operation(operation):
+    """バッチ操作1件の形式と内容を検証"""
+    if not isinstance(operation, dict) or operation.get('op') not in BATCH_OPERATIONS:
+        raise ValidationError(f'op は {", ".join(BATCH_OPERATIONS)} のいずれかである必要があります')
+    
+    op = operation['op']
+    if op != 'create' and not isinstance(operation.get('id'), int):
+        raise ValidationError('id は整数で指定してください')
+    if op == 'delete':
+        return
+    
+    payload = operation.get('data')
+    if not isinstance(payload, dict):
+        raise ValidationError('data はオブジェクトで指定してください')
+    category_id = payload.get('category_id')
+    if category_id is not None and not isinstance(category_id, int):
+        raise ValidationError('category_id は整数で指定してください')
+    if op == 'create':
+        TaskValidator.validate_task_data(payload)
+        TaskValidator.parse_due_date(payload.get('due_date'))
+    else:
+        TaskValidator.validate_task_update(payload)
+
+
+def batch_error(index, operation, status, message):
+    """バッチ操作1件のエラー結果"""
+    op = operation.get('op') if isinstance(operation, dict) else None
+    return {'index': index, 'op': op, 'status': status, 'error': message}
+
+
+def apply_task_filters(query, args):
+    """status / priority / category_id クエリパラメータによる絞り込み"""
+    status = args.get('status')
+    priority = args.get('priority')
+    category_id = args.get('category_id')
+    
+    if status:
+        query = query.filter(Task.status == status)
+    if priority:
+        query = query.filter(Task.priority == priority)
+    if category_id:
+        query = query.filter(Task.category_id == int(category_id))
+    return query
@@ -0,0 +1,433 @@
+"""
+本番用サーバー
+アプリケーションを読み込んだ親プロセスからワーカープロセスを fork し、
+各ワーカーはスレッドプールでリクエストを処理する（SIGHUP で入れ替え、SIGTERM で処理中のリクエストを待って停止）
+
+変更通知（SSE）のイベントは親プロセスが採番して全ワーカーへ中継し、どのワーカーに接続していても届くようにする。
+SSE の接続はリクエストスレッドを占有するため、ワーカーごとの接続数はスレッド数より小さい上限で制限する。
+"""
+import json
+import os
+import selectors
+import signal
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+from app.database import db
+from app.utils.logger import logger
+from app.utils.throttle import init_auth_throttle
+
+
+class RequestHandler(WSGIRequestHandler):
+    """リクエストハンドラ（待機中の keep-alive 接続でスレッドを占有しないよう接続はリクエストごとに閉じる）"""
+    protocol_version = 'HTTP/1.0'
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """
+    固定サイズのスレッドプールでリクエストを処理する WSGI サーバー
+
+    処理中・待機中の接続が threads + queue_size に達したら空きができるまで受付を止める
+    （新しい接続はカーネルの待ち行列に残り、プリフォークサーバーでは空いている他のワーカーが受け付ける）。
+    接続の送受信は timeout 秒で打ち切り、応答しないクライアントがスレッドを占有し続けないようにする。
+    """
+
+    multithread = True
+
+    def __init__(self, host, port, app, threads, queue_size=0, timeout=None, fd=None):
+        super().__init__(host, port, app, handler=RequestHandler, fd=fd)
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='request')
+        self.request_timeout = timeout
+        self._slots = threading.BoundedSemaphore(threads + queue_size)
+        self._stopping = threading.Event()
+
+    def process_request(self, request, client_address):
+        # 空きを待つ間は accept しない（停止時は待たずに閉じる）
+        while not self._slots.acquire(timeout=0.5):
+            if self._stopping.is_set():
+                self.shutdown_request(request)
+                return
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            request.settimeout(self.request_timeout)
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def shutdown(self):
+        self._stopping.set()
+        super().shutdown()
+
+
+# 中継するイベントのフレーム（4バイトの長さ + JSON）
+FRAME_HEADER = struct.Struct('!I')
+
+
+def send_frame(sock, message):
+    """イベントを1フレームとして送信"""
+    body = json.dumps(message, ensure_ascii=False).encode('utf-8')
+    sock.sendall(FRAME_HEADER.pack(len(body)) + body)
+
+
+class FrameReader:
+    """受信したバイト列をフレームごとのメッセージに分割"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        self.buffer += data
+        messages = []
+        while len(self.buffer) >= FRAME_HEADER.size:
+            (length,) = FRAME_HEADER.unpack_from(self.buffer)
+            end = FRAME_HEADER.size + length
+            if len(self.buffer) < end:
+                break
+            messages.append(json.loads(self.buffer[FRAME_HEADER.size:end]))
+            del self.buffer[:end]
+        return messages
+
+
+class EventRelay:
+    """
+    ワーカー間のイベント中継（親プロセス側）
+
+    ワーカーが発行したイベントを親プロセスのイベントハブで採番して履歴に残し、発行元を含む全ワーカーへ送る。
+    どのワーカーでもイベント ID と履歴が同じになるため、別のワーカーへ再接続しても Last-Event-ID で再開できる
+    （fork したワーカーは親の履歴と連番を引き継ぐ）。
+    send_timeout 秒以内に送れないワーカーは中継の対象から外す。
+    """
+
+    def __init__(self, hub, send_timeout=5.0):
+        self.hub = hub
+        self.send_timeout = send_timeout
+        self.selector = selectors.DefaultSelector()
+        self.channels = {}  # pid → 親プロセス側のソケット
+
+    def add_worker(self, pid, sock):
+        sock.settimeout(self.send_timeout)
+        self.channels[pid] = sock
+        self.selector.register(sock, selectors.EVENT_READ, (pid, FrameReader()))
+
+    def remove_worker(self, pid):
+        sock = self.channels.pop(pid, None)
+        if sock is not None:
+            self.selector.unregister(sock)
+            sock.close()
+
+    def poll(self, timeout):
+        """ワーカーからのイベントを最大 timeout 秒待って中継"""
+        for key, _ in self.selector.select(timeout):
+            pid, reader = key.data
+            try:
+                data = key.fileobj.recv(65536)
+            except OSError:
+                data = b''
+            if not data:
+                self.remove_worker(pid)
+                continue
+            for message in reader.feed(data):
+                self.relay(message)
+
+    def relay(self, message):
+        event = self.hub.deliver(message['user_id'], message['name'], message['payload'])
+        frame = {**message, 'seq': event.seq}
+        for pid, sock in list(self.channels.items()):
+            try:
+                send_frame(sock, frame)
+            except OSError:
+                logger.warning(f'ワーカー {pid} へイベントを中継できないため中継の対象から外します')
+                self.remove_worker(pid)
+
+    def detach(self):
+        """fork 後のワーカーで親プロセス側のソケットを閉じる"""
+        for sock in self.channels.values():
+            sock.close()
+        self.channels = {}
+        self.selector.close()
+
+    def close(self):
+        for pid in list(self.channels):
+            self.remove_worker(pid)
+        self.selector.close()
+
+
+class EventRelayClient:
+    """
+    ワーカー側のイベント中継
+
+    発行したイベントは親プロセスへ送り、親プロセスで採番されて戻ってきたイベントを受信スレッドで配信する。
+    親プロセスとの接続が切れた場合は、このプロセス内だけで配信する。
+    """
+
+    def __init__(self, hub, sock):
+        self.hub = hub
+        self.sock = sock
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.hub.forward = self.send
+        threading.Thread(target=self.receive, name='event-relay', daemon=True).start()
+
+    def send(self, user_id, name, payload):
+        try:
+            with self._lock:
+                send_frame(self.sock, {'user_id': user_id, 'name': name, 'payload': payload})
+        except OSError:
+            self.hub.forward = None
+            self.hub.deliver(user_id, name, payload)
+
+    def receive(self):
+        reader = FrameReader()
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except OSError:
+                data = b''
+            if not data:
+                break
+            for message in reader.feed(data):
+                self.hub.deliver(message['user_id'], message['name'], message['payload'], seq=message['seq'])
+        self.hub.forward = None
+
+
+def dispose_engines(app, close=True):
+    """データベースの接続プールを破棄（fork 後は close=False で親プロセスの接続に触れずに作り直す）"""
+    with app.app_context():
+        engines = list(db.engines.values())
+        read_engine = app.extensions.get('read_engine')
+        if read_engine is not None:
+            engines.append(read_engine)
+        for engine in engines:
+            engine.dispose(close=close)
+
+
+def reinit_after_fork(app, relay_socket, max_streams):
+    """fork 後のワーカーで親プロセスから引き継いだ状態を作り直す"""
+    dispose_engines(app, close=False)
+    # ログの書き込みスレッドは fork で引き継がれないため起動し直す
+    logger.reinit_after_fork()
+    # イベントは親プロセス経由で全ワーカーへ配信し、SSE の接続数はスレッド数より小さく抑える
+    hub = app.extensions['event_hub']
+    hub.max_subscribers = max_streams
+    EventRelayClient(hub, relay_socket).start()
+
+
+def run_worker(app, listener, relay_socket, host, port, threads, max_streams, queue_size, timeout):
+    """ワーカープロセスの処理（SIGTERM / SIGINT で受付を止め、処理中のリクエストを完了して終了）"""
+    reinit_after_fork(app, relay_socket, max_streams)
+    server = PooledWSGIServer(host, port, app, threads, queue_size, timeout, fd=listener.fileno())
+    listener.close()
+
+    def shutdown():
+        server.shutdown()
+        # 終わりのない SSE の接続を閉じ、処理中のリクエストだけを待つ
+        app.extensions['event_hub'].close()
+
+    def stop(signum, frame):
+        # serve_forever と同じスレッドからは shutdown できないため別スレッドで停止
+        threading.Thread(target=shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    server.serve_forever()
+    server.pool.shutdown(wait=True)
+    app.extensions['password_hasher'].shutdown(wait=True)
+
+
+class PreforkServer:
+    """
+    ワーカープロセスを管理する親プロセス
+
+    - 異常終了したワーカーは起動し直す
+    - SIGHUP: 新しいワーカーを起動してから古いワーカーを停止（graceful_timeout 秒を過ぎたら強制終了）
+    - SIGTERM / SIGINT: すべてのワーカーを停止して終了
+    """
+
+    def __init__(self, app, host, port, workers, threads, graceful_timeout, max_streams, queue_size, timeout):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.worker_count = workers
+        self.threads = threads
+        self.graceful_timeout = graceful_timeout
+        self.max_streams = max_streams
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.workers = set()
+        self.draining = {}  # pid → 強制終了する時刻
+        self.listener = None
+        self.relay = EventRelay(app.extensions['event_hub'])
+        self._signals = []
+
+    def spawn_worker(self):
+        master_socket, worker_socket = socket.socketpair()
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                master_socket.close()
+                self.relay.detach()
+                run_worker(
+                    self.app, self.listener, worker_socket, self.host, self.port,
+                    self.threads, self.max_streams, self.queue_size, self.timeout
+                )
+            except BaseException:
+                logger.error(f'ワーカー {os.getpid()} が異常終了しました')
+                exit_code = 1
+            finally:
+                # os._exit は atexit を呼ばないため、キューに残ったログをここで書き出す
+                logger.stop()
+                os._exit(exit_code)
+        worker_socket.close()
+        self.relay.add_worker(pid, master_socket)
+        self.workers.add(pid)
+
+    def spawn_workers(self):
+        while len(self.workers) < self.worker_count:
+            self.spawn_worker()
+
+    def stop_workers(self, pids):
+        """ワーカーに停止を指示し、強制終了までの期限を記録"""
+        deadline = time.monotonic() + self.graceful_timeout
+        for pid in pids:
+            self.workers.discard(pid)
+            self.draining[pid] = deadline
+            self._kill(pid, signal.SIGTERM)
+
+    def reap_workers(self):
+        """終了したワーカーを回収（稼働中のワーカーが終了した場合は異常終了として扱う）"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid in self.workers:
+                logger.warning(f'ワーカー {pid} が終了しました（status={status}）。起動し直します')
+                self.workers.discard(pid)
+            self.draining.pop(pid, None)
+            self.relay.remove_worker(pid)
+
+    def kill_expired(self):
+        """停止期限を過ぎたワーカーを強制終了"""
+        now = time.monotonic()
+        for pid, deadline in list(self.draining.items()):
+            if now >= deadline:
+                logger.warning(f'ワーカー {pid} が {self.graceful_timeout} 秒以内に停止しないため強制終了します')
+                self._kill(pid, signal.SIGKILL)
+                self.draining[pid] = float('inf')
+
+    @staticmethod
+    def _kill(pid, signum):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def run(self):
+        self.listener = socket.create_server((self.host, self.port), backlog=2048)
+        self.listener.set_inheritable(True)
+
+        # 読み込み時に開いた接続・ハッシュ計算用のプロセスをワーカーへ引き継がない
+        dispose_engines(self.app)
+        self.app.extensions['password_hasher'].shutdown()
+
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda signum, frame: self._signals.append(signum))
+
+        logger.info(
+            f'本番サーバーを起動しました: http://{self.host}:{self.port} '
+            f'(ワーカー {self.worker_count} プロセス × {self.threads} スレッド、SSE はワーカーあたり {self.max_streams} 接続まで)'
+        )
+        self.spawn_workers()
+        try:
+            while True:
+                while self._signals:
+                    signum = self._signals.pop(0)
+                    if signum == signal.SIGHUP:
+                        logger.info('SIGHUP を受信しました。ワーカーを入れ替えます')
+                        old_workers = list(self.workers)
+                        self.workers.clear()
+                        self.spawn_workers()
+                        self.stop_workers(old_workers)
+                    else:
+                        logger.info('停止シグナルを受信しました。処理中のリクエストの完了を待って停止します')
+                        return
+                self.reap_workers()
+                self.spawn_workers()
+                self.kill_expired()
+                # 待つ間にワーカーから届いたイベントを中継
+                self.relay.poll(0.2)
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """すべてのワーカーを停止して待つ"""
+        self.stop_workers(list(self.workers))
+        while self.draining:
+            self.reap_workers()
+            self.kill_expired()
+            self.relay.poll(0.1)
+        self.relay.close()
+        self.listener.close()
+
+
+def max_streams_per_worker(config):
+    """
+    ワーカーごとの SSE の接続数の上限（未指定ならスレッド数の半分）
+
+    SSE の接続は終わるまでリクエストスレッドを占有するため、スレッド数以上の指定は起動時にエラーにする。
+    """
+    threads = config['SERVER_THREADS']
+    max_streams = config['SERVER_MAX_STREAMS']
+    if max_streams is None:
+        return threads // 2
+    if max_streams >= threads:
+        raise ValueError(f'SERVER_MAX_STREAMS（{max_streams}）は SERVER_THREADS（{threads}）より小さくしてください')
+    return max_streams
+
+
+def check_log_rotation(config):
+    """
+    ログのローテーション方式が複数プロセスでの書き込みに対応しているかを確認
+
+    size / time は各プロセスが別々にファイルを切り替え、他のプロセスが書き込み中のファイルを移動してしまうため起動時にエラーにする。
+    """
+    rotation = config['LOG_ROTATION']
+    if rotation in ('size', 'time'):
+        raise ValueError(
+            f'LOG_ROTATION={rotation} は複数プロセスで使えません。watch（logrotate などでローテーション）または none を指定してください'
+        )
+
+
+def serve(app):
+    """設定に従って本番用サーバーを起動"""
+    config = app.config
+    check_log_rotation(config)
+    # ログイン・登録の試行回数の制限は各ワーカーで分け合う
+    init_auth_throttle(app, config['SERVER_WORKERS'])
+    PreforkServer(
+        app,
+        host=config['SERVER_HOST'],
+        port=config['SERVER_PORT'],
+        workers=config['SERVER_WORKERS'],
+        threads=config['SERVER_THREADS'],
+        graceful_timeout=config['SERVER_GRACEFUL_TIMEOUT'],
+        max_streams=max_streams_per_worker(config),
+        queue_size=config['SERVER_QUEUE_SIZE'],
+        timeout=config['SERVER_TIMEOUT']
+    ).run()
@@ -0,0 +1,64 @@
+"""
+一括書き込み機能
+タスクの一括INSERT（統計カウンタの更新を含む）
+"""
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import insert
+
+from app.database import db
+from app.models import Task
+from app.utils.task_stats import apply_due_deltas, apply_stats_deltas, due_key, stats_key
+from app.utils.validators import TaskValidator
+from app.utils.versioning import bump_data_versions
+
+# 1文あたりの行数（SQLite のバインド変数上限に収まる件数）
+INSERT_CHUNK_SIZE = 500
+
+
+def task_row(data: Dict[str, Any], user_id: int, now: datetime) -> Dict[str, Any]:
+    """検証済みデータから tasks テーブルの1行分の値を作成（Task 作成時と同じ既定値）"""
+    return {
+        'title': data['title'],
+        'description': data.get('description', ''),
+        'status': data.get('status') or 'pending',
+        'priority': data.get('priority') or 'medium',
+        'due_date': TaskValidator.parse_due_date(data.get('due_date')),
+        'completed_at': None,
+        'created_at': now,
+        'updated_at': now,
+        'user_id': user_id,
+        'category_id': data.get('category_id'),
+    }
+
+
+def insert_tasks(rows: List[Dict[str, Any]], return_ids: bool = True) -> List[int]:
+    """
+    タスクを一括INSERTし、同一トランザクションで統計カウンタ・データバージョンを更新
+
+    ORM の flush を経由しないため、カウンタとバージョンはここで反映する。
+    return_ids=True の場合は複数行 VALUES + RETURNING で発行し、rows と同じ順の ID を返す
+    （1文の中では rowid が VALUES の順に増加するため、昇順に並べて対応付ける）。
+    return_ids=False の場合は executemany で発行する。
+    """
+    if not rows:
+        return []
+
+    ids = []
+    table = Task.__table__
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        chunk = rows[start:start + INSERT_CHUNK_SIZE]
+        if return_ids:
+            result = db.session.execute(insert(table).values(chunk).returning(table.c.id))
+            ids.extend(sorted(row_id for (row_id,) in result))
+        else:
+            db.session.execute(insert(table), chunk)
+
+    deltas = Counter(stats_key(row['user_id'], row['status'], row['priority']) for row in rows)
+    apply_stats_deltas(db.session.connection(), deltas)
+    due_keys = (due_key(row['user_id'], row['status'], row['priority'], row['due_date']) for row in rows)
+    apply_due_deltas(db.session.connection(), Counter(key for key in due_keys if key is not None))
+    bump_data_versions(db.session.connection(), {row['user_id'] for row in rows})
+    return ids
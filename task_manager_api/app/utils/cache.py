@@ -0,0 +1,163 @@
+"""
+参照キャッシュ機能
+認証ユーザー・カテゴリ所有確認のためのプロセス内 LRU + TTL キャッシュ
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, Optional
+
+from flask import current_app
+
+from app.database import db
+from app.models import Category, User
+
+# キャッシュにない場合の番兵
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    件数上限付きの LRU + TTL キャッシュ（スレッドセーフ）
+
+    上限を超えると最も長く参照されていないエントリから破棄する。
+    ヒット・ミス・破棄の件数を監視用に数える。
+    """
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """値を取得（期限切れ・未登録は default）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """値を登録（上限を超えたら最も古いエントリを破棄）"""
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """値を取得し、なければ loader の結果を登録して返す（None は登録しない）"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        """エントリを削除"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """全エントリを削除"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """監視用の統計（件数・ヒット率）"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+class LookupCache:
+    """ユーザー情報（id → プロフィール・有効フラグ）とユーザー別カテゴリID集合のキャッシュ"""
+
+    def __init__(self, maxsize: int, user_ttl: float, category_ttl: float):
+        self.users = TTLCache(maxsize, user_ttl)
+        self.category_ids = TTLCache(maxsize, category_ttl)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {'users': self.users.stats(), 'category_ids': self.category_ids.stats()}
+
+
+def init_lookup_cache(app) -> None:
+    """アプリケーションに参照キャッシュを登録"""
+    app.extensions['lookup_cache'] = LookupCache(
+        maxsize=app.config['LOOKUP_CACHE_SIZE'],
+        user_ttl=app.config['USER_CACHE_TTL'],
+        category_ttl=app.config['CATEGORY_CACHE_TTL']
+    )
+
+
+def get_lookup_cache() -> LookupCache:
+    """アプリケーションの参照キャッシュ"""
+    return current_app.extensions['lookup_cache']
+
+
+def get_user_record(user_id: int) -> Optional[Dict[str, Any]]:
+    """ユーザー情報（User.to_dict の内容）を取得（存在しない場合は None）"""
+    def load():
+        user = db.session.get(User, user_id)
+        return user.to_dict() if user else None
+
+    record = get_lookup_cache().users.get_or_load(user_id, load)
+    return dict(record) if record is not None else None
+
+
+def invalidate_user(user_id: int) -> None:
+    """ユーザー情報のキャッシュを破棄（ユーザーの書き込み後に呼ぶ）"""
+    get_lookup_cache().users.invalidate(user_id)
+
+
+def get_owned_category_ids(user_id: int, required: Iterable[int] = ()) -> FrozenSet[int]:
+    """
+    ユーザーが所有するカテゴリIDの集合
+
+    キャッシュの破棄はこのプロセス内でしか行われないため、required のIDが集合にない場合は
+    他のプロセスで作成された可能性があるものとしてデータベースから読み直す。
+    逆に他のプロセスで削除されたカテゴリは有効期間まで集合に残るため、書き込みは外部キー制約で検出する。
+    """
+    def load():
+        return frozenset(category_id for (category_id,) in db.session.query(Category.id).filter(Category.user_id == user_id))
+
+    cache = get_lookup_cache().category_ids
+    owned = cache.get(user_id)
+    if owned is None or not owned.issuperset(required):
+        owned = load()
+        cache.set(user_id, owned)
+    return owned
+
+
+def owns_category(user_id: int, category_id: Any) -> bool:
+    """カテゴリがユーザーの所有かどうか（ID は整数に変換して判定）"""
+    try:
+        category_id = int(category_id)
+    except (TypeError, ValueError):
+        return False
+    return category_id in get_owned_category_ids(user_id, (category_id,))
+
+
+def invalidate_categories(user_id: int) -> None:
+    """カテゴリID集合のキャッシュを破棄（カテゴリの作成・削除後に呼ぶ）"""
+    get_lookup_cache().category_ids.invalidate(user_id)
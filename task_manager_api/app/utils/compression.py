@@ -0,0 +1,122 @@
+"""
+レスポンス圧縮機能
+Accept-Encoding に応じた gzip / deflate（brotli がインストールされていれば br）圧縮
+"""
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # 未インストールの場合は br を提供しない
+    brotli = None
+
+# 圧縮対象の Content-Type（text/event-stream は逐次送信を妨げるため対象外）
+COMPRESSIBLE_MIMETYPES = frozenset([
+    'application/json',
+    'application/cbor',
+    'application/msgpack',
+    'application/x-ndjson',
+    'text/csv',
+    'text/html',
+    'text/plain',
+])
+
+# 提供するエンコーディング（サーバーの優先順）
+ENCODINGS = ('br', 'gzip', 'deflate') if brotli is not None else ('gzip', 'deflate')
+
+
+class StreamCompressor:
+    """チャンク単位で圧縮するエンコーダ（chunk ごとに flush して逐次送信を維持）"""
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=min(level, 11))
+        else:
+            # gzip は gzip ヘッダー、deflate は HTTP の定義どおり zlib 形式
+            wbits = 16 + zlib.MAX_WBITS if encoding == 'gzip' else zlib.MAX_WBITS
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        """データを圧縮（flush=True の場合はそこまでの出力を確定させる）"""
+        if self.encoding == 'br':
+            return self._compressor.process(data) + (self._compressor.flush() if flush else b'')
+        return self._compressor.compress(data) + (self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else b'')
+
+    def finish(self) -> bytes:
+        """ストリームの終端を出力"""
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+def choose_encoding(accept_encodings) -> Optional[str]:
+    """Accept-Encoding の品質値とサーバーの優先順から圧縮方式を選ぶ（圧縮しない場合は None）"""
+    return accept_encodings.best_match(ENCODINGS)
+
+
+def compress_body(data: bytes, encoding: str, level: int) -> bytes:
+    """本文全体を圧縮"""
+    compressor = StreamCompressor(encoding, level)
+    return compressor.compress(data) + compressor.finish()
+
+
+def iter_compressed(chunks: Iterable, encoding: str, level: int) -> Iterator[bytes]:
+    """ストリーミングレスポンスをチャンクごとに圧縮して出力（元のイテラブルは終了時に閉じる）"""
+    compressor = StreamCompressor(encoding, level)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                yield compressor.compress(chunk, flush=True)
+        yield compressor.finish()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def is_compressible(response) -> bool:
+    """圧縮対象のレスポンスかどうか"""
+    if response.status_code < 200 or response.status_code in (204, 304):
+        return False
+    if response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return False
+    return response.mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def init_compression(app) -> None:
+    """
+    レスポンス圧縮を登録
+
+    通常のレスポンスは COMPRESSION_MIN_SIZE バイト以上の場合のみ圧縮する。
+    ストリーミングレスポンス（エクスポート）はサイズが事前に分からないため、チャンクごとに圧縮する。
+    圧縮した表現の ETag は弱い ETag にする（条件付き GET は弱い比較で判定）。
+    """
+    @app.after_request
+    def compress_response(response):
+        if not app.config['COMPRESSION_ENABLED'] or not is_compressible(response):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        level = app.config['COMPRESSION_LEVEL']
+        if response.is_streamed:
+            response.response = iter_compressed(response.response, encoding, level)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < app.config['COMPRESSION_MIN_SIZE']:
+                return response
+            response.set_data(compress_body(data, encoding, level))
+
+        response.headers['Content-Encoding'] = encoding
+        etag, is_weak = response.get_etag()
+        if etag and not is_weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -2,11 +2,16 @@
 デコレータ関数
 エラーハンドリング、ログ機能など
 """
+import time
 from functools import wraps
-from flask import request, jsonify
+from flask import current_app, request, jsonify, make_response
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from app.database import read_only_session
 from app.utils.logger import logger
+from app.utils.passwords import PasswordHasherBusy
+from app.utils.throttle import TooManyAttempts
 from app.utils.validators import ValidationError
+from app.utils.versioning import compute_etag, get_data_version
 
 
 def handle_errors(f):
@@ -18,6 +23,12 @@ def handle_errors(f):
         except ValidationError as e:
             logger.log_api_error(request.endpoint, f"Validation error: {e.message}")
             return jsonify({'error': e.message}), 400
+        except TooManyAttempts as e:
+            logger.log_api_error(request.endpoint, f"Too many attempts from {request.remote_addr}")
+            return jsonify({'error': e.message}), 429, {'Retry-After': str(e.retry_after)}
+        except PasswordHasherBusy as e:
+            logger.log_api_error(request.endpoint, f"Password hasher busy: {e.message}")
+            return jsonify({'error': e.message}), 503, {'Retry-After': '1'}
         except Exception as e:
             logger.log_api_error(request.endpoint, f"Unexpected error: {str(e)}")
             return jsonify({'error': 'サーバー内部エラーが発生しました'}), 500
@@ -25,9 +36,10 @@ def handle_errors(f):
 
 
 def log_request(f):
-    """リクエストログデコレータ"""
+    """リクエストログデコレータ（処理後にステータス・処理時間を記録）"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
+        started = time.perf_counter()
         user_id = None
         try:
             verify_jwt_in_request()
@@ -35,8 +47,10 @@ def log_request(f):
         except:
             pass  # トークンがない場合は無視
         
-        logger.log_api_request(request.endpoint, request.method, user_id)
-        return f(*args, **kwargs)
+        response = make_response(f(*args, **kwargs))
+        latency_ms = (time.perf_counter() - started) * 1000
+        logger.log_api_request(request.endpoint, request.method, user_id, response.status_code, latency_ms)
+        return response
     return decorated_function
 
 
@@ -44,12 +58,52 @@ def validate_json(f):
     """JSON形式チェックデコレータ"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if request.method in ['POST', 'PUT'] and not request.is_json:
-            return jsonify({'error': 'Content-Type: application/json が必要です'}), 400
+        if request.method in ['POST', 'PUT'] and not request.has_structured_body:
+            return jsonify({'error': 'Content-Type: application/json（または application/cbor）が必要です'}), 400
         return f(*args, **kwargs)
     return decorated_function
 
 
 def combined_decorator(f):
     """複合デコレータ（ログ、エラーハンドリング、JSON検証）"""
-    return handle_errors(log_request(validate_json(f)))
\ No newline at end of file
+    return handle_errors(log_request(validate_json(f)))
+
+
+def read_only(f):
+    """参照のみのハンドラでセッションを読み込み用エンジンに振り分けるデコレータ（jwt_required の内側で使用）"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        with read_only_session():
+            return f(*args, **kwargs)
+    return decorated_function
+
+
+def is_not_modified(etag):
+    """If-None-Match が ETag と一致するか（圧縮したレスポンスは弱い ETag になるため弱い比較で判定）"""
+    return request.if_none_match.contains_weak(etag)
+
+
+def set_conditional_headers(response, etag):
+    """条件付き GET 用の ETag・Cache-Control を設定"""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def conditional_get(f):
+    """ETag / If-None-Match による条件付き GET デコレータ（jwt_required の内側で使用）"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        user_id = int(get_jwt_identity())
+        etag = compute_etag(user_id, get_data_version(user_id))
+        
+        # 変更がなければタスク・カテゴリのテーブルに触れずに 304 を返す
+        if is_not_modified(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        
+        return set_conditional_headers(response, etag)
+    return decorated_function
@@ -0,0 +1,316 @@
+"""
+イベント配信機能
+プロセス内のパブリッシュ／サブスクライブハブと Server-Sent Events 形式への変換、ストリーム接続用トークン
+"""
+import asyncio
+import json
+import queue
+import threading
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import NoAuthorizationError
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+# 再接続時に再送できるよう保持する直近イベント数（全ユーザー合計）
+EVENT_HISTORY_SIZE = 1000
+
+# 購読者ごとの未送信イベントの上限（超えた購読者は切断して再接続させる）
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# 再送できないほど取りこぼした購読者へ送る、全件再取得を促すイベント
+RESET_EVENT = 'reset'
+
+# ストリーム接続用トークンのクエリパラメータと署名の用途（アクセストークンとしては使えない）
+STREAM_TOKEN_PARAM = 'token'
+STREAM_TOKEN_SALT = 'task-manager-event-stream'
+
+
+class Event:
+    """配信するイベント（ID はハブ内で単調増加、data は発行時に1回だけ JSON 化）"""
+
+    __slots__ = ('seq', 'user_id', 'name', 'data', 'payload')
+
+    def __init__(self, seq: int, user_id: int, name: str, data: Dict[str, Any], payload: str = '{}'):
+        self.seq = seq
+        self.user_id = user_id
+        self.name = name
+        self.data = data
+        self.payload = payload
+
+
+class Subscription:
+    """1接続分の購読（上限付きキュー）"""
+
+    def __init__(self, user_id: int, queue_size: int):
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.overflowed = False
+        # キューに積まれたときに呼ぶコールバック（非同期の購読者を起こす）
+        self.on_put: Optional[Callable[[], None]] = None
+
+    def put_nowait(self, event: Optional[Event]) -> None:
+        """イベントを積む（満杯なら queue.Full）"""
+        self.queue.put_nowait(event)
+        if self.on_put is not None:
+            self.on_put()
+
+    def get(self, timeout: float) -> Optional[Event]:
+        """次のイベントを待つ（タイムアウト時は None）"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class TooManySubscribers(Exception):
+    """このプロセスで受け付けられる購読者数の上限に達している"""
+
+    def __init__(self, message: str = '変更通知の接続数が上限に達しています。しばらくしてから再度お試しください'):
+        self.message = message
+        super().__init__(self.message)
+
+
+class EventHub:
+    """
+    プロセス内のイベントハブ
+
+    イベント ID は「ハブのインスタンスID-連番」で、再起動後の Last-Event-ID は再送できないものとして扱う。
+    キューがあふれた購読者は登録を解除し、配信済み分を送り切った時点で接続を閉じる
+    （クライアントは Last-Event-ID 付きで再接続し、履歴から続きを受け取る）。
+
+    forward を設定した場合（プリフォークサーバーのワーカー）は発行したイベントを中継先へ送り、
+    中継先で採番されて全ワーカーへ戻ってきたイベントを deliver で配信する。
+    """
+
+    def __init__(self, history_size: int = EVENT_HISTORY_SIZE, queue_size: int = SUBSCRIBER_QUEUE_SIZE,
+                 dumps: Callable[[Any], str] = json.dumps):
+        self.instance_id = uuid.uuid4().hex[:8]
+        self.queue_size = queue_size
+        self.dumps = dumps
+        self.dropped = 0
+        # 購読者数の上限（None は無制限、超えた接続は TooManySubscribers）
+        self.max_subscribers: Optional[int] = None
+        # 発行したイベントの中継先 (user_id, name, payload) を受け取る関数
+        self.forward: Optional[Callable[[int, str, str], None]] = None
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._history = deque(maxlen=history_size)
+        self._subscribers = {}
+
+    def event_id(self, event: Event) -> str:
+        """SSE の id フィールドに使う文字列"""
+        return f'{self.instance_id}-{event.seq}'
+
+    def parse_event_id(self, last_event_id: Optional[str]) -> Optional[int]:
+        """Last-Event-ID を連番に変換（このハブが発行したものでなければ -1）"""
+        if not last_event_id:
+            return None
+        instance_id, _, seq = last_event_id.rpartition('-')
+        if instance_id != self.instance_id or not seq.isdigit():
+            return -1
+        return int(seq)
+
+    def publish(self, user_id: int, name: str, data: Dict[str, Any]) -> Optional[Event]:
+        """ユーザーの購読者全員にイベントを配信（中継先がある場合は送るだけで None）"""
+        payload = self.dumps(data)
+        if self.forward is not None:
+            self.forward(user_id, name, payload)
+            return None
+        return self.deliver(user_id, name, payload, data)
+
+    def deliver(self, user_id: int, name: str, payload: str, data: Optional[Dict[str, Any]] = None,
+                seq: Optional[int] = None) -> Event:
+        """
+        JSON 化済みのイベントを履歴に追加して購読者へ配信
+
+        seq は中継先で採番済みの連番（未指定ならこのハブで採番）。
+        """
+        with self._lock:
+            self._seq = self._seq + 1 if seq is None else seq
+            event = Event(self._seq, user_id, name, data, payload)
+            self._history.append(event)
+            for subscription in list(self._subscribers.get(user_id, ())):
+                try:
+                    subscription.put_nowait(event)
+                except queue.Full:
+                    subscription.overflowed = True
+                    self._discard(subscription)
+                    self.dropped += 1
+        return event
+
+    def close(self) -> None:
+        """全購読者の接続を閉じる（停止時。クライアントは Last-Event-ID なしで再接続する）"""
+        with self._lock:
+            for subscriptions in self._subscribers.values():
+                for subscription in subscriptions:
+                    subscription.overflowed = True
+                    try:
+                        # 待機中の購読者をすぐに起こす
+                        subscription.put_nowait(None)
+                    except queue.Full:
+                        pass
+            self._subscribers = {}
+
+    def subscribe(self, user_id: int, last_event_id: Optional[str] = None) -> Subscription:
+        """
+        購読を開始
+
+        Last-Event-ID が指定された場合は、それ以降のイベントを履歴から先にキューへ積む。
+        履歴から再送できない場合は reset イベントを積む。
+        購読者数が max_subscribers に達している場合は TooManySubscribers。
+        """
+        subscription = Subscription(user_id, self.queue_size)
+        last_seq = self.parse_event_id(last_event_id)
+
+        with self._lock:
+            if self.max_subscribers is not None and self._count() >= self.max_subscribers:
+                raise TooManySubscribers()
+            if last_seq is not None:
+                for event in self._replay(user_id, last_seq):
+                    subscription.queue.put_nowait(event)
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """購読を解除"""
+        with self._lock:
+            self._discard(subscription)
+
+    def subscriber_count(self, user_id: Optional[int] = None) -> int:
+        """購読者数（ユーザー指定時はそのユーザー分）"""
+        with self._lock:
+            if user_id is not None:
+                return len(self._subscribers.get(user_id, ()))
+            return self._count()
+
+    def _count(self) -> int:
+        """全ユーザーの購読者数（ロック取得済みで呼ぶ）"""
+        return sum(len(subscriptions) for subscriptions in self._subscribers.values())
+
+    def _replay(self, user_id: int, last_seq: int) -> List[Event]:
+        """last_seq より後のイベント（ロック取得済みで呼ぶ）"""
+        oldest_seq = self._history[0].seq if self._history else self._seq + 1
+        if last_seq < 0 or last_seq > self._seq or last_seq + 1 < oldest_seq:
+            return [Event(self._seq, user_id, RESET_EVENT, {})]
+
+        events = [event for event in self._history if event.seq > last_seq and event.user_id == user_id]
+        if len(events) > self.queue_size:
+            return [Event(self._seq, user_id, RESET_EVENT, {})]
+        return events
+
+    def _discard(self, subscription: Subscription) -> None:
+        """購読者を登録から外す（ロック取得済みで呼ぶ）"""
+        subscriptions = self._subscribers.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[subscription.user_id]
+
+
+def get_event_hub() -> EventHub:
+    """アプリケーションのイベントハブ"""
+    return current_app.extensions['event_hub']
+
+
+def publish_event(user_id: int, name: str, data: Dict[str, Any]) -> None:
+    """コミット後の変更をイベントとして配信"""
+    get_event_hub().publish(user_id, name, data)
+
+
+def _stream_token_serializer() -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=STREAM_TOKEN_SALT)
+
+
+def create_stream_token(user_id: int) -> str:
+    """
+    変更通知ストリームの接続にだけ使える短時間有効なトークン
+
+    EventSource はヘッダーを付けられずトークンが URL（アクセスログ）に残るため、アクセストークンの代わりに使う。
+    """
+    return _stream_token_serializer().dumps({'user_id': user_id})
+
+
+def stream_user_id() -> int:
+    """
+    ストリームに接続するユーザーID
+
+    ?token= のストリーム用トークン、なければ Authorization ヘッダーのアクセストークンで認証する
+    （アクセストークンはクエリ文字列では受け付けない）。
+    """
+    token = request.args.get(STREAM_TOKEN_PARAM)
+    if token is None:
+        verify_jwt_in_request(locations=['headers'])
+        return int(get_jwt_identity())
+    max_age = current_app.config['EVENTS_TOKEN_EXPIRES'].total_seconds()
+    try:
+        return int(_stream_token_serializer().loads(token, max_age=max_age)['user_id'])
+    except (BadSignature, KeyError, TypeError, ValueError):
+        raise NoAuthorizationError('ストリーム用トークンが無効か期限切れです')
+
+
+def format_sse(hub: EventHub, event: Event) -> str:
+    """イベントを SSE のメッセージ形式に変換"""
+    return f'id: {hub.event_id(event)}\nevent: {event.name}\ndata: {event.payload}\n\n'
+
+
+def iter_sse(hub: EventHub, subscription: Subscription, heartbeat: float, retry_ms: int) -> Iterator[str]:
+    """
+    購読のイベントを SSE として出力
+
+    heartbeat 秒イベントがなければコメント行を送り、切断を検知できるようにする。
+    接続が閉じられたら（GeneratorExit）購読を解除する。
+    """
+    try:
+        yield f'retry: {retry_ms}\n: connected\n\n'
+        while True:
+            if subscription.overflowed and subscription.queue.empty():
+                # 送り切れなかった購読者は切断し、Last-Event-ID で再接続させる
+                return
+            event = subscription.get(timeout=heartbeat)
+            yield format_sse(hub, event) if event is not None else ': keepalive\n\n'
+    finally:
+        hub.unsubscribe(subscription)
+
+
+async def aiter_sse(hub: EventHub, subscription: Subscription, heartbeat: float, retry_ms: int) -> AsyncIterator[str]:
+    """
+    iter_sse のコルーチン版（ASGI 用）
+
+    スレッドを占有せずにイベントを待つ。発行元のスレッドからはイベントループ経由で起こされる。
+    タスクがキャンセルされたら（切断時）購読を解除する。
+    """
+    loop = asyncio.get_running_loop()
+    wakeup = asyncio.Event()
+
+    def on_put():
+        try:
+            loop.call_soon_threadsafe(wakeup.set)
+        except RuntimeError:
+            # イベントループの終了後
+            pass
+
+    subscription.on_put = on_put
+    try:
+        yield f'retry: {retry_ms}\n: connected\n\n'
+        while True:
+            if subscription.overflowed and subscription.queue.empty():
+                return
+            try:
+                event = subscription.queue.get_nowait()
+            except queue.Empty:
+                # clear の後にもう一度確認し、その間に積まれたイベントの通知を取りこぼさない
+                wakeup.clear()
+                if subscription.queue.empty():
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), heartbeat)
+                    except asyncio.TimeoutError:
+                        yield ': keepalive\n\n'
+                continue
+            yield format_sse(hub, event) if event is not None else ': keepalive\n\n'
+    finally:
+        subscription.on_put = None
+        hub.unsubscribe(subscription)
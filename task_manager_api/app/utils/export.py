@@ -0,0 +1,65 @@
+"""
+エクスポート機能
+タスクを NDJSON / CSV としてストリーミング出力
+"""
+import csv
+import io
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, Union
+
+from flask import current_app
+
+from app.models import Task
+
+# 1回の送信にまとめる行数
+EXPORT_BATCH_SIZE = 500
+
+# CSV の列（Task.to_dict と同じ順序、fields 指定時はその列のみ）
+TASK_EXPORT_FIELDS = list(Task.FIELDS)
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def iter_ndjson(rows: Iterable[Dict[str, Any]], batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """辞書の列を NDJSON（1行1オブジェクト）としてまとめて出力（アプリの JSON プロバイダーでエンコード）"""
+    dumps_bytes = current_app.json.dumps_bytes
+    buffer = []
+    for row in rows:
+        buffer.append(dumps_bytes(row))
+        if len(buffer) >= batch_size:
+            yield b'\n'.join(buffer) + b'\n'
+            buffer = []
+    if buffer:
+        yield b'\n'.join(buffer) + b'\n'
+
+
+def csv_value(value: Any) -> Union[str, Any]:
+    """CSV のセル値（日時は JSON と同じ ISO 8601 形式）"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(rows: Iterable[Dict[str, Any]], fields=TASK_EXPORT_FIELDS, batch_size: int = EXPORT_BATCH_SIZE,
+             header: bool = True) -> Iterator[str]:
+    """辞書の列をヘッダー付き CSV としてまとめて出力（header=False の場合はヘッダーなし）"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore', lineterminator='\n')
+    if header:
+        writer.writeheader()
+
+    count = 0
+    for row in rows:
+        writer.writerow({field: csv_value(value) for field, value in row.items()})
+        count += 1
+        if count >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+
+    if buffer.getvalue():
+        yield buffer.getvalue()
@@ -0,0 +1,45 @@
+"""
+フィールド選択機能
+?fields= パラメータ（スパースフィールドセット）の解析
+"""
+from typing import Dict, Optional, Sequence, Tuple
+
+from app.models import Category, Task
+from app.utils.validators import ValidationError
+
+
+def parse_fields(value: Optional[str], allowed: Sequence[str],
+                 presets: Optional[Dict[str, Sequence[str]]] = None) -> Optional[Tuple[str, ...]]:
+    """
+    カンマ区切りのフィールド指定を検証（未指定の場合は None = 全フィールド）
+
+    presets の名前（例: compact）はそのフィールド群に展開する。
+    戻り値は allowed の順序に並べたフィールドのタプル。
+    """
+    if value is None or not value.strip():
+        return None
+
+    presets = presets or {}
+    requested = set()
+    for name in value.split(','):
+        name = name.strip()
+        if not name:
+            continue
+        if name in presets:
+            requested.update(presets[name])
+        elif name in allowed:
+            requested.add(name)
+        else:
+            raise ValidationError(f'fields に指定できないフィールドです: {name}', 'fields')
+
+    return tuple(field for field in allowed if field in requested)
+
+
+def parse_task_fields(args) -> Optional[Tuple[str, ...]]:
+    """タスクの fields パラメータ（compact は一覧表示用の最小セット）"""
+    return parse_fields(args.get('fields'), Task.FIELDS, {'compact': Task.COMPACT_FIELDS})
+
+
+def parse_category_fields(args) -> Optional[Tuple[str, ...]]:
+    """カテゴリの fields パラメータ"""
+    return parse_fields(args.get('fields'), Category.FIELDS)
@@ -0,0 +1,192 @@
+"""
+インポート機能
+NDJSON / CSV ストリームからのタスク一括取り込み
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from app.database import db
+from app.models import Category
+from app.utils.bulk import insert_tasks, task_row
+from app.utils.validators import TaskValidator, ValidationError
+
+IMPORT_FORMATS = ('ndjson', 'csv')
+
+# 1回の INSERT / コミットにまとめる行数
+IMPORT_CHUNK_SIZE = 500
+
+# サマリーに含める却下行の最大数
+MAX_REPORTED_ERRORS = 100
+
+# 取り込み対象のフィールド（それ以外の列は無視）
+IMPORT_FIELDS = ('title', 'description', 'status', 'priority', 'due_date', 'category_id', 'category_name')
+
+
+class ImportAborted(Exception):
+    """取り込みを途中で中止した（summary はそれまでにコミットした件数と却下行）"""
+
+    def __init__(self, message: str, summary: Dict[str, Any]):
+        self.message = message
+        self.summary = summary
+        super().__init__(self.message)
+
+
+def open_text_stream(stream) -> io.TextIOBase:
+    """バイナリストリームを行単位で読めるテキストストリームに変換（BOM付きUTF-8にも対応）"""
+    if isinstance(stream, io.TextIOBase):
+        return stream
+    if not isinstance(stream, io.BufferedIOBase):
+        stream = io.BufferedReader(stream)
+    return io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+
+def iter_records(text_stream, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """(行番号, レコード) を1行ずつ返す（解析できない行は例外オブジェクトを返す、CSV は形式不正の行で終了）"""
+    if fmt == 'csv':
+        reader = csv.DictReader(text_stream)
+        try:
+            for record in reader:
+                yield reader.line_num, record
+        except csv.Error as e:
+            # 解析に失敗した行は line_num に数えられない
+            yield reader.line_num + 1, e
+        return
+
+    for line_number, line in enumerate(text_stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, ValidationError('JSONとして解析できません')
+
+
+def normalize_record(record: Any) -> Dict[str, Any]:
+    """取り込み対象のフィールドだけを取り出し、空値を除去"""
+    if not isinstance(record, dict):
+        raise ValidationError('各行はオブジェクトである必要があります')
+
+    data = {}
+    for field in IMPORT_FIELDS:
+        value = record.get(field)
+        if value is None or value == '':
+            continue
+        if field != 'category_id' and not isinstance(value, str):
+            raise ValidationError(f'{field} は文字列で指定してください')
+        data[field] = value.strip() if field != 'description' and isinstance(value, str) else value
+
+    if 'category_id' in data:
+        try:
+            data['category_id'] = int(data['category_id'])
+        except (TypeError, ValueError):
+            raise ValidationError('category_id は整数で指定してください')
+    return data
+
+
+class TaskImporter:
+    """ストリームを1行ずつ検証し、チャンク単位で一括INSERTする取り込み処理"""
+
+    def __init__(self, user_id: int, create_categories: bool = False, chunk_size: int = IMPORT_CHUNK_SIZE):
+        self.user_id = user_id
+        self.create_categories = create_categories
+        self.chunk_size = chunk_size
+        self.imported = 0
+        self.rejected = 0
+        self.errors = []
+
+        # カテゴリ名 → ID の対応は最初に1回だけ取得
+        categories = db.session.query(Category.id, Category.name).filter(Category.user_id == user_id).all()
+        self.category_ids_by_name = {name: category_id for category_id, name in categories}
+        self.owned_category_ids = set(self.category_ids_by_name.values())
+
+    def resolve_category(self, data: Dict[str, Any]) -> Optional[int]:
+        """カテゴリ名（優先）または ID を所有カテゴリの ID に解決"""
+        name = data.pop('category_name', None)
+        if name is not None:
+            category_id = self.category_ids_by_name.get(name)
+            if category_id is None:
+                if not self.create_categories:
+                    raise ValidationError(f'カテゴリ「{name}」が見つかりません')
+                category = Category(name=name, user_id=self.user_id)
+                db.session.add(category)
+                db.session.flush()
+                category_id = self.category_ids_by_name[name] = category.id
+                self.owned_category_ids.add(category_id)
+            return category_id
+
+        category_id = data.get('category_id')
+        if category_id is not None and category_id not in self.owned_category_ids:
+            raise ValidationError('指定されたカテゴリが見つかりません')
+        return category_id
+
+    def reject(self, line_number: int, message: str) -> None:
+        """却下行の記録（件数は全件、詳細は上限まで）"""
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_number, 'error': message})
+
+    def flush(self, rows) -> None:
+        """チャンクを executemany で INSERT してコミット"""
+        if rows:
+            insert_tasks(rows, return_ids=False)
+            db.session.commit()
+            self.imported += len(rows)
+
+    def run(self, stream, fmt: str) -> Dict[str, Any]:
+        """
+        ストリームを取り込み、件数と却下行のサマリーを返す
+
+        CSV の形式不正（以降の行の区切りが判断できない）や、カテゴリの作成・削除の競合で書き込めない場合は
+        取り込みを中止して ImportAborted（コミット済みのチャンクは取り込み済みとして件数に含める）。
+        """
+        if fmt not in IMPORT_FORMATS:
+            raise ValidationError(f'format は {", ".join(IMPORT_FORMATS)} のいずれかで指定してください')
+
+        now = datetime.utcnow()
+        rows = []
+        error = None
+        try:
+            try:
+                for line_number, record in iter_records(open_text_stream(stream), fmt):
+                    if isinstance(record, csv.Error):
+                        # 形式不正の手前までの行は取り込む
+                        self.reject(line_number, f'CSV として解析できません（{record}）')
+                        error = f'{line_number} 行目を CSV として解析できないため、以降の行は取り込みませんでした'
+                        break
+                    try:
+                        if isinstance(record, ValidationError):
+                            raise record
+                        data = normalize_record(record)
+                        TaskValidator.validate_task_data(data, allow_past_due_date=True)
+                        data['category_id'] = self.resolve_category(data)
+                        rows.append(task_row(data, self.user_id, now))
+                    except ValidationError as e:
+                        self.reject(line_number, e.message)
+                        continue
+
+                    if len(rows) >= self.chunk_size:
+                        self.flush(rows)
+                        rows = []
+            except UnicodeDecodeError:
+                self.reject(0, 'UTF-8 として読み込めません')
+
+            self.flush(rows)
+            db.session.commit()
+        except IntegrityError:
+            # 未コミットのチャンクは取り消す
+            db.session.rollback()
+            error = '他の処理によるカテゴリの作成・削除と競合したため、以降の行は取り込みませんでした'
+
+        summary = {
+            'imported': self.imported,
+            'rejected': self.rejected,
+            'errors': self.errors
+        }
+        if error is not None:
+            raise ImportAborted(error, summary)
+        return summary
@@ -0,0 +1,89 @@
+"""
+JSON エンコード機能
+高速なエンコーダ（orjson）を利用できる Flask の JSON プロバイダー
+"""
+from datetime import date, datetime
+from typing import Any
+
+from flask import has_request_context
+from flask.json.provider import DefaultJSONProvider
+
+from app.utils.wire_formats import JSON_MIMETYPE, WIRE_FORMATS, negotiate_response_mimetype
+
+try:
+    import orjson
+except ImportError:  # 未インストールの場合は標準ライブラリの json を使用
+    orjson = None
+
+JSON_ENCODERS = ('auto', 'orjson', 'stdlib')
+
+
+class APIJSONProvider(DefaultJSONProvider):
+    """
+    API レスポンス用の JSON プロバイダー
+
+    日時は to_dict で文字列化せず、エンコード時に ISO 8601 形式へ変換する
+    （orjson はネイティブに、標準ライブラリは default で変換）。
+    sort_keys / compact は create_app で設定から反映する。
+    """
+
+    ensure_ascii = False
+
+    def __init__(self, app, encoder: str = 'auto'):
+        super().__init__(app)
+        if encoder not in JSON_ENCODERS:
+            raise ValueError(f'JSON_ENCODER は {", ".join(JSON_ENCODERS)} のいずれかで指定してください')
+        if encoder == 'orjson' and orjson is None:
+            raise RuntimeError('JSON_ENCODER=orjson には orjson のインストールが必要です')
+        self.use_orjson = orjson is not None and encoder != 'stdlib'
+
+    @staticmethod
+    def default(o: Any) -> Any:
+        """標準ライブラリでエンコードできない値の変換（日時は ISO 8601）"""
+        if isinstance(o, (datetime, date)):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+    def dumps_bytes(self, obj: Any, pretty: bool = False) -> bytes:
+        """UTF-8 の JSON バイト列にエンコード"""
+        if self.use_orjson:
+            option = orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if pretty:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=self.default, option=option)
+
+        if pretty:
+            return self.dumps(obj, indent=2).encode('utf-8')
+        return self.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if self.use_orjson and not kwargs:
+            return self.dumps_bytes(obj).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        """
+        jsonify の実体（str を経由せずバイト列のままレスポンスにする）
+
+        Accept で CBOR / MessagePack が要求された場合は同じ値をその形式でエンコードする。
+        """
+        obj = self._prepare_response_obj(args, kwargs)
+        mimetype = negotiate_response_mimetype() if has_request_context() else JSON_MIMETYPE
+
+        if mimetype == JSON_MIMETYPE:
+            pretty = self.compact is False or (self.compact is None and self._app.debug)
+            response = self._app.response_class(self.dumps_bytes(obj, pretty) + b'\n', mimetype=self.mimetype)
+        else:
+            dumps = WIRE_FORMATS[mimetype][0]
+            response = self._app.response_class(dumps(obj, self.default), mimetype=mimetype)
+
+        if has_request_context():
+            response.vary.add('Accept')
+        return response
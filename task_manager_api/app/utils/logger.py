@@ -1,75 +1,288 @@
 """
 ロギング設定
 アプリケーション全体のログ管理
+
+リクエスト処理スレッドではレコードをキューに積むだけで、コンソール・ファイルへの書き込みは専用のスレッドで行う
 """
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import queue
+import random
+import re
 import sys
-from datetime import datetime
+import uuid
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from flask import has_request_context, request
+from flask_jwt_extended import get_jwt_identity
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_FORMATS = ('text', 'json')
+LOG_ROTATIONS = ('size', 'time', 'watch', 'none')
+
+# リクエストIDのヘッダー（クライアント・プロキシが付けた値は形式が妥当なら引き継ぐ）
+REQUEST_ID_HEADER = 'X-Request-ID'
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# JSON 形式で出力する追加フィールド
+CONTEXT_FIELDS = ('request_id', 'user_id', 'endpoint', 'method', 'status', 'latency_ms', 'sample_rate')
+
+
+def get_request_id() -> str:
+    """現在のリクエストのID（X-Request-ID を引き継ぐか、なければ発行して environ に保持）"""
+    request_id = request.environ.get('task_manager.request_id')
+    if request_id is None:
+        header = request.headers.get(REQUEST_ID_HEADER, '')
+        request_id = header if REQUEST_ID_PATTERN.match(header) else uuid.uuid4().hex
+        request.environ['task_manager.request_id'] = request_id
+    return request_id
+
+
+def current_user_id() -> Optional[str]:
+    """検証済みのトークンのユーザーID（未検証なら None）"""
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
+
+class RequestContextFilter(logging.Filter):
+    """リクエスト処理中のレコードにリクエストID・ユーザーIDを付ける（キューに積む前に呼び出し元のスレッドで実行）"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if has_request_context():
+            if getattr(record, 'request_id', None) is None:
+                record.request_id = get_request_id()
+            if getattr(record, 'user_id', None) is None:
+                record.user_id = current_user_id()
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """上限付きキューに積むハンドラー（満杯なら待たずに破棄して件数を数える）"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """メッセージと例外だけを文字列化し、追加フィールドはそのまま書き込みスレッドへ渡す"""
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+class JSONFormatter(logging.Formatter):
+    """1行1オブジェクトの JSON 形式（時刻は UTC の ISO 8601）"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class LogSampler:
+    """成功したリクエストのログをエンドポイントごとの割合で間引く（1.0 は全件、0 は出力しない）"""
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None, default: float = 1.0,
+                 rng: Callable[[], float] = random.random):
+        self.rates = dict(rates or {})
+        self.default = default
+        self._rng = rng
+
+    def rate(self, endpoint: Optional[str]) -> float:
+        return self.rates.get(endpoint, self.default)
+
+    def should_log(self, rate: float) -> bool:
+        return rate >= 1 or self._rng() < rate
+
+
+def create_file_handler(path: Path, rotation: str, max_bytes: int, backup_count: int, when: str) -> logging.Handler:
+    """
+    ローテーション方式に応じたファイルハンドラー
+
+    size / time はこのプロセスがファイルを切り替えるため、1プロセスで書き込む場合だけ使える。
+    watch は logrotate などでファイルが移動・削除されたら開き直すため、複数プロセスから同じファイルに追記できる。
+    """
+    if rotation == 'size':
+        return logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+    if rotation == 'time':
+        return logging.handlers.TimedRotatingFileHandler(path, when=when, backupCount=backup_count, encoding='utf-8')
+    if rotation == 'watch':
+        return logging.handlers.WatchedFileHandler(path, encoding='utf-8')
+    return logging.FileHandler(path, encoding='utf-8')
 
 
 class TaskManagerLogger:
     """タスク管理API用のロガー"""
-    
+
     def __init__(self, name='task_manager', log_level=logging.INFO):
         self.logger = logging.getLogger(name)
         self.logger.setLevel(log_level)
-        
+        self.handlers = []
+        self.queue_handler = None
+        self.listener = None
+        self.queue_size = 0
+        self.sampler = LogSampler()
+        self.configure()
+        # 終了時にキューに残ったレコードを書き出す
+        atexit.register(self.stop)
+
+    def configure(self, log_dir='logs', log_format='text', rotation='size', max_bytes=10 * 1024 * 1024,
+                  backup_count=5, when='midnight', queue_size=10000, sample_rates=None, sample_rate=1.0):
+        """出力形式・ローテーション・サンプリングを設定し、キューと書き込みスレッドを作り直す"""
+        if log_format not in LOG_FORMATS:
+            raise ValueError(f'ログ形式は {", ".join(LOG_FORMATS)} のいずれかで指定してください')
+        if rotation not in LOG_ROTATIONS:
+            raise ValueError(f'ローテーションは {", ".join(LOG_ROTATIONS)} のいずれかで指定してください')
+
+        self.stop()
+        for handler in self.handlers:
+            handler.close()
+
         # ログフォーマット
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        
+        formatter = JSONFormatter() if log_format == 'json' else logging.Formatter(TEXT_FORMAT)
+
         # コンソールハンドラー
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(logging.INFO)
         console_handler.setFormatter(formatter)
-        
+
         # ファイルハンドラー（ログディレクトリ作成）
-        log_dir = Path('logs')
-        log_dir.mkdir(exist_ok=True)
-        
-        file_handler = logging.FileHandler(log_dir / 'task_manager.log')
+        log_dir = Path(log_dir)
+        log_dir.mkdir(parents=True, exist_ok=True)
+
+        file_handler = create_file_handler(log_dir / 'task_manager.log', rotation, max_bytes, backup_count, when)
         file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(formatter)
-        
+
         # エラーログ用ハンドラー
-        error_handler = logging.FileHandler(log_dir / 'errors.log')
+        error_handler = create_file_handler(log_dir / 'errors.log', rotation, max_bytes, backup_count, when)
         error_handler.setLevel(logging.ERROR)
         error_handler.setFormatter(formatter)
-        
-        # ハンドラー追加（重複チェック）
-        if not self.logger.handlers:
-            self.logger.addHandler(console_handler)
-            self.logger.addHandler(file_handler)
-            self.logger.addHandler(error_handler)
-    
+
+        self.handlers = [console_handler, file_handler, error_handler]
+        self.queue_size = queue_size
+        self.sampler = LogSampler(sample_rates, sample_rate)
+        self.start()
+
+    def start(self):
+        """新しいキューと書き込みスレッドを開始（fork 後の子プロセスでも呼ぶ）"""
+        queue_handler = NonBlockingQueueHandler(queue.Queue(self.queue_size))
+        queue_handler.addFilter(RequestContextFilter())
+        self.listener = logging.handlers.QueueListener(queue_handler.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+
+        if self.queue_handler is not None:
+            self.logger.removeHandler(self.queue_handler)
+        self.queue_handler = queue_handler
+        self.logger.addHandler(queue_handler)
+
+    def stop(self):
+        """キューに残ったレコードを書き出して書き込みスレッドを止める"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def reinit_after_fork(self):
+        """fork 後の子プロセスで書き込みスレッドを作り直す（親のキューには触れない）"""
+        self.listener = None
+        self.start()
+
+    def stats(self) -> Dict[str, Any]:
+        """監視用の統計（キューに残っている件数・破棄した件数）"""
+        return {'queued': self.queue_handler.queue.qsize(), 'dropped': self.queue_handler.dropped}
+
     def info(self, message):
         """情報ログ"""
         self.logger.info(message)
-    
+
     def warning(self, message):
         """警告ログ"""
         self.logger.warning(message)
-    
+
     def error(self, message):
         """エラーログ"""
         self.logger.error(message)
-    
+
     def debug(self, message):
         """デバッグログ"""
         self.logger.debug(message)
-    
-    def log_api_request(self, endpoint, method, user_id=None):
-        """API リクエストのログ"""
+
+    def log_api_request(self, endpoint, method, user_id=None, status=None, latency_ms=None):
+        """API リクエストのログ（成功したリクエストはエンドポイントごとのサンプリング率で間引く）"""
+        rate = self.sampler.rate(endpoint)
+        if status is not None and status < 400 and not self.sampler.should_log(rate):
+            return
+
         user_info = f" (User: {user_id})" if user_id else ""
-        self.info(f"API Request: {method} {endpoint}{user_info}")
-    
+        result = f" {status} {latency_ms:.1f}ms" if status is not None and latency_ms is not None else ""
+        self.logger.info(f"API Request: {method} {endpoint}{user_info}{result}", extra={
+            'endpoint': endpoint,
+            'method': method,
+            'user_id': user_id,
+            'status': status,
+            'latency_ms': round(latency_ms, 2) if latency_ms is not None else None,
+            'sample_rate': rate if rate < 1 else None,
+        })
+
     def log_api_error(self, endpoint, error_msg, user_id=None):
         """API エラーのログ"""
         user_info = f" (User: {user_id})" if user_id else ""
-        self.error(f"API Error: {endpoint}{user_info} - {error_msg}")
+        self.logger.error(f"API Error: {endpoint}{user_info} - {error_msg}", extra={
+            'endpoint': endpoint,
+            'user_id': user_id,
+        })
 
 
 # シングルトンインスタンス
-logger = TaskManagerLogger()
\ No newline at end of file
+logger = TaskManagerLogger()
+
+
+def init_logging(app) -> None:
+    """設定に従ってロガーを構成し、レスポンスにリクエストIDを付ける"""
+    config = app.config
+    logger.configure(
+        log_dir=config['LOG_DIR'],
+        log_format=config['LOG_FORMAT'],
+        rotation=config['LOG_ROTATION'],
+        max_bytes=config['LOG_MAX_BYTES'],
+        backup_count=config['LOG_BACKUP_COUNT'],
+        when=config['LOG_ROTATE_WHEN'],
+        queue_size=config['LOG_QUEUE_SIZE'],
+        sample_rates=config['LOG_SAMPLE_RATES'],
+        sample_rate=config['LOG_SAMPLE_RATE']
+    )
+
+    @app.after_request
+    def set_request_id(response):
+        response.headers[REQUEST_ID_HEADER] = get_request_id()
+        return response
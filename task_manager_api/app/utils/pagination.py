@@ -0,0 +1,104 @@
+"""
+ページング機能
+一覧エンドポイント用のキーセット（カーソル）ページング
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+from app.utils.validators import ValidationError
+
+# 1ページあたりの最大件数
+MAX_PAGE_SIZE = 200
+
+
+def parse_limit(value: Optional[str]) -> Optional[int]:
+    """limit パラメータの検証（未指定の場合は None）"""
+    if value is None or value == '':
+        return None
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError('limit は整数で指定してください', 'limit')
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValidationError(f'limit は1以上{MAX_PAGE_SIZE}以下で指定してください', 'limit')
+    return limit
+
+
+def encode_keyset(values: List[Any]) -> str:
+    """キーセットの値リストを不透明なカーソル文字列に変換"""
+    payload = json.dumps(values, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_keyset(cursor: str) -> List[Any]:
+    """カーソル文字列をキーセットの値リストに復元"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError):
+        raise ValidationError('cursor の形式が正しくありません', 'cursor')
+    if not isinstance(values, list):
+        raise ValidationError('cursor の形式が正しくありません', 'cursor')
+    return values
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """(created_at, id) を不透明なカーソル文字列に変換"""
+    return encode_keyset([created_at.isoformat(), row_id])
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """カーソル文字列を (created_at, id) に復元"""
+    try:
+        created_at, row_id = decode_keyset(cursor)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise ValidationError('cursor の形式が正しくありません', 'cursor')
+
+
+def order_by_created_at(query, model, cursor: Optional[str] = None):
+    """created_at 降順・id 降順に並べ、カーソル以降に絞り込む（Query / select のどちらにも使える）"""
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < row_id)
+        ))
+    return query
+
+
+def split_page(rows: List[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """limit + 1 件取得した行をページと next_cursor に分ける"""
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
+
+
+def paginate_by_created_at(query, model, limit: Optional[int], cursor: Optional[str] = None) -> Tuple[List[Any], Optional[str]]:
+    """
+    created_at 降順・id 降順のキーセットページング
+
+    limit が None の場合は全件を返す（従来互換）。
+    次ページがある場合のみ next_cursor を返す。
+    """
+    query = order_by_created_at(query, model, cursor)
+
+    if limit is None:
+        return query.all(), None
+
+    # 1件多く取得して次ページの有無を判定
+    return split_page(query.limit(limit + 1).all(), limit)
+
+
+def wants_total(args: Dict[str, Any]) -> bool:
+    """include_total パラメータが真かどうか"""
+    return str(args.get('include_total', '')).lower() in ('1', 'true', 'yes')
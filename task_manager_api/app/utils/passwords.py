@@ -0,0 +1,152 @@
+"""
+パスワードハッシュ機能
+PBKDF2 などの CPU 負荷の高いハッシュ計算をリクエスト処理スレッドから専用のプロセスプールへ逃がす
+"""
+import multiprocessing
+import os
+import secrets
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+SALT_LENGTH = 16
+DEFAULT_PBKDF2_DIGEST = 'sha256'
+
+
+class PasswordHasherBusy(Exception):
+    """ハッシュ計算の待ちが上限に達している"""
+
+    def __init__(self, message: str = 'ログイン処理が混み合っています。しばらくしてから再度お試しください'):
+        self.message = message
+        super().__init__(self.message)
+
+
+def _verify(password_hash: str, password: str) -> bool:
+    """ハッシュを検証（未対応のハッシュ方式は不一致とする）"""
+    try:
+        return check_password_hash(password_hash, password)
+    except (ValueError, AttributeError):
+        # 旧ハッシュ方式（例: scrypt）が使えない環境では検証不可
+        # セキュアに移行するには、パスワード再設定を行う
+        return False
+
+
+def normalize_method(method: str, iterations: int) -> str:
+    """
+    werkzeug に渡すハッシュ方式
+
+    PBKDF2 は省略されたダイジェストと反復回数を補う（例: pbkdf2 → pbkdf2:sha256:600000、反復回数の指定があればそのまま）。
+    それ以外（例: scrypt）は werkzeug の既定値で計算する。
+    """
+    name, *params = method.split(':')
+    if name != 'pbkdf2':
+        return method
+    digest = params[0] if params else DEFAULT_PBKDF2_DIGEST
+    rounds = params[1] if len(params) > 1 else iterations
+    return f'pbkdf2:{digest}:{rounds}'
+
+
+class PasswordHasher:
+    """
+    パスワードのハッシュ化・検証を行うクラス
+
+    workers > 0 の場合は件数上限付きのプロセスプールで計算し、
+    実行中・待機中の合計が max_pending を超える要求は PasswordHasherBusy で即座に断る。
+    workers = 0 の場合は呼び出し元のスレッドで計算する。
+
+    保存済みハッシュの先頭（例: scrypt:32768:8:1）と比べるため、生成時に1回ハッシュを計算して現在の設定での先頭を求める
+    （未対応の方式はここで ValueError などになり、起動時に検出される）。
+    """
+
+    def __init__(self, method: str, iterations: int, workers: int = 0, max_pending: int = 4):
+        self.method = normalize_method(method, iterations)
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pid: Optional[int] = None
+        # 存在しないユーザーの検証用のハッシュ（先頭は現在の設定で保存されるハッシュと同じ）
+        self._dummy_hash = generate_password_hash(secrets.token_hex(16), self.method, SALT_LENGTH)
+        self.prefix = self._dummy_hash.split('$', 1)[0]
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """プロセスプールを取得（初回利用時、または fork 後のプロセスでは作り直す）"""
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                # spawn で起動し、サーバーのソケットやシグナルハンドラを引き継がない
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        """パスワードをハッシュ化"""
+        return self._run(generate_password_hash, password, self.method, SALT_LENGTH)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        """パスワードを検証"""
+        return self._run(_verify, password_hash, password)
+
+    def verify_unknown(self, password: str) -> bool:
+        """存在しないユーザーでも登録済みユーザーと同じ計算量の検証を行う（常に False）"""
+        self.verify(self._dummy_hash, password)
+        return False
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """保存済みハッシュの方式・反復回数が現在の設定と異なるかどうか"""
+        return password_hash.split('$', 1)[0] != self.prefix
+
+    def shutdown(self, wait: bool = False) -> None:
+        """プロセスプールを終了"""
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+def password_hash_max_pending(config) -> int:
+    """
+    実行中・待機中のハッシュ計算の上限
+
+    待つ間はリクエストスレッドを占有するため、ワーカーのスレッド数（SERVER_THREADS）の半分までとし、
+    ログインが集中しても残りのスレッドで他のリクエストを処理できるようにする。
+    未指定の場合は計算用プロセス数の2倍（スレッド数の半分を超えない）。
+    """
+    limit = max(1, config['SERVER_THREADS'] // 2)
+    max_pending = config['PASSWORD_HASH_MAX_PENDING']
+    if max_pending is None:
+        return min(config['PASSWORD_HASH_WORKERS'] * 2, limit)
+    if config['PASSWORD_HASH_WORKERS'] and max_pending > limit:
+        raise ValueError(
+            f'PASSWORD_HASH_MAX_PENDING（{max_pending}）は SERVER_THREADS（{config["SERVER_THREADS"]}）の半分以下にしてください'
+        )
+    return max_pending
+
+
+def init_password_hasher(app) -> None:
+    """アプリケーションにパスワードハッシュ機能を登録（待ちの上限がスレッド数に対して大きすぎれば起動時に ValueError）"""
+    app.extensions['password_hasher'] = PasswordHasher(
+        method=app.config['PASSWORD_HASH_METHOD'],
+        iterations=app.config['PASSWORD_HASH_ITERATIONS'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        max_pending=password_hash_max_pending(app.config)
+    )
+
+
+def get_password_hasher() -> PasswordHasher:
+    """アプリケーションのパスワードハッシュ機能"""
+    return current_app.extensions['password_hasher']
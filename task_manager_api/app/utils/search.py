@@ -0,0 +1,174 @@
+"""
+全文検索機能
+SQLite FTS5 によるタスクのタイトル・説明文検索
+"""
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import and_, column, func, literal, literal_column, or_, table, text
+from sqlalchemy.exc import OperationalError
+
+from app.database import db
+from app.models import Task
+from app.utils.logger import logger
+from app.utils.pagination import decode_keyset, encode_keyset
+from app.utils.validators import ValidationError
+
+FTS_TABLE = 'tasks_fts'
+
+# 利用可能なトークナイザ
+TOKENIZERS = {
+    'trigram': 'trigram',
+    'unicode61': 'unicode61 remove_diacritics 2',
+    'porter': 'porter unicode61 remove_diacritics 2',
+}
+
+# trigram で索引検索できる最短の語長
+TRIGRAM_MIN_LENGTH = 3
+
+# 検索クエリの最大長
+MAX_QUERY_LENGTH = 200
+
+tasks_fts = table(FTS_TABLE, column('rowid'), column('title'), column('description'))
+
+TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON tasks BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description ON tasks BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+
+def ensure_search_index(tokenizer: str = 'trigram') -> bool:
+    """
+    FTS5 仮想テーブルと同期用トリガーを作成
+
+    トークナイザが変更された場合は作り直して tasks から再構築する。
+    FTS5 が利用できない環境では False を返す。
+    """
+    if tokenizer not in TOKENIZERS:
+        raise ValueError(f'未対応のトークナイザです: {tokenizer}')
+
+    create_sql = (
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+        f"title, description, content='tasks', content_rowid='id', tokenize='{TOKENIZERS[tokenizer]}')"
+    )
+
+    try:
+        with db.engine.begin() as conn:
+            existing = conn.execute(
+                text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': FTS_TABLE}
+            ).scalar()
+
+            if existing != create_sql:
+                if existing:
+                    conn.execute(text(f'DROP TABLE {FTS_TABLE}'))
+                conn.execute(text(create_sql))
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+            for trigger in TRIGGERS:
+                conn.execute(text(trigger))
+    except OperationalError as e:
+        logger.warning(f'全文検索インデックスを作成できません（FTS5 未対応の可能性）: {e}')
+        return False
+
+    return True
+
+
+def _quote(term: str) -> str:
+    """FTS5 のフレーズとしてエスケープ"""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _escape_like(term: str) -> str:
+    """LIKE のワイルドカードをエスケープ"""
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def build_search_terms(q: Optional[str], tokenizer: str) -> Tuple[Optional[str], List[str]]:
+    """
+    検索語を FTS5 の MATCH 式と LIKE 検索語に分解
+
+    unicode61 系は各語を前方一致（"語"*）で検索する。
+    trigram は部分一致で検索し、3文字未満の語は索引を使えないため LIKE で絞り込む。
+    """
+    q = (q or '').strip()
+    if not q:
+        raise ValidationError('検索語 q は必須項目です', 'q')
+    if len(q) > MAX_QUERY_LENGTH:
+        raise ValidationError(f'検索語は{MAX_QUERY_LENGTH}文字以内で入力してください', 'q')
+
+    phrases = []
+    like_terms = []
+    for term in q.split():
+        term = term.rstrip('*')
+        if not term:
+            continue
+        if tokenizer == 'trigram':
+            if len(term) < TRIGRAM_MIN_LENGTH:
+                like_terms.append(term)
+            else:
+                phrases.append(_quote(term))
+        else:
+            phrases.append(_quote(term) + '*')
+
+    if not phrases and not like_terms:
+        raise ValidationError('検索語 q は必須項目です', 'q')
+
+    return (' '.join(phrases) or None), like_terms
+
+
+def match_tasks(query, q: str, tokenizer: str, limit: int, cursor: Optional[str] = None) -> Tuple[List[Any], Optional[str]]:
+    """
+    検索語に一致するタスクを bm25 の関連度順（同順位は id 昇順）でキーセットページング
+
+    query には user_id などの絞り込み済みの Task クエリを渡す。
+    """
+    match, like_terms = build_search_terms(q, tokenizer)
+
+    if match:
+        rank = func.bm25(literal_column(FTS_TABLE))
+        query = query.join(tasks_fts, tasks_fts.c.rowid == Task.id).filter(
+            literal_column(FTS_TABLE).op('MATCH')(match)
+        )
+    else:
+        # 短い語のみの場合は関連度を付けず id 順
+        rank = literal(0.0)
+
+    for term in like_terms:
+        pattern = f'%{_escape_like(term)}%'
+        query = query.filter(or_(
+            Task.title.like(pattern, escape='\\'),
+            Task.description.like(pattern, escape='\\')
+        ))
+
+    if cursor:
+        try:
+            last_rank, last_id = decode_keyset(cursor)
+            last_rank, last_id = float(last_rank), int(last_id)
+        except (ValueError, TypeError):
+            raise ValidationError('cursor の形式が正しくありません', 'cursor')
+        query = query.filter(or_(
+            rank > last_rank,
+            and_(rank == last_rank, Task.id > last_id)
+        ))
+
+    rows = query.add_columns(rank).order_by(rank, Task.id).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return [task for task, _ in rows], None
+
+    rows = rows[:limit]
+    last_task, last_rank = rows[-1]
+    return [task for task, _ in rows], encode_keyset([last_rank, last_task.id])
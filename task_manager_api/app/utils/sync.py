@@ -0,0 +1,100 @@
+"""
+差分同期機能
+変更ログ（sync_changes）の維持と変更分の取得
+"""
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import func, text
+
+from app.database import db
+from app.models import Category, SyncChange, Task
+
+# 変更ログを記録する対象テーブル（テーブル名, エンティティ種別）
+SYNCED_TABLES = (('tasks', 'task'), ('categories', 'category'))
+
+
+def _triggers(table: str, entity_type: str) -> List[str]:
+    """対象テーブルの INSERT / UPDATE / DELETE で変更ログを置き換えるトリガー"""
+    upsert = (
+        "INSERT OR REPLACE INTO sync_changes (user_id, entity_type, entity_id, deleted) "
+        "VALUES ({row}.user_id, '{entity_type}', {row}.id, {deleted})"
+    )
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS sync_{table}_ai AFTER INSERT ON {table} BEGIN "
+        f"{upsert.format(row='new', entity_type=entity_type, deleted=0)}; END",
+        f"CREATE TRIGGER IF NOT EXISTS sync_{table}_au AFTER UPDATE ON {table} BEGIN "
+        f"{upsert.format(row='new', entity_type=entity_type, deleted=0)}; END",
+        f"CREATE TRIGGER IF NOT EXISTS sync_{table}_ad AFTER DELETE ON {table} BEGIN "
+        f"{upsert.format(row='old', entity_type=entity_type, deleted=1)}; END",
+    ]
+
+
+def ensure_sync_log() -> None:
+    """
+    変更ログ用トリガーを作成
+
+    変更ログ導入前のデータベースでは既存の行を変更ログに登録する。
+    """
+    with db.engine.begin() as conn:
+        is_empty = conn.execute(text('SELECT 1 FROM sync_changes LIMIT 1')).first() is None
+        for table, entity_type in SYNCED_TABLES:
+            for trigger in _triggers(table, entity_type):
+                conn.execute(text(trigger))
+            if is_empty:
+                conn.execute(text(
+                    f"INSERT INTO sync_changes (user_id, entity_type, entity_id, deleted) "
+                    f"SELECT user_id, '{entity_type}', id, 0 FROM {table} ORDER BY id"
+                ))
+
+
+def fetch_changes(user_id: int, since: int, limit: int) -> Tuple[List[Dict[str, Any]], int, bool]:
+    """
+    seq が since より大きい変更を seq 順に取得
+
+    戻り値は (変更のリスト, 次回の since, 続きがあるか)。
+    変更後の行はタスク・カテゴリごとに IN クエリ1回で取得する。
+    """
+    entries = SyncChange.query.filter(
+        SyncChange.user_id == user_id,
+        SyncChange.seq > since
+    ).order_by(SyncChange.seq).limit(limit + 1).all()
+
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    next_since = entries[-1].seq if entries else since
+
+    task_ids = [entry.entity_id for entry in entries if entry.entity_type == 'task' and not entry.deleted]
+    category_ids = [entry.entity_id for entry in entries if entry.entity_type == 'category' and not entry.deleted]
+
+    tasks = {}
+    if task_ids:
+        tasks = {
+            task.id: task.to_dict()
+            for task in Task.query_with_category().filter(Task.user_id == user_id, Task.id.in_(task_ids))
+        }
+
+    categories = {}
+    if category_ids:
+        counts = dict(db.session.query(Task.category_id, func.count(Task.id)).filter(
+            Task.user_id == user_id, Task.category_id.in_(category_ids)
+        ).group_by(Task.category_id).all())
+        categories = {
+            category.id: category.to_dict(task_count=counts.get(category.id, 0))
+            for category in Category.query.filter(Category.user_id == user_id, Category.id.in_(category_ids))
+        }
+
+    changes = []
+    for entry in entries:
+        rows = tasks if entry.entity_type == 'task' else categories
+        data = rows.get(entry.entity_id)
+        # 取得までの間に削除された行も墓標として返す
+        deleted = entry.deleted or data is None
+        changes.append({
+            'seq': entry.seq,
+            'type': entry.entity_type,
+            'id': entry.entity_id,
+            'deleted': deleted,
+            'data': None if deleted else data
+        })
+
+    return changes, next_since, has_more
@@ -0,0 +1,242 @@
+"""
+タスク統計カウンタ
+user_task_stats / user_open_due_stats テーブルの差分更新・再構築・読み出し
+"""
+from collections import Counter
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event, func, inspect
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.database import db
+from app.models import Task, UserOpenDueStats, UserTaskStats
+from app.utils.validators import TaskValidator
+
+# 期限切れ判定の対象外とするステータス
+CLOSED_STATUSES = ('completed', 'cancelled')
+
+# 未指定時の既定値（Task モデルのカラム既定値と同じ）
+DEFAULT_STATUS = 'pending'
+DEFAULT_PRIORITY = 'medium'
+
+StatsKey = Tuple[int, str, str]
+DueKey = Tuple[int, date, str]
+
+# カウンタのキーに使う Task の属性（変更前の値の取得順）
+COUNTED_ATTRIBUTES = ('status', 'priority', 'due_date')
+
+
+def stats_key(user_id: int, status: Optional[str], priority: Optional[str]) -> StatsKey:
+    """カウンタのキー (user_id, status, priority)"""
+    return (user_id, status or DEFAULT_STATUS, priority or DEFAULT_PRIORITY)
+
+
+def due_key(user_id: int, status: Optional[str], priority: Optional[str],
+            due_date: Optional[datetime]) -> Optional[DueKey]:
+    """期限日別カウンタのキー (user_id, 期限日, priority)（完了・キャンセル済み・期限日なしは None）"""
+    if due_date is None or (status or DEFAULT_STATUS) in CLOSED_STATUSES:
+        return None
+    day = due_date.date() if isinstance(due_date, datetime) else due_date
+    return (user_id, day, priority or DEFAULT_PRIORITY)
+
+
+def _previous_value(state, name: str):
+    """属性の変更前の値（未変更なら現在値）"""
+    history = state.attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.obj(), name)
+
+
+def collect_session_deltas(session) -> Tuple[Counter, Counter]:
+    """
+    フラッシュ予定の Task の追加・変更・削除からカウンタの増減を求める
+
+    戻り値は (ステータス×優先度別の増減, 未完了タスクの期限日別の増減)。
+    """
+    deltas = Counter()
+    due_deltas = Counter()
+
+    def count(user_id, status, priority, due_date, delta):
+        deltas[stats_key(user_id, status, priority)] += delta
+        key = due_key(user_id, status, priority, due_date)
+        if key is not None:
+            due_deltas[key] += delta
+
+    for obj in session.new:
+        if isinstance(obj, Task):
+            count(obj.user_id, obj.status, obj.priority, obj.due_date, 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Task):
+            state = inspect(obj)
+            count(obj.user_id, *(_previous_value(state, name) for name in COUNTED_ATTRIBUTES), -1)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Task) or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[name].history.has_changes() for name in COUNTED_ATTRIBUTES):
+            continue
+        count(obj.user_id, *(_previous_value(state, name) for name in COUNTED_ATTRIBUTES), -1)
+        count(obj.user_id, obj.status, obj.priority, obj.due_date, 1)
+
+    return (
+        Counter({key: delta for key, delta in deltas.items() if delta}),
+        Counter({key: delta for key, delta in due_deltas.items() if delta}),
+    )
+
+
+def apply_stats_deltas(connection, deltas: Dict[StatsKey, int]) -> None:
+    """カウンタの増減を同一トランザクション内で反映（UPSERT）"""
+    if not deltas:
+        return
+
+    table = UserTaskStats.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.status, table.c.priority],
+        set_={'task_count': table.c.task_count + stmt.excluded.task_count}
+    )
+    connection.execute(stmt, [
+        {'user_id': user_id, 'status': status, 'priority': priority, 'task_count': delta}
+        for (user_id, status, priority), delta in deltas.items()
+    ])
+
+
+def apply_due_deltas(connection, deltas: Dict[DueKey, int]) -> None:
+    """期限日別カウンタの増減を同一トランザクション内で反映（UPSERT、0 件になった行は削除）"""
+    if not deltas:
+        return
+
+    table = UserOpenDueStats.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.due_date, table.c.priority],
+        set_={'task_count': table.c.task_count + stmt.excluded.task_count}
+    )
+    connection.execute(stmt, [
+        {'user_id': user_id, 'due_date': day, 'priority': priority, 'task_count': delta}
+        for (user_id, day, priority), delta in deltas.items()
+    ])
+    if any(delta < 0 for delta in deltas.values()):
+        connection.execute(table.delete().where(
+            table.c.user_id.in_({user_id for user_id, _, _ in deltas}),
+            table.c.task_count <= 0
+        ))
+
+
+def _before_flush(session, flush_context, instances):
+    """Task の変更をフラッシュ時にカウンタへ反映"""
+    deltas, due_deltas = collect_session_deltas(session)
+    if deltas or due_deltas:
+        connection = session.connection()
+        apply_stats_deltas(connection, deltas)
+        apply_due_deltas(connection, due_deltas)
+
+
+def register_stats_listeners() -> None:
+    """セッションイベントにカウンタ更新処理を登録（重複登録しない）"""
+    if not event.contains(Session, 'before_flush', _before_flush):
+        event.listen(Session, 'before_flush', _before_flush)
+
+
+def rebuild_task_stats(user_id: Optional[int] = None) -> int:
+    """
+    tasks テーブルからカウンタを再構築（整合性の回復用）
+
+    user_id 未指定の場合は全ユーザーを対象とし、再構築したステータス×優先度の行数を返す。
+    """
+    status = func.coalesce(Task.status, DEFAULT_STATUS)
+    priority = func.coalesce(Task.priority, DEFAULT_PRIORITY)
+    due_day = func.date(Task.due_date)
+
+    delete = UserTaskStats.__table__.delete()
+    due_delete = UserOpenDueStats.__table__.delete()
+    counts = db.session.query(Task.user_id, status, priority, func.count(Task.id))
+    due_counts = db.session.query(Task.user_id, due_day, priority, func.count(Task.id)).filter(
+        Task.due_date.isnot(None),
+        status.notin_(CLOSED_STATUSES)
+    )
+    if user_id is not None:
+        delete = delete.where(UserTaskStats.user_id == user_id)
+        due_delete = due_delete.where(UserOpenDueStats.user_id == user_id)
+        counts = counts.filter(Task.user_id == user_id)
+        due_counts = due_counts.filter(Task.user_id == user_id)
+    counts = counts.group_by(Task.user_id, status, priority).all()
+    due_counts = due_counts.group_by(Task.user_id, due_day, priority).all()
+
+    db.session.execute(delete)
+    db.session.execute(due_delete)
+    rows = Counter()
+    for row_user_id, row_status, row_priority, count in counts:
+        rows[(row_user_id, row_status, row_priority)] += count
+    due_rows = Counter()
+    for row_user_id, day, row_priority, count in due_counts:
+        due_rows[(row_user_id, date.fromisoformat(day), row_priority)] += count
+    apply_stats_deltas(db.session.connection(), rows)
+    apply_due_deltas(db.session.connection(), due_rows)
+    db.session.commit()
+    return len(rows)
+
+
+def count_overdue_tasks(user_id: int) -> Dict[str, int]:
+    """
+    期限切れ（本日より前が期限で未完了）タスクの優先度別件数
+
+    期限日別カウンタを主キーの範囲で合計する（読む行数は未完了タスクの期限日・優先度の組み合わせ数で、完了済みのタスクは含まない）。
+    """
+    rows = db.session.query(UserOpenDueStats.priority, func.sum(UserOpenDueStats.task_count)).filter(
+        UserOpenDueStats.user_id == user_id,
+        UserOpenDueStats.due_date < date.today()
+    ).group_by(UserOpenDueStats.priority).all()
+    return {priority: count for priority, count in rows}
+
+
+def build_task_stats(rows: Iterable[Tuple[str, str, int]], overdue_by_priority: Dict[str, int]) -> Dict[str, Any]:
+    """(status, priority, 件数) の行から統計レスポンスを組み立てる"""
+    matrix = {
+        status: {priority: 0 for priority in sorted(TaskValidator.VALID_PRIORITIES)}
+        for status in sorted(TaskValidator.VALID_STATUSES)
+    }
+    by_status = {status: 0 for status in matrix}
+    by_priority = {priority: 0 for priority in sorted(TaskValidator.VALID_PRIORITIES)}
+    overdue = dict.fromkeys(by_priority, 0)
+    overdue.update(overdue_by_priority)
+    total_tasks = 0
+
+    for status, priority, count in rows:
+        if not count:
+            continue
+        matrix.setdefault(status, {}).setdefault(priority, 0)
+        matrix[status][priority] += count
+        by_status[status] = by_status.get(status, 0) + count
+        by_priority[priority] = by_priority.get(priority, 0) + count
+        total_tasks += count
+
+    completed_tasks = by_status.get('completed', 0)
+
+    return {
+        'total_tasks': total_tasks,
+        'pending_tasks': by_status.get('pending', 0),
+        'in_progress_tasks': by_status.get('in_progress', 0),
+        'completed_tasks': completed_tasks,
+        'completion_rate': round((completed_tasks / total_tasks * 100), 2) if total_tasks > 0 else 0,
+        'high_priority_tasks': by_priority.get('high', 0),
+        'urgent_priority_tasks': by_priority.get('urgent', 0),
+        'overdue_tasks': sum(overdue.values()),
+        'overdue_by_priority': overdue,
+        'by_status': by_status,
+        'by_priority': by_priority,
+        'status_priority_matrix': matrix
+    }
+
+
+def read_task_stats(user_id: int) -> Dict[str, Any]:
+    """カウンタテーブルから統計情報を取得（タスク件数に依存しない主キー読み出し）"""
+    rows = db.session.query(
+        UserTaskStats.status, UserTaskStats.priority, UserTaskStats.task_count
+    ).filter(UserTaskStats.user_id == user_id).all()
+    return build_task_stats(rows, count_overdue_tasks(user_id))
@@ -0,0 +1,143 @@
+"""
+認証のスロットリング機能
+ログイン・登録の試行をユーザー名・クライアントごとのトークンバケットで制限する
+
+バケットはプロセス内に保持するため、プリフォークサーバーでは設定した回数をワーカー数で分け合う（per_worker_rate）。
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from flask import current_app, request
+
+
+class TooManyAttempts(Exception):
+    """試行回数の上限を超えた"""
+
+    def __init__(self, retry_after: float, message: str = '試行回数が多すぎます。しばらくしてから再度お試しください'):
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.message = message
+        super().__init__(self.message)
+
+
+class TokenBucketLimiter:
+    """
+    キーごとのトークンバケット（スレッドセーフ）
+
+    rate は (試行回数, 秒数) で、バケットの容量が試行回数、
+    秒数あたり試行回数分のトークンが補充される。
+    保持するキー数は maxsize までで、超えると最も古いキーから破棄する。
+    """
+
+    def __init__(self, rate: Tuple[int, float], maxsize: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.capacity, period = rate
+        self.refill_per_second = self.capacity / period
+        self.maxsize = maxsize
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+        self.allowed = 0
+        self.rejected = 0
+
+    def consume(self, key: Hashable) -> float:
+        """トークンを1つ消費（許可なら 0、拒否なら次のトークンまでの秒数）"""
+        now = self._clock()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.refill_per_second)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+                self.allowed += 1
+            else:
+                wait = (1 - tokens) / self.refill_per_second
+                self.rejected += 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def reset(self, key: Hashable) -> None:
+        """キーのバケットを満タンに戻す"""
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """監視用の統計"""
+        with self._lock:
+            return {'keys': len(self._buckets), 'allowed': self.allowed, 'rejected': self.rejected}
+
+
+class AuthThrottle:
+    """ログイン（ユーザー名・クライアントごと）と登録（クライアントごと）の制限"""
+
+    def __init__(self, login_user_rate, login_client_rate, register_client_rate, maxsize: int = 10000):
+        self.login_user = TokenBucketLimiter(login_user_rate, maxsize)
+        self.login_client = TokenBucketLimiter(login_client_rate, maxsize)
+        self.register_client = TokenBucketLimiter(register_client_rate, maxsize)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            'login_user': self.login_user.stats(),
+            'login_client': self.login_client.stats(),
+            'register_client': self.register_client.stats(),
+        }
+
+
+def per_worker_rate(rate: Tuple[int, float], workers: int) -> Tuple[int, float]:
+    """
+    ワーカー1つあたりのトークンバケット (容量, 秒数)
+
+    試行は各ワーカーに振り分けられるため、補充の速さを 1/workers にして全ワーカー合計が設定どおりになるようにする。
+    容量は回数をワーカー数で割った値（最低1）のため、短時間にまとめて許可される回数は最大で max(回数, ワーカー数)。
+    """
+    count, period = rate
+    if workers <= 1:
+        return rate
+    capacity = max(1, count // workers)
+    return capacity, capacity * period * workers / count
+
+
+def init_auth_throttle(app, workers: int = 1) -> None:
+    """アプリケーションに認証のスロットリングを登録（workers はバケットを別々に持つプロセス数）"""
+    config = app.config
+    app.extensions['auth_throttle'] = AuthThrottle(
+        login_user_rate=per_worker_rate(config['LOGIN_THROTTLE_PER_USER'], workers),
+        login_client_rate=per_worker_rate(config['LOGIN_THROTTLE_PER_CLIENT'], workers),
+        register_client_rate=per_worker_rate(config['REGISTER_THROTTLE_PER_CLIENT'], workers),
+        maxsize=config['AUTH_THROTTLE_MAX_KEYS']
+    )
+
+
+def get_auth_throttle() -> AuthThrottle:
+    """アプリケーションの認証スロットリング"""
+    return current_app.extensions['auth_throttle']
+
+
+def _consume(limiter: TokenBucketLimiter, key: Hashable) -> None:
+    wait = limiter.consume(key)
+    if wait:
+        raise TooManyAttempts(wait)
+
+
+def throttle_login(username: str) -> None:
+    """ログイン試行を制限（ハッシュ計算の前に呼ぶ、超過時は TooManyAttempts）"""
+    if not current_app.config['AUTH_THROTTLE_ENABLED']:
+        return
+    throttle = get_auth_throttle()
+    _consume(throttle.login_client, request.remote_addr)
+    _consume(throttle.login_user, username)
+
+
+def reset_login_throttle(username: str) -> None:
+    """ログイン成功時にユーザー名ごとの制限を解除"""
+    get_auth_throttle().login_user.reset(username)
+
+
+def throttle_register() -> None:
+    """ユーザー登録を制限（ハッシュ計算の前に呼ぶ、超過時は TooManyAttempts）"""
+    if not current_app.config['AUTH_THROTTLE_ENABLED']:
+        return
+    _consume(get_auth_throttle().register_client, request.remote_addr)
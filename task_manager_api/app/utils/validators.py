@@ -22,8 +22,8 @@ class TaskValidator:
     VALID_PRIORITIES = {'low', 'medium', 'high', 'urgent'}
     
     @staticmethod
-    def validate_task_data(data: Dict[str, Any]) -> Dict[str, Any]:
-        """タスクデータのバリデーション"""
+    def validate_task_data(data: Dict[str, Any], allow_past_due_date: bool = False) -> Dict[str, Any]:
+        """タスクデータのバリデーション（allow_past_due_date は移行データの取り込み用）"""
         errors = []
         
         # タイトル検証
@@ -53,7 +53,7 @@ class TaskValidator:
             try:
                 parsed_date = datetime.strptime(due_date, '%Y-%m-%d') if len(due_date) == 10 else datetime.fromisoformat(due_date.replace('Z', '+00:00'))
                 # 過去日チェック: 日単位のため時分は考慮しない
-                if parsed_date.date() < datetime.now().date():
+                if not allow_past_due_date and parsed_date.date() < datetime.now().date():
                     errors.append('期限日は本日以降の日付を設定してください')
             except ValueError:
                 errors.append('期限日の形式が正しくありません（YYYY-MM-DD）')
@@ -62,6 +62,59 @@ class TaskValidator:
             raise ValidationError('; '.join(errors))
         
         return data
+    
+    @staticmethod
+    def validate_task_update(data: Dict[str, Any]) -> Dict[str, Any]:
+        """タスク部分更新データのバリデーション（指定されたフィールドのみ検証、単体・バッチの更新で共通）"""
+        if not isinstance(data, dict):
+            raise ValidationError('更新データはオブジェクトで指定してください')
+        
+        errors = []
+        
+        if 'title' in data:
+            title = data['title']
+            if not isinstance(title, str) or not title.strip():
+                errors.append('タスクタイトルは必須項目です')
+            elif len(title) > 200:
+                errors.append('タスクタイトルは200文字以内で入力してください')
+        
+        if 'status' in data and data['status'] not in TaskValidator.VALID_STATUSES:
+            errors.append(f'ステータスは {", ".join(TaskValidator.VALID_STATUSES)} のいずれかである必要があります')
+        
+        if 'priority' in data and data['priority'] not in TaskValidator.VALID_PRIORITIES:
+            errors.append(f'優先度は {", ".join(TaskValidator.VALID_PRIORITIES)} のいずれかである必要があります')
+        
+        if len(data.get('description') or '') > 1000:
+            errors.append('タスクの説明は1000文字以内で入力してください')
+        
+        if data.get('due_date'):
+            try:
+                TaskValidator.parse_due_date(data['due_date'])
+            except ValidationError as e:
+                errors.append(e.message)
+        
+        category_id = data.get('category_id')
+        if category_id is not None and (not isinstance(category_id, int) or isinstance(category_id, bool)):
+            errors.append('category_id は整数で指定してください')
+        
+        if errors:
+            raise ValidationError('; '.join(errors))
+        
+        return data
+    
+    @staticmethod
+    def parse_due_date(value: Any) -> Optional[datetime]:
+        """期限日の解析（YYYY-MM-DD 形式を優先、なければISO8601を許可）"""
+        if not value:
+            return None
+        try:
+            if isinstance(value, str) and len(value) == 10:
+                # 日付のみ
+                return datetime.strptime(value, '%Y-%m-%d')
+            # 互換用: 旧クライアントからの日時も受容
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except (ValueError, AttributeError):
+            raise ValidationError('期限日の形式が正しくありません（YYYY-MM-DD）', 'due_date')
 
 
 class UserValidator:
@@ -0,0 +1,80 @@
+"""
+データバージョン管理
+ユーザー別データバージョンの更新と ETag の算出
+"""
+import hashlib
+from datetime import datetime
+from typing import Iterable
+
+from flask import request
+from sqlalchemy import event, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.database import db
+from app.models import Category, Task, UserDataVersion
+from app.utils.wire_formats import negotiate_response_mimetype
+
+# バージョンを管理する対象のモデル
+VERSIONED_MODELS = (Task, Category)
+
+
+def bump_data_versions(connection, user_ids: Iterable[int]) -> None:
+    """指定ユーザーのデータバージョンを同一トランザクション内で1つ進める（UPSERT）"""
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+
+    table = UserDataVersion.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={'version': table.c.version + 1}
+    )
+    connection.execute(stmt, [{'user_id': user_id, 'version': 1} for user_id in user_ids])
+
+
+def _before_flush(session, flush_context, instances):
+    """タスク・カテゴリの変更をフラッシュ時にバージョンへ反映"""
+    user_ids = set()
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, VERSIONED_MODELS):
+            user_ids.add(obj.user_id)
+    for obj in session.dirty:
+        if isinstance(obj, VERSIONED_MODELS) and session.is_modified(obj):
+            user_ids.add(obj.user_id)
+    if user_ids:
+        bump_data_versions(session.connection(), user_ids)
+
+
+def register_version_listeners() -> None:
+    """セッションイベントにバージョン更新処理を登録（重複登録しない）"""
+    if not event.contains(Session, 'before_flush', _before_flush):
+        event.listen(Session, 'before_flush', _before_flush)
+
+
+def data_version_select(user_id: int):
+    """ユーザーのデータバージョンを取得する SELECT 文"""
+    return select(UserDataVersion.version).where(UserDataVersion.user_id == user_id)
+
+
+def get_data_version(user_id: int) -> int:
+    """ユーザーの現在のデータバージョン（未作成なら0）"""
+    return db.session.scalar(data_version_select(user_id)) or 0
+
+
+def compute_etag(user_id: int, version: int) -> str:
+    """
+    データバージョンとリクエスト内容から ETag を算出
+
+    同じバージョンでも URL（クエリ文字列）・レスポンス形式（JSON / CBOR など）ごとに表現が異なるため含める。
+    期限切れ件数は日付で変わるため当日の日付も含める。
+    """
+    key = '|'.join([
+        str(user_id),
+        str(version),
+        datetime.now().date().isoformat(),
+        request.full_path,
+        negotiate_response_mimetype(),
+    ])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
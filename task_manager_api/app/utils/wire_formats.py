@@ -0,0 +1,253 @@
+"""
+バイナリ形式のリクエスト・レスポンス
+Accept / Content-Type による CBOR・MessagePack と JSON の切り替え
+"""
+import struct
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import Request, request
+from werkzeug.exceptions import BadRequest
+
+try:
+    import msgpack
+except ImportError:  # 未インストールの場合は MessagePack を提供しない
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+CBOR_MIMETYPE = 'application/cbor'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+
+class CBORError(ValueError):
+    """CBOR として解析できないデータ"""
+
+
+def _encode_head(out: bytearray, major: int, value: int) -> None:
+    """CBOR の先頭バイト（メジャータイプと引数）を書き込む"""
+    major <<= 5
+    if value < 24:
+        out.append(major | value)
+    elif value < 0x100:
+        out += struct.pack('>BB', major | 24, value)
+    elif value < 0x10000:
+        out += struct.pack('>BH', major | 25, value)
+    elif value < 0x100000000:
+        out += struct.pack('>BI', major | 26, value)
+    elif value < 0x10000000000000000:
+        out += struct.pack('>BQ', major | 27, value)
+    else:
+        raise TypeError('CBOR で表現できない整数です')
+
+
+def _encode(out: bytearray, obj: Any, default: Callable[[Any], Any]) -> None:
+    if obj is None:
+        out.append(0xf6)
+    elif obj is True:
+        out.append(0xf5)
+    elif obj is False:
+        out.append(0xf4)
+    elif isinstance(obj, str):
+        data = obj.encode('utf-8')
+        _encode_head(out, 3, len(data))
+        out += data
+    elif isinstance(obj, int):
+        if obj >= 0:
+            _encode_head(out, 0, obj)
+        else:
+            _encode_head(out, 1, -1 - obj)
+    elif isinstance(obj, float):
+        out += struct.pack('>Bd', 0xfb, obj)
+    elif isinstance(obj, dict):
+        _encode_head(out, 5, len(obj))
+        for key, value in obj.items():
+            _encode(out, str(key) if not isinstance(key, str) else key, default)
+            _encode(out, value, default)
+    elif isinstance(obj, (list, tuple)):
+        _encode_head(out, 4, len(obj))
+        for value in obj:
+            _encode(out, value, default)
+    elif isinstance(obj, (bytes, bytearray)):
+        _encode_head(out, 2, len(obj))
+        out += obj
+    else:
+        _encode(out, default(obj), default)
+
+
+def cbor_dumps(obj: Any, default: Callable[[Any], Any]) -> bytes:
+    """CBOR（RFC 8949）にエンコード（JSON と同じ値の範囲、日時などは default で変換）"""
+    out = bytearray()
+    _encode(out, obj, default)
+    return bytes(out)
+
+
+class _CBORDecoder:
+    """CBOR のデコーダ（タグは中身の値として扱う）"""
+
+    def __init__(self, data: bytes):
+        self.data = memoryview(data)
+        self.pos = 0
+
+    def read(self, size: int) -> memoryview:
+        if self.pos + size > len(self.data):
+            raise CBORError('CBOR データが途中で終わっています')
+        chunk = self.data[self.pos:self.pos + size]
+        self.pos += size
+        return chunk
+
+    def read_argument(self, info: int) -> Optional[int]:
+        """引数を読む（不定長の場合は None）"""
+        if info < 24:
+            return info
+        if info == 31:
+            return None
+        if info > 27:
+            raise CBORError('CBOR の引数が不正です')
+        size = 1 << (info - 24)
+        return int.from_bytes(self.read(size), 'big')
+
+    def decode(self) -> Any:
+        initial = self.read(1)[0]
+        major, info = initial >> 5, initial & 0x1f
+
+        if major == 7:
+            return self.decode_simple(info)
+
+        argument = self.read_argument(info)
+        if major == 0:
+            return argument
+        if major == 1:
+            return -1 - argument
+        if major in (2, 3):
+            if argument is None:
+                data = b''.join(self.decode_chunk(major) for _ in self.iter_indefinite())
+            else:
+                data = bytes(self.read(argument))
+            return data.decode('utf-8') if major == 3 else data
+        if major == 4:
+            if argument is None:
+                return [self.decode() for _ in self.iter_indefinite()]
+            return [self.decode() for _ in range(argument)]
+        if major == 5:
+            items = self.iter_indefinite() if argument is None else range(argument)
+            result = {}
+            for _ in items:
+                key = self.decode()
+                result[key] = self.decode()
+            return result
+        # major == 6: タグ付きの値
+        return self.decode()
+
+    def decode_chunk(self, major: int) -> bytes:
+        """不定長文字列の1チャンク"""
+        initial = self.read(1)[0]
+        if initial >> 5 != major:
+            raise CBORError('CBOR の不定長文字列が不正です')
+        return bytes(self.read(self.read_argument(initial & 0x1f)))
+
+    def iter_indefinite(self):
+        """break（0xff）まで繰り返す"""
+        while True:
+            if self.pos >= len(self.data):
+                raise CBORError('CBOR データが途中で終わっています')
+            if self.data[self.pos] == 0xff:
+                self.pos += 1
+                return
+            yield
+
+    def decode_simple(self, info: int) -> Any:
+        if info == 20:
+            return False
+        if info == 21:
+            return True
+        if info in (22, 23):
+            return None
+        if info == 25:
+            return _decode_half(int.from_bytes(self.read(2), 'big'))
+        if info == 26:
+            return struct.unpack('>f', self.read(4))[0]
+        if info == 27:
+            return struct.unpack('>d', self.read(8))[0]
+        raise CBORError('未対応の CBOR 値です')
+
+
+def _decode_half(half: int) -> float:
+    """半精度浮動小数点数"""
+    exponent = (half >> 10) & 0x1f
+    mantissa = half & 0x3ff
+    if exponent == 0:
+        value = mantissa * 2 ** -24
+    elif exponent == 31:
+        value = float('inf') if mantissa == 0 else float('nan')
+    else:
+        value = (mantissa + 1024) * 2 ** (exponent - 25)
+    return -value if half & 0x8000 else value
+
+
+def cbor_loads(data: bytes) -> Any:
+    """CBOR をデコード"""
+    decoder = _CBORDecoder(data)
+    try:
+        value = decoder.decode()
+    except (UnicodeDecodeError, struct.error, TypeError, RecursionError) as e:
+        raise CBORError(f'CBOR として解析できません: {e}')
+    if decoder.pos != len(decoder.data):
+        raise CBORError('CBOR データの後に余分なバイトがあります')
+    return value
+
+
+def _msgpack_dumps(obj: Any, default: Callable[[Any], Any]) -> bytes:
+    return msgpack.packb(obj, default=default, use_bin_type=True, datetime=False)
+
+
+def _msgpack_loads(data: bytes) -> Any:
+    try:
+        return msgpack.unpackb(data, raw=False)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'MessagePack として解析できません: {e}')
+
+
+# Content-Type → (エンコード関数, デコード関数)。JSON はプロバイダーが直接扱う
+WIRE_FORMATS: Dict[str, Tuple[Callable[[Any, Callable[[Any], Any]], bytes], Callable[[bytes], Any]]] = {
+    CBOR_MIMETYPE: (cbor_dumps, cbor_loads),
+}
+if msgpack is not None:
+    WIRE_FORMATS[MSGPACK_MIMETYPE] = (_msgpack_dumps, _msgpack_loads)
+
+# リクエストの Content-Type の別名
+MIMETYPE_ALIASES = {
+    'application/x-msgpack': MSGPACK_MIMETYPE,
+    'application/vnd.msgpack': MSGPACK_MIMETYPE,
+}
+
+
+def request_wire_format(mimetype: str) -> Optional[str]:
+    """リクエストの Content-Type に対応するバイナリ形式（JSON などは None）"""
+    mimetype = MIMETYPE_ALIASES.get(mimetype, mimetype)
+    return mimetype if mimetype in WIRE_FORMATS else None
+
+
+def negotiate_response_mimetype() -> str:
+    """Accept からレスポンスの形式を選ぶ（指定なし・*/* は JSON）"""
+    return request.accept_mimetypes.best_match([JSON_MIMETYPE, *WIRE_FORMATS], default=JSON_MIMETYPE)
+
+
+class APIRequest(Request):
+    """CBOR / MessagePack のリクエストボディも get_json() で読めるリクエスト"""
+
+    @property
+    def has_structured_body(self) -> bool:
+        """JSON またはバイナリ形式のボディかどうか"""
+        return self.is_json or request_wire_format(self.mimetype) is not None
+
+    def get_json(self, force: bool = False, silent: bool = False, cache: bool = True) -> Any:
+        wire_format = request_wire_format(self.mimetype)
+        if wire_format is None:
+            return super().get_json(force=force, silent=silent, cache=cache)
+
+        loads = WIRE_FORMATS[wire_format][1]
+        try:
+            return loads(self.get_data(cache=cache))
+        except ValueError as e:
+            if silent:
+                return None
+            raise BadRequest(f'リクエストボディを解析できません: {e}')
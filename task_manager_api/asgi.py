@@ -0,0 +1,15 @@
+"""
+ASGI エントリーポイント
+タスク一覧・詳細・エクスポート・カテゴリ一覧の参照と SSE をコルーチンで処理し、それ以外は Flask アプリケーションへ委譲する
+
+起動例（task_manager_api ディレクトリで実行、SSE のイベントはプロセス内で配信するため1ワーカー）:
+    uvicorn asgi:application --host 0.0.0.0 --port 5001
+"""
+import os
+from app.app import create_app
+from app.asgi import create_asgi_app
+
+# 環境設定
+config_name = os.environ.get('FLASK_ENV', 'development')
+
+application = create_asgi_app(create_app(config_name))
@@ -0,0 +1,73 @@
+"""
+レスポンス圧縮のベンチマーク
+タスク一覧・エクスポートの転送量とレイテンシをエンコーディングごとに比較
+
+使い方（task_manager_api ディレクトリで実行）:
+    python -m benchmarks.compression --tasks 500 --runs 20
+"""
+import argparse
+import statistics
+import time
+
+from app.app import create_app
+from app.database import db
+from app.utils.compression import ENCODINGS
+
+DESCRIPTION = '会議資料の作成と関係部署への共有。前回の議事録を確認し、未対応の課題を洗い出す。'
+
+
+def seed(client, count):
+    """ベンチマーク用のユーザーとタスクを作成し、認証ヘッダーを返す"""
+    user = {'username': 'bench_user', 'email': 'bench@example.com', 'password': 'bench_password'}
+    client.post('/api/auth/register', json=user)
+    token = client.post('/api/auth/login', json=user).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    operations = [
+        {'op': 'create', 'data': {'title': f'ベンチマークタスク{i}', 'description': DESCRIPTION * 3, 'priority': 'high'}}
+        for i in range(count)
+    ]
+    for start in range(0, count, 500):
+        client.post('/api/tasks/batch', json={'operations': operations[start:start + 500]}, headers=headers)
+    return headers
+
+
+def measure(client, path, headers, runs):
+    """(レスポンスのバイト数, レイテンシの中央値ms) を計測"""
+    timings = []
+    size = 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        response = client.get(path, headers=headers)
+        size = len(response.get_data())
+        timings.append((time.perf_counter() - started) * 1000)
+    return size, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='レスポンス圧縮の転送量とレイテンシを比較します')
+    parser.add_argument('--tasks', type=int, default=500, help='作成するタスク数')
+    parser.add_argument('--runs', type=int, default=20, help='各条件の計測回数')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    with app.app_context():
+        client = app.test_client()
+        headers = seed(client, args.tasks)
+
+        paths = ['/api/tasks/', '/api/tasks/?fields=compact', '/api/tasks/export?format=ndjson']
+        print(f'タスク数: {args.tasks}  計測回数: {args.runs}')
+        print(f'{"パス":<36}{"エンコーディング":<12}{"バイト数":>12}{"圧縮率":>8}{"中央値(ms)":>12}')
+        for path in paths:
+            # ETag による 304 を避けるため If-None-Match は付けない
+            plain_size, plain_ms = measure(client, path, headers, args.runs)
+            print(f'{path:<36}{"identity":<12}{plain_size:>12}{"100%":>8}{plain_ms:>12.2f}')
+            for encoding in ENCODINGS:
+                size, ms = measure(client, path, {**headers, 'Accept-Encoding': encoding}, args.runs)
+                print(f'{"":<36}{encoding:<12}{size:>12}{size / plain_size:>8.0%}{ms:>12.2f}')
+
+        db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+SQLite ストレージ設定のベンチマーク
+PRAGMA なし（ロールバックジャーナル、ロック待ちはドライバの既定値）と Config.SQLITE_PRAGMAS（WAL など）で読み書き混在のスループットを比較
+
+使い方（task_manager_api ディレクトリで実行）:
+    python -m benchmarks.storage --threads 8 --seconds 5 --write-ratio 0.2
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.exc import OperationalError
+
+from app.config import Config
+from app.database import db, register_sqlite_pragmas
+from app.models import Category, Task, User
+
+USERS = 20
+TASKS_PER_USER = 200
+
+
+def create_database(path, pragmas):
+    """ベンチマーク用のデータベースを作成してエンジンを返す"""
+    # ロック待ちは変更前のアプリケーションと同じドライバの既定値（pysqlite の timeout=5秒）で比較する
+    engine = create_engine(f'sqlite:///{path}', connect_args={'check_same_thread': False})
+    register_sqlite_pragmas(engine, pragmas)
+    # foreign_keys=ON の設定では tasks が参照する categories も必要
+    db.metadata.create_all(engine, tables=[User.__table__, Category.__table__, Task.__table__])
+
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [
+            {'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': '-', 'created_at': now, 'is_active': True}
+            for i in range(1, USERS + 1)
+        ])
+        conn.execute(insert(Task.__table__), [
+            {'title': f'タスク{n}', 'description': '', 'status': 'pending', 'priority': 'medium',
+             'user_id': user_id, 'created_at': now, 'updated_at': now}
+            for user_id in range(1, USERS + 1) for n in range(TASKS_PER_USER)
+        ])
+    return engine
+
+
+def worker(engine, deadline, write_ratio, counts, lock):
+    """読み込み（一覧）と書き込み（作成・更新）をランダムに繰り返す"""
+    tasks = Task.__table__
+    rng = random.Random()
+    reads = writes = errors = 0
+    while time.perf_counter() < deadline:
+        user_id = rng.randint(1, USERS)
+        try:
+            if rng.random() < write_ratio:
+                now = datetime.utcnow()
+                with engine.begin() as conn:
+                    conn.execute(insert(tasks).values(
+                        title='追加タスク', description='', status='pending', priority='high',
+                        user_id=user_id, created_at=now, updated_at=now
+                    ))
+                    conn.execute(update(tasks).where(tasks.c.id == rng.randint(1, USERS * TASKS_PER_USER)).values(updated_at=now))
+                writes += 1
+            else:
+                with engine.connect() as conn:
+                    conn.execute(
+                        select(tasks).where(tasks.c.user_id == user_id).order_by(tasks.c.created_at.desc()).limit(50)
+                    ).fetchall()
+                reads += 1
+        except OperationalError:
+            # database is locked
+            errors += 1
+    with lock:
+        counts['reads'] += reads
+        counts['writes'] += writes
+        counts['errors'] += errors
+
+
+def run(pragmas, threads, seconds, write_ratio):
+    """1つの設定で計測し、(読み込み/秒, 書き込み/秒, エラー数) を返す"""
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    engine = create_database(path, pragmas)
+    try:
+        counts = {'reads': 0, 'writes': 0, 'errors': 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+        workers = [
+            threading.Thread(target=worker, args=(engine, deadline, write_ratio, counts, lock))
+            for _ in range(threads)
+        ]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return counts['reads'] / seconds, counts['writes'] / seconds, counts['errors']
+    finally:
+        engine.dispose()
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite の PRAGMA 設定ごとに読み書き混在のスループットを比較します')
+    parser.add_argument('--threads', type=int, default=8, help='同時実行スレッド数')
+    parser.add_argument('--seconds', type=float, default=5, help='各設定の計測時間（秒）')
+    parser.add_argument('--write-ratio', type=float, default=0.2, help='書き込みの割合（0〜1）')
+    args = parser.parse_args()
+
+    profiles = [('PRAGMA なし', {}), ('Config.SQLITE_PRAGMAS', Config.SQLITE_PRAGMAS)]
+    print(f'スレッド数: {args.threads}  計測時間: {args.seconds}秒  書き込み割合: {args.write_ratio:.0%}')
+    print(f'{"設定":<24}{"読み込み/秒":>14}{"書き込み/秒":>14}{"ロックエラー":>14}')
+    for name, pragmas in profiles:
+        reads, writes, errors = run(pragmas, args.threads, args.seconds, args.write_ratio)
+        print(f'{name:<24}{reads:>14.0f}{writes:>14.0f}{errors:>14}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+タスク一括インポートスクリプト
+NDJSON / CSV ファイルからタスクを取り込む
+"""
+import argparse
+import json
+import os
+import sys
+from app.app import create_app
+from app.models import User
+from app.utils.importer import IMPORT_FORMATS, ImportAborted, TaskImporter
+
+
+def main():
+    parser = argparse.ArgumentParser(description='NDJSON / CSV ファイルからタスクを一括インポートします')
+    parser.add_argument('file', help='インポートするファイル（- で標準入力）')
+    parser.add_argument('--user', required=True, help='取り込み先のユーザー名')
+    parser.add_argument('--format', choices=IMPORT_FORMATS, help='ファイル形式（省略時は拡張子から判定）')
+    parser.add_argument('--create-categories', action='store_true', help='存在しないカテゴリ名を自動作成する')
+    args = parser.parse_args()
+    
+    import_format = args.format or ('csv' if args.file.lower().endswith('.csv') else 'ndjson')
+    
+    # 環境設定
+    config_name = os.environ.get('FLASK_ENV', 'development')
+    app = create_app(config_name)
+    
+    with app.app_context():
+        user = User.query.filter_by(username=args.user).first()
+        if not user:
+            print(f'ユーザーが見つかりません: {args.user}', file=sys.stderr)
+            return 1
+        
+        importer = TaskImporter(user.id, create_categories=args.create_categories)
+        try:
+            if args.file == '-':
+                summary = importer.run(sys.stdin.buffer, import_format)
+            else:
+                with open(args.file, 'rb') as stream:
+                    summary = importer.run(stream, import_format)
+        except ImportAborted as e:
+            # 中止までにコミットした件数も出力する
+            print(json.dumps({'error': e.message, **e.summary}, ensure_ascii=False, indent=2))
+            return 1
+    
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 0 if summary['rejected'] == 0 else 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,6 @@
 """
 メインエントリーポイント
-開発サーバーの起動
+開発サーバー、または本番用のマルチプロセスサーバーの起動
 """
 import os
 from app.app import create_app
@@ -9,12 +9,17 @@ if __name__ == '__main__':
     # 環境設定
     config_name = os.environ.get('FLASK_ENV', 'development')
     
-    # アプリケーション作成
+    # アプリケーション作成（本番ではワーカーの fork 前に読み込む）
     app = create_app(config_name)
     
-    # 開発サーバー起動
-    app.run(
-        host='0.0.0.0',
-        port=int(os.environ.get('PORT', 5001)),
-        debug=True if config_name == 'development' else False
-    )
\ No newline at end of file
+    if config_name == 'production':
+        # 本番用サーバー起動（WEB_CONCURRENCY プロセス × WEB_THREADS スレッド）
+        from app.server import serve
+        serve(app)
+    else:
+        # 開発サーバー起動
+        app.run(
+            host=app.config['SERVER_HOST'],
+            port=app.config['SERVER_PORT'],
+            debug=True if config_name == 'development' else False
+        )
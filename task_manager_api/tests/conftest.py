@@ -5,6 +5,8 @@ Pytestの設定ファイル
 import pytest
 import tempfile
 import os
+from contextlib import contextmanager
+from sqlalchemy import event
 from app.app import create_app
 from app.database import db
 
@@ -31,6 +33,26 @@ def app():
     os.unlink(db_path)
 
 
+@pytest.fixture
+def record_queries(app):
+    """実行されたSQL文（文・パラメータ）を記録するコンテキストマネージャ"""
+    @contextmanager
+    def recorder():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    return recorder
+
+
 @pytest.fixture
 def client(app):
     """テストクライアント"""
@@ -0,0 +1,250 @@
+"""
+ASGI エントリーポイントのテスト
+参照エンドポイントのコルーチン版が同期のブループリントと同じレスポンスを返すことのテスト
+（aiosqlite / greenlet / asgiref が未インストールの場合はスキップ）
+"""
+import asyncio
+import gzip
+import json
+
+import pytest
+from werkzeug.datastructures import Headers
+
+pytest.importorskip('aiosqlite')
+pytest.importorskip('greenlet')
+pytest.importorskip('asgiref')
+
+from app.app import create_app  # noqa: E402
+from app.asgi import create_asgi_app  # noqa: E402
+from app.config import TestingConfig  # noqa: E402
+from app.database import db  # noqa: E402
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    """ファイルの SQLite を使うアプリケーション（非同期エンジンが作られる）"""
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "asgi.db"}')
+    app = create_app('testing')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        app.extensions['read_engine'].dispose()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def asgi_app(file_app):
+    application = create_asgi_app(file_app)
+    yield application
+    asyncio.run(application.engine.dispose())
+
+
+@pytest.fixture
+def file_client(file_app):
+    return file_app.test_client()
+
+
+@pytest.fixture
+def file_headers(file_client):
+    user = {"username": "asgi_user", "email": "asgi@example.com", "password": "password123"}
+    file_client.post('/api/auth/register', json=user)
+    token = file_client.post('/api/auth/login', json=user).get_json()['access_token']
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def sample_tasks(file_client, file_headers):
+    category = file_client.post('/api/categories/', json={"name": "非同期"}, headers=file_headers).get_json()['category']
+    for i in range(5):
+        file_client.post('/api/tasks/', json={
+            "title": f"非同期タスク{i}",
+            "priority": "high" if i % 2 else "low",
+            "category_id": category['id']
+        }, headers=file_headers)
+    return category
+
+
+async def call(application, path, headers=None, method='GET', body=b'', until=None):
+    """
+    ASGI アプリケーションを呼び出して (ステータス, ヘッダー, 本文) を返す
+
+    until を指定した場合は本文にその文字列が届いた時点で切断する（SSE 用）。
+    """
+    path, _, query = path.partition('?')
+    headers = {**(headers or {}), 'Content-Length': str(len(body))} if body else headers
+    scope = {
+        'type': 'http',
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'root_path': '',
+        'query_string': query.encode('ascii'),
+        'headers': [(key.lower().encode('latin-1'), value.encode('latin-1')) for key, value in (headers or {}).items()],
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 50000),
+    }
+    messages = []
+    disconnected = asyncio.Event()
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        messages.append(message)
+        if until is not None and until.encode('utf-8') in b''.join(m.get('body', b'') for m in messages[1:]):
+            disconnected.set()
+
+    await asyncio.wait_for(application(scope, receive, send), timeout=10)
+    start = messages[0]
+    response_headers = Headers([(key.decode('latin-1'), value.decode('latin-1')) for key, value in start['headers']])
+    return start['status'], response_headers, b''.join(m.get('body', b'') for m in messages[1:])
+
+
+def get(application, path, headers=None, **kwargs):
+    return asyncio.run(call(application, path, headers, **kwargs))
+
+
+class TestAsyncReads:
+    """コルーチンで処理する参照エンドポイントのテストクラス"""
+
+    @pytest.mark.parametrize('path', [
+        '/api/tasks/',
+        '/api/tasks/?limit=2&include_total=true',
+        '/api/tasks/?priority=high&fields=id,title,category_name',
+        '/api/tasks/1',
+        '/api/tasks/999',
+        '/api/tasks/?limit=abc',
+        '/api/categories/',
+        '/api/categories/?fields=name',
+    ])
+    def test_same_response_as_blueprint(self, asgi_app, file_client, file_headers, sample_tasks, path):
+        """同期のブループリントと同じステータス・本文・ETag を返す"""
+        status, headers, body = get(asgi_app, path, file_headers)
+        expected = file_client.get(path, headers=file_headers)
+
+        assert status == expected.status_code
+        assert body == expected.data
+        assert headers.get('ETag') == expected.headers.get('ETag')
+
+    def test_cursor_pagination(self, asgi_app, file_headers, sample_tasks):
+        """next_cursor で続きのページを取得できる"""
+        first = json.loads(get(asgi_app, '/api/tasks/?limit=3', file_headers)[2])
+        second = json.loads(get(asgi_app, f'/api/tasks/?limit=3&cursor={first["next_cursor"]}', file_headers)[2])
+
+        ids = [task['id'] for task in first['tasks'] + second['tasks']]
+        assert ids == [5, 4, 3, 2, 1]
+        assert second['next_cursor'] is None
+
+    def test_not_modified(self, asgi_app, file_client, file_headers, sample_tasks):
+        """If-None-Match が一致すれば 304、更新後は新しい ETag"""
+        _, headers, _ = get(asgi_app, '/api/tasks/', file_headers)
+        etag = headers['ETag']
+
+        status, _, body = get(asgi_app, '/api/tasks/', {**file_headers, 'If-None-Match': etag})
+        assert (status, body) == (304, b'')
+
+        file_client.put('/api/tasks/1', json={"status": "completed"}, headers=file_headers)
+        status, headers, _ = get(asgi_app, '/api/tasks/', {**file_headers, 'If-None-Match': etag})
+        assert status == 200
+        assert headers['ETag'] != etag
+
+    def test_requires_auth(self, asgi_app, file_client):
+        """トークンなしは Flask と同じエラーレスポンス"""
+        status, _, body = get(asgi_app, '/api/tasks/')
+        expected = file_client.get('/api/tasks/')
+        assert (status, body) == (expected.status_code, expected.data)
+
+    def test_export_stream_compressed(self, asgi_app, file_client, file_headers, sample_tasks):
+        """エクスポートはストリーミングで、Accept-Encoding に応じてチャンクごとに圧縮される"""
+        status, headers, body = get(asgi_app, '/api/tasks/export?format=csv', {**file_headers, 'Accept-Encoding': 'gzip'})
+        expected = file_client.get('/api/tasks/export?format=csv', headers=file_headers)
+
+        assert status == 200
+        assert headers['Content-Encoding'] == 'gzip'
+        assert headers['Content-Type'] == expected.headers['Content-Type']
+        assert gzip.decompress(body) == expected.data
+
+    def test_other_requests_delegated(self, asgi_app, file_headers):
+        """書き込みや対象外の GET は Flask アプリケーションで処理される"""
+        status, _, body = get(asgi_app, '/api/tasks/', {**file_headers, 'Content-Type': 'application/json'},
+                              method='POST', body=json.dumps({"title": "ASGI から作成"}).encode('utf-8'))
+        assert status == 201
+
+        status, _, body = get(asgi_app, '/api/tasks/stats', file_headers)
+        assert status == 200
+        assert json.loads(body)['stats']['total_tasks'] == 1
+
+    def test_single_worker(self, file_app, tmp_path):
+        """2つ目のワーカーは起動に失敗し、1つ目の停止後は起動できる"""
+        first, second = create_asgi_app(file_app), create_asgi_app(file_app)
+        first.lock_path = second.lock_path = str(tmp_path / 'asgi.lock')
+
+        async def startup(application):
+            messages = iter([{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}])
+            sent = []
+
+            async def receive():
+                return next(messages)
+
+            async def send(message):
+                sent.append(message['type'])
+
+            await application({'type': 'lifespan'}, receive, send)
+            return sent
+
+        first.acquire_worker_lock()
+        assert asyncio.run(startup(second)) == ['lifespan.startup.failed']
+        first.release_worker_lock()
+        assert asyncio.run(startup(second)) == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+        asyncio.run(first.engine.dispose())
+
+    def test_memory_database_delegates_everything(self, app, client, auth_headers):
+        """インメモリ SQLite では非同期エンジンを作らず、すべて Flask で処理する"""
+        application = create_asgi_app(app)
+        assert application.engine is None
+
+        status, _, body = get(application, '/api/tasks/', auth_headers)
+        assert status == 200
+        assert body == client.get('/api/tasks/', headers=auth_headers).data
+
+
+class TestAsyncEvents:
+    """コルーチンで処理する SSE のテストクラス"""
+
+    def test_stream_events(self, asgi_app, file_app, file_client, file_headers):
+        """待機中の購読者に自分宛てのイベントだけが届き、切断で購読が解除される"""
+        hub = file_app.extensions['event_hub']
+        user_id = file_client.get('/api/auth/me', headers=file_headers).get_json()['user']['id']
+
+        async def scenario():
+            stream = asyncio.ensure_future(call(asgi_app, '/api/events', file_headers, until='task.created'))
+            while hub.subscriber_count() == 0:
+                await asyncio.sleep(0.01)
+            hub.publish(user_id + 1, 'task.deleted', {'id': 1})
+            hub.publish(user_id, 'task.created', {'id': 2})
+            return await stream
+
+        status, headers, body = asyncio.run(scenario())
+        assert status == 200
+        assert headers['Content-Type'].startswith('text/event-stream')
+        assert 'event: task.created' in body.decode('utf-8')
+        assert 'task.deleted' not in body.decode('utf-8')
+        assert hub.subscriber_count() == 0
+
+    def test_stream_token(self, asgi_app, file_client, file_headers):
+        """ストリーム用トークンで接続でき、アクセストークンは URL では受け付けない"""
+        token = file_client.post('/api/events/token', headers=file_headers).get_json()['token']
+        status, _, body = get(asgi_app, f'/api/events?token={token}', until='connected')
+        assert status == 200
+        assert body.decode('utf-8').startswith('retry: ')
+
+        access_token = file_headers['Authorization'].split(' ', 1)[1]
+        status, _, _ = get(asgi_app, f'/api/events?jwt={access_token}')
+        assert status == 401
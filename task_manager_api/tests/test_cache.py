@@ -0,0 +1,184 @@
+"""
+参照キャッシュのテスト
+LRU + TTL キャッシュ単体と、ユーザー情報・カテゴリ所有確認での利用のテスト
+"""
+from app.utils.cache import TTLCache
+
+
+class FakeClock:
+    """テスト用の時計"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    """TTLCache のテストクラス"""
+
+    def test_lru_eviction(self):
+        """上限を超えると最も長く参照されていないエントリから破棄する"""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        assert cache.get('a') == 1
+        cache.set('c', 3)
+
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert cache.stats() == {
+            'size': 2, 'maxsize': 2, 'hits': 3, 'misses': 1, 'evictions': 1, 'hit_rate': 0.75
+        }
+
+    def test_ttl_expiry(self):
+        """有効期間を過ぎたエントリはミスになり、None は登録しない"""
+        clock = FakeClock()
+        cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+        loads = []
+        loader = lambda: loads.append(1) or 'value'
+
+        assert cache.get_or_load('key', loader) == 'value'
+        assert cache.get_or_load('key', loader) == 'value'
+        clock.now = 5
+        assert cache.get_or_load('key', loader) == 'value'
+        assert len(loads) == 2
+
+        assert cache.get_or_load('none', lambda: None) is None
+        assert cache.stats()['size'] == 1
+
+
+class TestLookupCache:
+    """ユーザー情報・カテゴリ所有確認のキャッシュのテストクラス"""
+
+    def test_me_uses_cache(self, client, auth_headers, record_queries):
+        """2回目以降の /me はデータベースに問い合わせない"""
+        first = client.get('/api/auth/me', headers=auth_headers)
+        with record_queries() as statements:
+            second = client.get('/api/auth/me', headers=auth_headers)
+
+        assert second.status_code == 200
+        assert second.get_json() == first.get_json()
+        assert not any('FROM users' in statement for statement, _ in statements)
+
+    def test_category_ownership_invalidated_on_write(self, client, auth_headers, record_queries):
+        """カテゴリの作成・削除でキャッシュが破棄され、所有確認に反映される"""
+        category_id = client.post('/api/categories/', json={"name": "仕事"}, headers=auth_headers).get_json()['category']['id']
+        assert client.post('/api/tasks/', json={"title": "A", "category_id": category_id}, headers=auth_headers).status_code == 201
+
+        with record_queries() as statements:
+            response = client.post('/api/tasks/', json={"title": "B", "category_id": category_id}, headers=auth_headers)
+        assert response.status_code == 201
+        # レスポンスのカテゴリ名の取得のみで、所有確認のクエリは発行しない
+        assert not any('WHERE categories.user_id' in statement for statement, _ in statements)
+
+        other_id = client.post('/api/categories/', json={"name": "私用"}, headers=auth_headers).get_json()['category']['id']
+        response = client.post('/api/tasks/batch', json={"operations": [
+            {"op": "create", "data": {"title": "C", "category_id": other_id}}
+        ]}, headers=auth_headers)
+        assert response.get_json()['results'][0]['status'] == 201
+
+        assert client.delete(f'/api/categories/{other_id}', headers=auth_headers).status_code == 409
+        task_id = response.get_json()['results'][0]['task']['id']
+        client.delete(f'/api/tasks/{task_id}', headers=auth_headers)
+        assert client.delete(f'/api/categories/{other_id}', headers=auth_headers).status_code == 200
+        response = client.post('/api/tasks/', json={"title": "D", "category_id": other_id}, headers=auth_headers)
+        assert response.status_code == 404
+
+    def test_category_created_by_other_process(self, client, auth_headers):
+        """他のプロセスで作成されたカテゴリ（このプロセスのキャッシュは破棄されない）も指定できる"""
+        from app.database import db
+        from app.models import Category
+
+        client.post('/api/tasks/', json={"title": "キャッシュ作成"}, headers=auth_headers)
+        user_id = client.get('/api/auth/me', headers=auth_headers).get_json()['user']['id']
+        assert client.post('/api/tasks/', json={"title": "A", "category_id": 1}, headers=auth_headers).status_code == 404
+
+        category = Category(name="別プロセス", user_id=user_id)
+        db.session.add(category)
+        db.session.commit()
+
+        response = client.post('/api/tasks/', json={"title": "B", "category_id": category.id}, headers=auth_headers)
+        assert response.status_code == 201
+        response = client.post('/api/tasks/batch', json={"operations": [
+            {"op": "create", "data": {"title": "C", "category_id": category.id}}
+        ]}, headers=auth_headers)
+        assert response.get_json()['results'][0]['status'] == 201
+
+    def test_category_deleted_by_other_process(self, client, auth_headers, sample_category):
+        """他のプロセスで削除されたカテゴリはキャッシュ上は所有のままでも、書き込み時の確認で書き込まれない"""
+        from app.database import db
+        from app.models import Category, Task
+
+        category_id = sample_category['id']
+        task_id = client.post('/api/tasks/', json={"title": "A", "category_id": category_id}, headers=auth_headers).get_json()['task']['id']
+        client.put(f'/api/tasks/{task_id}', json={"category_id": None}, headers=auth_headers)
+        db.session.delete(db.session.get(Category, category_id))
+        db.session.commit()
+
+        response = client.post('/api/tasks/batch', json={"operations": [
+            {"op": "create", "data": {"title": "B", "category_id": category_id}}
+        ]}, headers=auth_headers)
+        assert response.status_code == 404
+        response = client.put(f'/api/tasks/{task_id}', json={"category_id": category_id}, headers=auth_headers)
+        assert response.status_code == 404
+        assert not Task.query.filter_by(category_id=category_id).count()
+
+        # キャッシュは破棄済みで、以降は書き込みの前に拒否される
+        response = client.post('/api/tasks/', json={"title": "C", "category_id": category_id}, headers=auth_headers)
+        assert response.status_code == 404
+        assert Task.query.count() == 1
+
+    def test_category_id_reused_by_other_user(self, client, auth_headers, sample_category):
+        """キャッシュに残った ID が他のプロセスで別のユーザーのカテゴリになっていても書き込まれない"""
+        from app.database import db
+        from app.models import Category, Task
+
+        category_id = sample_category['id']
+        assert client.post('/api/tasks/', json={"title": "A", "category_id": category_id}, headers=auth_headers).status_code == 201
+        Task.query.delete()
+        db.session.delete(db.session.get(Category, category_id))
+        db.session.commit()
+
+        # ID を再利用するデータベース（sqlite_autoincrement 導入前に作成したもの）を想定して同じ ID で作成
+        user = {"username": "other", "email": "other@example.com", "password": "password123"}
+        client.post('/api/auth/register', json=user)
+        other_id = client.post('/api/auth/login', json=user).get_json()['user']['id']
+        db.session.add(Category(id=category_id, name="他人の非公開カテゴリ", user_id=other_id))
+        db.session.commit()
+
+        response = client.post('/api/tasks/', json={"title": "B", "category_id": category_id}, headers=auth_headers)
+        assert response.status_code == 404
+        response = client.post('/api/tasks/batch', json={"operations": [
+            {"op": "create", "data": {"title": "C", "category_id": category_id}}
+        ]}, headers=auth_headers)
+        assert response.get_json()['results'][0]['status'] == 404
+        assert Task.query.count() == 0
+
+    def test_category_ids_not_reused(self, client, auth_headers, sample_category):
+        """削除したカテゴリの ID は再利用されない"""
+        client.delete(f'/api/categories/{sample_category["id"]}', headers=auth_headers)
+        response = client.post('/api/categories/', json={"name": "次のカテゴリ"}, headers=auth_headers)
+        assert response.get_json()['category']['id'] > sample_category['id']
+
+    def test_other_users_category_rejected(self, client, auth_headers, sample_category):
+        """他のユーザーのカテゴリは指定できない"""
+        user = {"username": "other", "email": "other@example.com", "password": "password123"}
+        client.post('/api/auth/register', json=user)
+        token = client.post('/api/auth/login', json=user).get_json()['access_token']
+
+        response = client.post('/api/tasks/', json={"title": "X", "category_id": sample_category['id']},
+                               headers={'Authorization': f'Bearer {token}'})
+        assert response.status_code == 404
+
+    def test_health_exposes_stats(self, client, auth_headers):
+        """ヒット・ミス件数を /health で確認できる"""
+        client.get('/api/auth/me', headers=auth_headers)
+        client.get('/api/auth/me', headers=auth_headers)
+
+        stats = client.get('/health').get_json()['cache']
+        assert stats['users']['hits'] >= 1
+        assert stats['users']['misses'] >= 1
+        assert set(stats) == {'users', 'category_ids'}
@@ -68,6 +68,50 @@ class TestCategories:
         data = response.get_json()
         assert len(data['categories']) >= 3  # 初期データも含む
 
+    def test_get_categories_task_counts(self, client, auth_headers, record_queries):
+        """カテゴリ一覧のタスク件数を1クエリで集計"""
+        response = client.post('/api/categories/', json={"name": "件数カテゴリ"}, headers=auth_headers)
+        category_id = response.get_json()['category']['id']
+        
+        tasks = [
+            {"title": "件数タスク1", "category_id": category_id},
+            {"title": "件数タスク2", "category_id": category_id, "status": "completed"},
+            {"title": "カテゴリなしタスク"}
+        ]
+        for task_data in tasks:
+            client.post('/api/tasks/', json=task_data, headers=auth_headers)
+        client.post('/api/categories/', json={"name": "空カテゴリ"}, headers=auth_headers)
+        
+        with record_queries() as statements:
+            response = client.get('/api/categories/', headers=auth_headers)
+        assert response.status_code == 200
+        # データバージョンの参照とカテゴリ一覧の1クエリ
+        assert len(statements) == 2
+        
+        categories = {category['name']: category for category in response.get_json()['categories']}
+        assert categories['件数カテゴリ']['task_count'] == 2
+        assert categories['件数カテゴリ']['status_counts']['pending'] == 1
+        assert categories['件数カテゴリ']['status_counts']['completed'] == 1
+        assert categories['空カテゴリ']['task_count'] == 0
+        assert categories['空カテゴリ']['status_counts']['pending'] == 0
+
+    def test_get_categories_sparse_fields(self, client, auth_headers, sample_category, record_queries):
+        """件数を含まない fields では集計しない"""
+        client.post('/api/tasks/', json={"title": "件数タスク", "category_id": sample_category['id']}, headers=auth_headers)
+        
+        with record_queries() as statements:
+            response = client.get('/api/categories/?fields=id,name', headers=auth_headers)
+        assert response.get_json()['categories'] == [{'id': sample_category['id'], 'name': 'テストカテゴリ'}]
+        select_sql = statements[-1][0]
+        assert 'tasks' not in select_sql
+        assert 'categories.description' not in select_sql
+        
+        response = client.get('/api/categories/?fields=name,task_count', headers=auth_headers)
+        assert response.get_json()['categories'] == [{'name': 'テストカテゴリ', 'task_count': 1}]
+        
+        response = client.get('/api/categories/?fields=secret', headers=auth_headers)
+        assert response.status_code == 400
+
     def test_update_category_success(self, client, auth_headers, sample_category):
         """カテゴリ更新の正常ケース"""
         category_id = sample_category['id']
@@ -133,4 +177,33 @@ class TestCategories:
         data = response.get_json()
         assert data['category']['id'] == category_id
         assert len(data['tasks']) == 2
-        assert all(task['category_id'] == category_id for task in data['tasks'])
\ No newline at end of file
+        assert all(task['category_id'] == category_id for task in data['tasks'])
+
+    def test_get_category_tasks_paginated(self, client, auth_headers, sample_category):
+        """特定カテゴリのタスク一覧のページング"""
+        category_id = sample_category['id']
+        
+        for i in range(3):
+            client.post('/api/tasks/', json={"title": f"カテゴリページ{i}", "category_id": category_id}, headers=auth_headers)
+        
+        response = client.get(f'/api/categories/{category_id}/tasks?limit=2', headers=auth_headers)
+        data = response.get_json()
+        assert len(data['tasks']) == 2
+        assert data['next_cursor']
+        
+        response = client.get(f'/api/categories/{category_id}/tasks?limit=2&cursor={data["next_cursor"]}', headers=auth_headers)
+        data = response.get_json()
+        assert [task['title'] for task in data['tasks']] == ['カテゴリページ0']
+        assert data['next_cursor'] is None
+
+    def test_get_categories_etag_after_category_write(self, client, auth_headers, sample_category):
+        """カテゴリ更新で ETag が変わる"""
+        response = client.get('/api/categories/', headers=auth_headers)
+        etag = response.headers['ETag']
+        
+        response = client.get('/api/categories/', headers={**auth_headers, 'If-None-Match': etag})
+        assert response.status_code == 304
+        
+        client.put(f'/api/categories/{sample_category["id"]}', json={"color": "#00ff00"}, headers=auth_headers)
+        response = client.get('/api/categories/', headers={**auth_headers, 'If-None-Match': etag})
+        assert response.status_code == 200
@@ -0,0 +1,63 @@
+"""
+レスポンス圧縮のテスト
+Accept-Encoding によるネゴシエーション・しきい値・ストリーミングのテスト
+"""
+import gzip
+import json
+import zlib
+
+
+class TestCompression:
+    """レスポンス圧縮のテストクラス"""
+
+    def create_tasks(self, client, auth_headers, count=20):
+        for i in range(count):
+            client.post('/api/tasks/', json={"title": f"圧縮タスク{i}", "description": "長い説明文です。" * 20}, headers=auth_headers)
+
+    def test_gzip_above_threshold(self, client, auth_headers):
+        """しきい値以上のレスポンスは gzip で圧縮される"""
+        self.create_tasks(client, auth_headers)
+        plain = client.get('/api/tasks/', headers=auth_headers)
+        response = client.get('/api/tasks/', headers={**auth_headers, 'Accept-Encoding': 'gzip, deflate'})
+        
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert int(response.headers['Content-Length']) < len(plain.get_data()) / 4
+        assert json.loads(gzip.decompress(response.get_data())) == plain.get_json()
+
+    def test_deflate_and_quality_values(self, client, auth_headers):
+        """品質値に従って deflate（zlib 形式）を選ぶ"""
+        self.create_tasks(client, auth_headers)
+        response = client.get('/api/tasks/', headers={**auth_headers, 'Accept-Encoding': 'gzip;q=0.5, deflate'})
+        
+        assert response.headers['Content-Encoding'] == 'deflate'
+        assert len(json.loads(zlib.decompress(response.get_data()))['tasks']) == 20
+
+    def test_small_or_unaccepted_not_compressed(self, client, auth_headers):
+        """しきい値未満・Accept-Encoding なしは圧縮しない"""
+        response = client.get('/health', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+        
+        self.create_tasks(client, auth_headers)
+        response = client.get('/api/tasks/', headers={**auth_headers, 'Accept-Encoding': 'identity'})
+        assert 'Content-Encoding' not in response.headers
+
+    def test_weak_etag_revalidation(self, client, auth_headers):
+        """圧縮したレスポンスは弱い ETag で、条件付き GET は 304 になる"""
+        self.create_tasks(client, auth_headers)
+        headers = {**auth_headers, 'Accept-Encoding': 'gzip'}
+        response = client.get('/api/tasks/', headers=headers)
+        assert response.headers['ETag'].startswith('W/')
+        
+        response = client.get('/api/tasks/', headers={**headers, 'If-None-Match': response.headers['ETag']})
+        assert response.status_code == 304
+
+    def test_streaming_export_compressed(self, client, auth_headers):
+        """ストリーミングのエクスポートもチャンクごとに圧縮される"""
+        self.create_tasks(client, auth_headers)
+        response = client.get('/api/tasks/export?format=ndjson', headers={**auth_headers, 'Accept-Encoding': 'gzip'})
+        
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Content-Length' not in response.headers
+        lines = gzip.decompress(response.get_data()).decode('utf-8').splitlines()
+        assert len(lines) == 20
@@ -0,0 +1,186 @@
+"""
+イベント配信機能のテスト
+イベントハブと /api/events（Server-Sent Events）のテスト
+"""
+import asyncio
+import json
+import threading
+from datetime import timedelta
+
+from app.utils.events import EventHub, RESET_EVENT, aiter_sse
+
+
+def parse_message(chunk):
+    """SSE メッセージを {フィールド: 値} に変換"""
+    fields = {}
+    for line in chunk.strip().split('\n'):
+        if line.startswith(':'):
+            fields.setdefault('comment', line[1:].strip())
+            continue
+        name, _, value = line.partition(': ')
+        fields[name] = value
+    if 'data' in fields:
+        fields['data'] = json.loads(fields['data'])
+    return fields
+
+
+class TestEventHub:
+    """イベントハブのテストクラス"""
+
+    def test_publish_to_own_subscribers(self):
+        """同じユーザーの購読者にだけ配信される"""
+        hub = EventHub()
+        mine = hub.subscribe(1)
+        other = hub.subscribe(2)
+
+        hub.publish(1, 'task.created', {'id': 10})
+
+        event = mine.get(timeout=0)
+        assert (event.name, event.data) == ('task.created', {'id': 10})
+        assert other.get(timeout=0) is None
+
+    def test_resume_from_last_event_id(self):
+        """Last-Event-ID 以降のイベントが再送される"""
+        hub = EventHub()
+        first = hub.publish(1, 'task.created', {'id': 1})
+        hub.publish(2, 'task.created', {'id': 2})
+        hub.publish(1, 'task.updated', {'id': 1})
+
+        subscription = hub.subscribe(1, hub.event_id(first))
+        event = subscription.get(timeout=0)
+        assert (event.name, event.data) == ('task.updated', {'id': 1})
+        assert subscription.get(timeout=0) is None
+
+    def test_resume_outside_history_resets(self):
+        """履歴から再送できない・他インスタンスの ID は reset になる"""
+        hub = EventHub(history_size=2)
+        first = hub.publish(1, 'task.created', {'id': 1})
+        for i in range(3):
+            hub.publish(1, 'task.updated', {'id': 1})
+
+        assert hub.subscribe(1, hub.event_id(first)).get(timeout=0).name == RESET_EVENT
+        assert hub.subscribe(1, 'unknown-1').get(timeout=0).name == RESET_EVENT
+
+    def test_slow_subscriber_dropped(self):
+        """キューがあふれた購読者は登録解除され、メモリが増え続けない"""
+        hub = EventHub(queue_size=3)
+        subscription = hub.subscribe(1)
+        for i in range(5):
+            hub.publish(1, 'task.created', {'id': i})
+
+        assert subscription.overflowed
+        assert subscription.queue.qsize() == 3
+        assert hub.subscriber_count(1) == 0
+        assert hub.dropped == 1
+
+
+    def test_async_subscriber_woken_from_thread(self):
+        """別スレッドからの発行でコルーチンの購読者が起こされ、終了時に購読が解除される"""
+        hub = EventHub()
+
+        async def receive_one():
+            stream = aiter_sse(hub, hub.subscribe(1), heartbeat=5, retry_ms=1000)
+            assert (await stream.__anext__()).startswith('retry: 1000')
+            threading.Timer(0.05, hub.publish, (1, 'task.created', {'id': 10})).start()
+            message = await asyncio.wait_for(stream.__anext__(), timeout=2)
+            await stream.aclose()
+            return message
+
+        message = parse_message(asyncio.run(receive_one()))
+        assert (message['event'], message['data']) == ('task.created', {'id': 10})
+        assert hub.subscriber_count() == 0
+
+
+class TestEventStream:
+    """/api/events のテストクラス"""
+
+    def open_stream(self, client, path='/api/events', headers=None):
+        response = client.get(path, headers=headers)
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        chunks = (chunk.decode('utf-8') for chunk in response.response)
+        first = next(chunks)
+        assert first.startswith('retry: ')
+        return response, chunks
+
+    def test_requires_auth(self, client):
+        """認証なしは401"""
+        response = client.get('/api/events')
+        assert response.status_code == 401
+
+    def test_stream_task_and_category_events(self, client, auth_headers, app):
+        """作成・更新・削除の通知が届く"""
+        response, chunks = self.open_stream(client, headers=auth_headers)
+
+        task_id = client.post('/api/tasks/', json={"title": "通知タスク"}, headers=auth_headers).get_json()['task']['id']
+        client.put(f'/api/tasks/{task_id}', json={"status": "completed"}, headers=auth_headers)
+        client.delete(f'/api/tasks/{task_id}', headers=auth_headers)
+        category_id = client.post('/api/categories/', json={"name": "通知カテゴリ"}, headers=auth_headers).get_json()['category']['id']
+
+        messages = [parse_message(next(chunks)) for _ in range(4)]
+        assert [message['event'] for message in messages] == [
+            'task.created', 'task.updated', 'task.deleted', 'category.created'
+        ]
+        assert messages[0]['data']['task']['title'] == '通知タスク'
+        assert messages[1]['data']['task']['status'] == 'completed'
+        assert messages[2]['data'] == {'id': task_id}
+        assert messages[3]['data']['id'] == category_id
+
+        response.close()
+        assert app.extensions['event_hub'].subscriber_count() == 0
+
+    def test_stream_batch_events(self, client, auth_headers):
+        """バッチ操作は成功した操作ごとに通知される"""
+        response, chunks = self.open_stream(client, headers=auth_headers)
+
+        client.post('/api/tasks/batch', json={"operations": [
+            {"op": "create", "data": {"title": "バッチ1"}},
+            {"op": "create", "data": {"title": "バッチ2"}},
+        ]}, headers=auth_headers)
+
+        messages = [parse_message(next(chunks)) for _ in range(2)]
+        assert [message['data']['task']['title'] for message in messages] == ['バッチ1', 'バッチ2']
+        response.close()
+
+    def test_stream_token_in_query_and_resume(self, client, auth_headers):
+        """発行したストリーム用トークンをクエリ文字列で渡して接続でき、Last-Event-ID から再開できる"""
+        response = client.post('/api/events/token', headers=auth_headers)
+        assert response.status_code == 200
+        assert response.get_json()['expires_in'] == 60
+        token = response.get_json()['token']
+
+        response, chunks = self.open_stream(client, f'/api/events?token={token}')
+        client.post('/api/tasks/', json={"title": "1件目"}, headers=auth_headers)
+        first = parse_message(next(chunks))
+        response.close()
+
+        client.post('/api/tasks/', json={"title": "2件目"}, headers=auth_headers)
+
+        response, chunks = self.open_stream(client, f'/api/events?token={token}&last_event_id={first["id"]}')
+        resumed = parse_message(next(chunks))
+        assert resumed['data']['task']['title'] == '2件目'
+        response.close()
+
+    def test_access_token_not_accepted_in_query(self, client, auth_headers):
+        """アクセストークンは URL では受け付けず、ストリーム用トークンはアクセストークンとして使えない"""
+        access_token = auth_headers['Authorization'].split(' ', 1)[1]
+        assert client.get(f'/api/events?jwt={access_token}').status_code == 401
+        assert client.get(f'/api/events?token={access_token}').status_code == 401
+
+        stream_token = client.post('/api/events/token', headers=auth_headers).get_json()['token']
+        assert client.get('/api/tasks/', headers={'Authorization': f'Bearer {stream_token}'}).status_code == 422
+
+    def test_expired_stream_token(self, client, auth_headers, app):
+        """有効期間を過ぎたストリーム用トークンは401"""
+        token = client.post('/api/events/token', headers=auth_headers).get_json()['token']
+        app.config['EVENTS_TOKEN_EXPIRES'] = timedelta(seconds=-1)
+        response = client.get(f'/api/events?token={token}')
+        assert response.status_code == 401
+        assert 'msg' in response.get_json()
+
+    def test_heartbeat(self, client, auth_headers, app):
+        """イベントがなければハートビートのコメントを送る"""
+        app.config['EVENTS_HEARTBEAT_SECONDS'] = 0.01
+        response, chunks = self.open_stream(client, headers=auth_headers)
+        assert parse_message(next(chunks)) == {'comment': 'keepalive'}
+        response.close()
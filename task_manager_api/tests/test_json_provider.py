@@ -0,0 +1,72 @@
+"""
+JSONプロバイダーのテスト
+エンコーダの選択・日時の変換・本番設定の出力形式のテスト
+"""
+from datetime import date, datetime
+
+import pytest
+from flask import Flask
+
+from app.utils.json_provider import APIJSONProvider, orjson
+
+
+def make_provider(encoder='auto', sort_keys=True, compact=None, debug=False):
+    app = Flask(__name__)
+    app.debug = debug
+    provider = APIJSONProvider(app, encoder)
+    provider.sort_keys = sort_keys
+    provider.compact = compact
+    app.json = provider
+    return app, provider
+
+
+class TestJSONProvider:
+    """JSONプロバイダーのテストクラス"""
+
+    @pytest.mark.parametrize('encoder', ['auto', 'stdlib'])
+    def test_datetimes_encoded_as_iso8601(self, encoder):
+        """日時・日付は ISO 8601 形式（エンコーダによらず同じ）"""
+        app, provider = make_provider(encoder)
+        data = {
+            'created_at': datetime(2024, 1, 2, 3, 4, 5, 123456),
+            'updated_at': datetime(2024, 1, 2, 3, 4, 5),
+            'due_date': date(2024, 1, 31),
+            'title': '日本語',
+        }
+        assert provider.loads(provider.dumps(data)) == {
+            'created_at': '2024-01-02T03:04:05.123456',
+            'updated_at': '2024-01-02T03:04:05',
+            'due_date': '2024-01-31',
+            'title': '日本語',
+        }
+
+    @pytest.mark.parametrize('encoder', ['auto', 'stdlib'])
+    def test_production_output_not_sorted_or_indented(self, encoder):
+        """本番設定ではキーを並べ替えず整形もしない"""
+        app, provider = make_provider(encoder, sort_keys=False, compact=True, debug=True)
+        with app.app_context():
+            body = provider.response({'b': 1, 'a': [1, 2]}).get_data()
+        assert body == b'{"b":1,"a":[1,2]}\n'
+
+    def test_debug_output_sorted_and_indented(self):
+        """既定ではデバッグ時のみ整形し、キーを並べ替える"""
+        app, provider = make_provider(debug=True)
+        with app.app_context():
+            body = provider.response({'b': 1, 'a': 2}).get_data(as_text=True)
+        assert body.index('"a"') < body.index('"b"')
+        assert '\n  ' in body
+
+    def test_encoder_selection(self):
+        """auto は orjson があれば使い、stdlib は常に標準ライブラリ"""
+        assert make_provider('auto')[1].use_orjson is (orjson is not None)
+        assert make_provider('stdlib')[1].use_orjson is False
+        with pytest.raises(ValueError):
+            make_provider('simdjson')
+
+    def test_app_uses_provider(self, client, auth_headers):
+        """API レスポンスはプロバイダー経由で日時を ISO 8601 で返す"""
+        response = client.post('/api/tasks/', json={"title": "日時", "due_date": "2099-12-31"}, headers=auth_headers)
+        task = response.get_json()['task']
+        assert task['due_date'] == '2099-12-31'
+        assert datetime.fromisoformat(task['created_at'])
+        assert task['completed_at'] is None
@@ -0,0 +1,164 @@
+"""
+ロギング機能のテスト
+キュー経由の書き込み・JSON 形式・サンプリング・ローテーションのテスト
+"""
+import json
+import logging
+import queue
+
+import pytest
+
+from app.app import create_app
+from app.config import TestingConfig
+from app.database import db
+from app.utils.logger import JSONFormatter, LogSampler, NonBlockingQueueHandler, TaskManagerLogger, logger
+
+
+def read_json_lines(path):
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+@pytest.fixture
+def json_app(tmp_path, monkeypatch):
+    """JSON 形式で一時ディレクトリにログを出力するアプリケーション"""
+    monkeypatch.setattr(TestingConfig, 'LOG_DIR', str(tmp_path))
+    monkeypatch.setattr(TestingConfig, 'LOG_FORMAT', 'json')
+    app = create_app('testing')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+    logger.configure()
+
+
+@pytest.fixture
+def json_client(json_app):
+    return json_app.test_client()
+
+
+class TestStructuredLogging:
+    """JSON 形式のリクエストログのテストクラス"""
+
+    def test_request_log_fields(self, json_app, json_client, tmp_path):
+        """リクエストID・ユーザーID・ステータス・処理時間が記録され、リクエストIDはレスポンスにも付く"""
+        user = {"username": "log_user", "email": "log@example.com", "password": "password123"}
+        json_client.post('/api/auth/register', json=user)
+        token = json_client.post('/api/auth/login', json=user).get_json()['access_token']
+        response = json_client.post('/api/tasks/', json={"title": "ログ"}, headers={'Authorization': f'Bearer {token}'})
+        logger.stop()
+
+        entries = [entry for entry in read_json_lines(tmp_path / 'task_manager.log') if entry.get('endpoint') == 'tasks.create_task']
+        assert len(entries) == 1
+        entry = entries[0]
+        assert entry['level'] == 'INFO'
+        assert entry['method'] == 'POST'
+        assert entry['status'] == 201
+        assert entry['latency_ms'] >= 0
+        assert entry['user_id'] == str(response.get_json()['task']['user_id'])
+        assert entry['request_id'] == response.headers['X-Request-ID']
+
+    def test_request_id_propagated(self, json_client):
+        """妥当な X-Request-ID は引き継ぎ、不正な値は新しく発行する"""
+        response = json_client.get('/health', headers={'X-Request-ID': 'abc-123'})
+        assert response.headers['X-Request-ID'] == 'abc-123'
+
+        response = json_client.get('/health', headers={'X-Request-ID': 'bad id!'})
+        assert len(response.headers['X-Request-ID']) == 32
+
+    def test_error_log(self, json_client, tmp_path):
+        """エラーはエラーログにも出力され、サンプリングの対象外"""
+        json_client.post('/api/auth/register', json={"username": "x"})
+        logger.stop()
+
+        entries = read_json_lines(tmp_path / 'errors.log')
+        assert entries[-1]['level'] == 'ERROR'
+        assert entries[-1]['endpoint'] == 'auth.register'
+        assert 'request_id' in entries[-1]
+
+    def test_exception_traceback(self, tmp_path):
+        """例外のトレースバックは exc_info に出力される"""
+        log = TaskManagerLogger('test_exception')
+        log.configure(log_dir=tmp_path, log_format='json')
+        try:
+            raise ValueError('失敗')
+        except ValueError:
+            log.logger.exception('例外が発生しました')
+        log.stop()
+
+        entry = read_json_lines(tmp_path / 'errors.log')[0]
+        assert entry['message'] == '例外が発生しました'
+        assert 'ValueError: 失敗' in entry['exc_info']
+
+
+class TestLogPipeline:
+    """書き込みスレッド・サンプリング・ローテーションのテストクラス"""
+
+    def test_sampling(self, tmp_path):
+        """成功したリクエストはエンドポイント別の割合で間引かれ、エラーは常に出力される"""
+        log = TaskManagerLogger('test_sampling')
+        log.configure(log_dir=tmp_path, log_format='json', sample_rates={'tasks.get_tasks': 0})
+        log.log_api_request('tasks.get_tasks', 'GET', 1, 200, 1.0)
+        log.log_api_request('tasks.get_tasks', 'GET', 1, 404, 1.0)
+        log.log_api_request('tasks.create_task', 'POST', 1, 201, 1.0)
+        log.stop()
+
+        entries = read_json_lines(tmp_path / 'task_manager.log')
+        assert [(entry['endpoint'], entry['status']) for entry in entries] == [
+            ('tasks.get_tasks', 404),
+            ('tasks.create_task', 201),
+        ]
+
+    def test_sampler_rate(self):
+        """エンドポイント別のサンプリング率で判定する"""
+        sampler = LogSampler({'a': 0.25}, rng=iter([0.1, 0.5]).__next__)
+        assert sampler.rate('a') == 0.25
+        assert sampler.rate('b') == 1.0
+        assert sampler.should_log(0.25)
+        assert not sampler.should_log(0.25)
+        assert sampler.should_log(1.0)
+
+    def test_full_queue_drops(self):
+        """キューが満杯でも待たずに破棄して件数を数える"""
+        handler = NonBlockingQueueHandler(queue.Queue(1))
+        record = logging.LogRecord('test', logging.INFO, __file__, 1, 'message %s', ('a',), None)
+        handler.handle(record)
+        handler.handle(record)
+
+        assert handler.queue.qsize() == 1
+        assert handler.dropped == 1
+        assert handler.queue.get_nowait().getMessage() == 'message a'
+
+    def test_size_rotation(self, tmp_path):
+        """サイズ上限を超えるとローテーションされる"""
+        log = TaskManagerLogger('test_rotation')
+        log.configure(log_dir=tmp_path, rotation='size', max_bytes=200, backup_count=2)
+        for i in range(20):
+            log.info(f'ローテーション確認 {i}')
+        log.stop()
+
+        assert (tmp_path / 'task_manager.log.1').exists()
+        assert not (tmp_path / 'task_manager.log.3').exists()
+
+    def test_watched_file_reopened(self, tmp_path):
+        """watch では外部でファイルが移動されると元のパスに開き直す"""
+        log = TaskManagerLogger('test_watch')
+        log.configure(log_dir=tmp_path, rotation='watch')
+        log.info('移動前')
+        log.stop()
+        (tmp_path / 'task_manager.log').rename(tmp_path / 'task_manager.log.1')
+
+        log.start()
+        log.info('移動後')
+        log.stop()
+
+        assert '移動前' in (tmp_path / 'task_manager.log.1').read_text(encoding='utf-8')
+        assert '移動後' in (tmp_path / 'task_manager.log').read_text(encoding='utf-8')
+
+    def test_invalid_format(self, tmp_path):
+        with pytest.raises(ValueError):
+            TaskManagerLogger('test_invalid').configure(log_dir=tmp_path, log_format='xml')
+
+    def test_json_formatter_skips_missing_fields(self):
+        record = logging.LogRecord('test', logging.WARNING, __file__, 1, 'warn', None, None)
+        entry = json.loads(JSONFormatter().format(record))
+        assert set(entry) == {'time', 'level', 'logger', 'message'}
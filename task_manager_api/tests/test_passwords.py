@@ -0,0 +1,105 @@
+"""
+パスワードハッシュ機能のテスト
+プロセスプールでの計算・待ち上限・ログイン時の再ハッシュのテスト
+"""
+import pytest
+
+from app.models import User
+from app.config import Config
+from app.utils.passwords import PasswordHasher, PasswordHasherBusy, normalize_method, password_hash_max_pending
+
+USER = {"username": "hash_user", "email": "hash@example.com", "password": "hash_password"}
+
+
+class TestPasswordHasher:
+    """PasswordHasher のテストクラス"""
+
+    def test_process_pool(self):
+        """プロセスプールでハッシュ化・検証できる"""
+        hasher = PasswordHasher('pbkdf2:sha256', 1000, workers=1)
+        try:
+            password_hash = hasher.hash('secret')
+            assert password_hash.startswith('pbkdf2:sha256:1000$')
+            assert hasher.verify(password_hash, 'secret') is True
+            assert hasher.verify(password_hash, 'wrong') is False
+            # 未対応のハッシュ方式は不一致
+            assert hasher.verify('unknown$salt$hash', 'secret') is False
+        finally:
+            hasher.shutdown()
+
+    def test_busy_when_queue_full(self):
+        """実行中・待機中が上限に達すると PasswordHasherBusy"""
+        hasher = PasswordHasher('pbkdf2:sha256', 1000, workers=1, max_pending=1)
+        hasher._slots.acquire()
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash('secret')
+
+    def test_max_pending_below_thread_count(self):
+        """待ちの上限は計算用プロセス数の2倍で、リクエストスレッドの半分を超える指定は起動時にエラー"""
+        config = {
+            'SERVER_THREADS': Config.SERVER_THREADS,
+            'PASSWORD_HASH_WORKERS': 2,
+            'PASSWORD_HASH_MAX_PENDING': None,
+        }
+        assert password_hash_max_pending(config) == 4
+        assert password_hash_max_pending({**config, 'SERVER_THREADS': 4}) == 2
+        assert password_hash_max_pending({**config, 'PASSWORD_HASH_MAX_PENDING': 8}) == 8
+
+        with pytest.raises(ValueError):
+            password_hash_max_pending({**config, 'PASSWORD_HASH_MAX_PENDING': 16})
+
+    def test_needs_rehash(self):
+        """方式・反復回数が変わると再ハッシュが必要"""
+        hasher = PasswordHasher('pbkdf2:sha256', 1000)
+        password_hash = hasher.hash('secret')
+        assert hasher.needs_rehash(password_hash) is False
+        assert PasswordHasher('pbkdf2:sha256', 2000).needs_rehash(password_hash) is True
+        assert PasswordHasher('pbkdf2:sha512', 1000).needs_rehash(password_hash) is True
+
+    def test_scrypt_not_rehashed(self):
+        """scrypt は保存済みハッシュの先頭（パラメータ付き）と比べ、同じ設定なら再ハッシュしない"""
+        hasher = PasswordHasher('scrypt', 1000)
+        password_hash = hasher.hash('secret')
+        assert password_hash.startswith('scrypt:32768:8:1$')
+        assert hasher.needs_rehash(password_hash) is False
+        assert hasher.needs_rehash(PasswordHasher('pbkdf2:sha256', 1000).hash('secret')) is True
+
+    def test_bare_pbkdf2(self):
+        """ダイジェストを省略した pbkdf2 は sha256 で計算する"""
+        assert normalize_method('pbkdf2', 1000) == 'pbkdf2:sha256:1000'
+        assert normalize_method('pbkdf2:sha512', 1000) == 'pbkdf2:sha512:1000'
+        assert normalize_method('pbkdf2:sha256:2000', 1000) == 'pbkdf2:sha256:2000'
+
+        hasher = PasswordHasher('pbkdf2', 1000)
+        password_hash = hasher.hash('secret')
+        assert password_hash.startswith('pbkdf2:sha256:1000$')
+        assert hasher.verify(password_hash, 'secret') is True
+        assert hasher.needs_rehash(password_hash) is False
+
+
+class TestLoginRehash:
+    """ログイン時の再ハッシュのテストクラス"""
+
+    def test_rehash_on_login(self, app, client):
+        """反復回数を変更するとログイン成功時にハッシュが更新される"""
+        client.post('/api/auth/register', json=USER)
+        app.extensions['password_hasher'] = PasswordHasher('pbkdf2:sha256', 2000)
+
+        # 誤ったパスワードでは更新しない
+        client.post('/api/auth/login', json={**USER, "password": "wrong_password"})
+        assert User.query.filter_by(username=USER['username']).first().password_hash.startswith('pbkdf2:sha256:1000$')
+
+        assert client.post('/api/auth/login', json=USER).status_code == 200
+        assert User.query.filter_by(username=USER['username']).first().password_hash.startswith('pbkdf2:sha256:2000$')
+        assert client.post('/api/auth/login', json=USER).status_code == 200
+
+    def test_busy_returns_503(self, app, client):
+        """ハッシュ計算が混み合っている場合は 503 と Retry-After"""
+        client.post('/api/auth/register', json=USER)
+        hasher = PasswordHasher('pbkdf2:sha256', 1000, workers=1, max_pending=1)
+        hasher._slots.acquire()
+        app.extensions['password_hasher'] = hasher
+
+        response = client.post('/api/auth/login', json=USER)
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
@@ -0,0 +1,61 @@
+"""
+クエリプランのテスト
+各エンドポイントが発行するクエリがインデックスを使うことを確認
+"""
+import re
+import pytest
+from app.database import db
+
+# フルスキャンを示すプラン（例: "SCAN tasks", "SCAN TABLE categories"）
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?(users|tasks|categories)\b')
+
+
+def explain(statement, parameters):
+    """EXPLAIN QUERY PLAN の detail 列を返す"""
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    finally:
+        connection.close()
+
+
+class TestQueryPlans:
+    """ルーターのクエリプランのテストクラス"""
+
+    def test_router_queries_use_indexes(self, client, auth_headers, sample_category, record_queries):
+        """一覧・統計・カテゴリのクエリがフルスキャンしない"""
+        category_id = sample_category['id']
+        for i in range(3):
+            client.post('/api/tasks/', json={"title": f"プランタスク{i}", "category_id": category_id}, headers=auth_headers)
+
+        response = client.get('/api/tasks/?limit=1', headers=auth_headers)
+        cursor = response.get_json()['next_cursor']
+        task_id = response.get_json()['tasks'][0]['id']
+
+        reads = [
+            '/api/tasks/',
+            '/api/tasks/?status=pending',
+            '/api/tasks/?priority=medium',
+            f'/api/tasks/?category_id={category_id}',
+            f'/api/tasks/?limit=1&cursor={cursor}&include_total=true',
+            f'/api/tasks/{task_id}',
+            '/api/tasks/stats',
+            '/api/categories/',
+            f'/api/categories/{category_id}/tasks?limit=1',
+        ]
+
+        with record_queries() as statements:
+            for url in reads:
+                assert client.get(url, headers=auth_headers).status_code == 200
+            client.post('/api/categories/', json={"name": "テストカテゴリ"}, headers=auth_headers)
+            client.delete(f'/api/categories/{category_id}', headers=auth_headers)
+
+        selects = [(sql, params) for sql, params in statements if sql.lstrip().upper().startswith('SELECT')]
+        assert selects
+
+        for sql, params in selects:
+            plan = explain(sql, params)
+            scans = [detail for detail in plan if FULL_SCAN.match(detail)]
+            assert not scans, f'フルスキャンが発生しています: {scans}\n{sql}'
@@ -0,0 +1,92 @@
+"""
+読み込み・書き込みの振り分けのテスト
+GET ハンドラが読み込み専用エンジンを使うことのテスト
+"""
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+from app.app import create_app
+from app.config import TestingConfig
+from app.database import db, read_only_session
+from app.models import Category
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    """ファイルの SQLite を使うアプリケーション（読み込み専用エンジンが作られる）"""
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "routing.db"}')
+    app = create_app('testing')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        app.extensions['read_engine'].dispose()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def file_client(file_app):
+    return file_app.test_client()
+
+
+@pytest.fixture
+def file_headers(file_client):
+    user = {"username": "routing_user", "email": "routing@example.com", "password": "password123"}
+    file_client.post('/api/auth/register', json=user)
+    token = file_client.post('/api/auth/login', json=user).get_json()['access_token']
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def engine_statements(file_app):
+    """エンジンごとに実行された SQL 文を記録"""
+    statements = {'primary': [], 'read': []}
+    engines = {'primary': db.engine, 'read': file_app.extensions['read_engine']}
+
+    def recorder(name):
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements[name].append(statement)
+        return before_cursor_execute
+
+    listeners = [(engine, recorder(name)) for name, engine in engines.items()]
+    for engine, listener in listeners:
+        event.listen(engine, 'before_cursor_execute', listener)
+    yield statements
+    for engine, listener in listeners:
+        event.remove(engine, 'before_cursor_execute', listener)
+
+
+class TestReadRouting:
+    """読み込み・書き込みの振り分けのテストクラス"""
+
+    def test_get_uses_read_engine(self, file_client, file_headers, engine_statements):
+        """GET は読み込み専用エンジン、作成・更新はプライマリを使う"""
+        headers = file_headers
+        response = file_client.post('/api/tasks/', json={"title": "振り分けタスク"}, headers=headers)
+        assert response.status_code == 201
+        assert engine_statements['read'] == []
+        assert any(statement.startswith('INSERT INTO tasks') for statement in engine_statements['primary'])
+
+        engine_statements['primary'].clear()
+        for path in ('/api/tasks/', '/api/tasks/stats', '/api/categories/', '/api/auth/me'):
+            assert file_client.get(path, headers=headers).status_code == 200
+        assert engine_statements['primary'] == []
+        assert engine_statements['read']
+
+        # 書き込み直後の GET にも反映される
+        task_id = response.get_json()['task']['id']
+        file_client.put(f'/api/tasks/{task_id}', json={"status": "completed"}, headers=headers)
+        task = file_client.get(f'/api/tasks/{task_id}', headers=headers).get_json()['task']
+        assert task['status'] == 'completed'
+
+    def test_read_engine_rejects_writes(self, file_app):
+        """読み込み専用ブロック内の書き込み文は読み込み専用の接続で拒否され、flush はプライマリで行う"""
+        with read_only_session(), pytest.raises(OperationalError, match='readonly'):
+            db.session.execute(text("UPDATE users SET is_active = 1"))
+        db.session.rollback()
+
+        with read_only_session():
+            db.session.add(Category(name='読み込み中の追加', user_id=1))
+            db.session.flush()
+        db.session.commit()
+        assert Category.query.filter_by(name='読み込み中の追加').count() == 1
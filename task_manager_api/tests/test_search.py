@@ -0,0 +1,107 @@
+"""
+全文検索機能のテスト
+FTS5 によるタスク検索のテスト
+"""
+import pytest
+from app.utils.search import build_search_terms
+from app.utils.validators import ValidationError
+
+
+class TestSearch:
+    """全文検索のテストクラス"""
+
+    def create_tasks(self, client, auth_headers, tasks):
+        """タスクをまとめて作成してIDを返す"""
+        task_ids = []
+        for task_data in tasks:
+            response = client.post('/api/tasks/', json=task_data, headers=auth_headers)
+            task_ids.append(response.get_json()['task']['id'])
+        return task_ids
+
+    def test_search_japanese_substring(self, client, auth_headers):
+        """日本語タイトル・説明文の部分一致検索"""
+        self.create_tasks(client, auth_headers, [
+            {"title": "週次会議の資料を作成する"},
+            {"title": "買い物", "description": "会議室の予約も忘れずに"},
+            {"title": "コードレビュー"}
+        ])
+
+        response = client.get('/api/tasks/search?q=資料を作成', headers=auth_headers)
+        assert response.status_code == 200
+        assert [task['title'] for task in response.get_json()['tasks']] == ['週次会議の資料を作成する']
+
+        # 3文字未満の語も検索できる
+        response = client.get('/api/tasks/search?q=会議', headers=auth_headers)
+        titles = {task['title'] for task in response.get_json()['tasks']}
+        assert titles == {'週次会議の資料を作成する', '買い物'}
+
+    def test_search_follows_updates_and_deletes(self, client, auth_headers):
+        """更新・削除が検索インデックスに反映される"""
+        task_id, other_id = self.create_tasks(client, auth_headers, [
+            {"title": "retrospective notes"},
+            {"title": "retrospective agenda"}
+        ])
+
+        client.put(f'/api/tasks/{task_id}', json={"title": "planning notes"}, headers=auth_headers)
+        client.delete(f'/api/tasks/{other_id}', headers=auth_headers)
+
+        response = client.get('/api/tasks/search?q=retrospective', headers=auth_headers)
+        assert response.get_json()['tasks'] == []
+
+        response = client.get('/api/tasks/search?q=planning', headers=auth_headers)
+        assert [task['id'] for task in response.get_json()['tasks']] == [task_id]
+
+    def test_search_filters_and_paging(self, client, auth_headers):
+        """フィルタとカーソルページング"""
+        self.create_tasks(client, auth_headers, [
+            {"title": f"deploy service {i}", "priority": "high" if i % 2 else "low"}
+            for i in range(5)
+        ])
+
+        response = client.get('/api/tasks/search?q=deploy&priority=high', headers=auth_headers)
+        tasks = response.get_json()['tasks']
+        assert len(tasks) == 2
+        assert all(task['priority'] == 'high' for task in tasks)
+
+        seen = []
+        cursor = ''
+        while True:
+            response = client.get(f'/api/tasks/search?q=deploy&limit=2&cursor={cursor}', headers=auth_headers)
+            data = response.get_json()
+            seen.extend(task['id'] for task in data['tasks'])
+            if not data['next_cursor']:
+                break
+            cursor = data['next_cursor']
+        assert len(seen) == 5
+        assert len(set(seen)) == 5
+
+    def test_search_only_own_tasks(self, client, auth_headers):
+        """他ユーザーのタスクは検索されない"""
+        self.create_tasks(client, auth_headers, [{"title": "confidential report"}])
+
+        client.post('/api/auth/register', json={
+            "username": "other_user", "email": "other@example.com", "password": "other_password"
+        })
+        token = client.post('/api/auth/login', json={
+            "username": "other_user", "password": "other_password"
+        }).get_json()['access_token']
+
+        response = client.get('/api/tasks/search?q=confidential', headers={"Authorization": f"Bearer {token}"})
+        assert response.get_json()['tasks'] == []
+
+    def test_search_requires_query(self, client, auth_headers):
+        """検索語なしはエラー"""
+        response = client.get('/api/tasks/search', headers=auth_headers)
+        assert response.status_code == 400
+
+        response = client.get('/api/tasks/search?q=abc&cursor=broken', headers=auth_headers)
+        assert response.status_code == 400
+
+    def test_build_search_terms(self):
+        """トークナイザ別の検索式の組み立て"""
+        assert build_search_terms('deploy serv', 'unicode61') == ('"deploy"* "serv"*', [])
+        assert build_search_terms('資料作成 会議', 'trigram') == ('"資料作成"', ['会議'])
+        assert build_search_terms('say "hi"', 'unicode61') == ('"say"* """hi"""*', [])
+
+        with pytest.raises(ValidationError):
+            build_search_terms('   ', 'trigram')
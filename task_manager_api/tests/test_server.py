@@ -0,0 +1,163 @@
+"""
+本番用サーバーのテスト
+スレッドプールでの配信・ログのローテーション方式の確認と、停止時のイベントハブ・SSE の接続数の上限・ワーカー間のイベント中継のテスト
+"""
+import json
+import socket
+import threading
+import time
+import urllib.request
+
+import pytest
+
+from app.server import (
+    EventRelay, EventRelayClient, FrameReader, PooledWSGIServer, check_log_rotation, max_streams_per_worker, send_frame
+)
+from app.utils.events import EventHub, iter_sse
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+class TestPooledWSGIServer:
+    """PooledWSGIServer のテストクラス"""
+
+    def test_serves_requests_with_thread_pool(self, app):
+        """スレッドプールでリクエストを処理し、停止後は処理中のリクエストを待つ"""
+        server = PooledWSGIServer('127.0.0.1', 0, app, threads=2)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            for _ in range(3):
+                with urllib.request.urlopen(f'http://127.0.0.1:{server.port}/health', timeout=5) as response:
+                    assert response.status == 200
+                    assert json.loads(response.read())['status'] == 'OK'
+        finally:
+            server.shutdown()
+            server.pool.shutdown(wait=True)
+            thread.join(timeout=5)
+        assert not thread.is_alive()
+
+    def test_slow_client_times_out(self, app):
+        """何も送らないクライアントはタイムアウトで切断され、空きを待っていた接続が処理される"""
+        server = PooledWSGIServer('127.0.0.1', 0, app, threads=1, queue_size=0, timeout=0.5)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        slow = socket.create_connection(('127.0.0.1', server.port))
+        try:
+            wait_until(lambda: server._slots._value == 0)
+            with urllib.request.urlopen(f'http://127.0.0.1:{server.port}/health', timeout=5) as response:
+                assert response.status == 200
+            slow.settimeout(5)
+            assert slow.recv(1024) == b''
+        finally:
+            slow.close()
+            server.shutdown()
+            server.pool.shutdown(wait=True)
+            thread.join(timeout=5)
+        assert not thread.is_alive()
+
+    @pytest.mark.parametrize('rotation', ['size', 'time'])
+    def test_rejects_per_process_log_rotation(self, rotation):
+        """プロセスごとにファイルを切り替えるローテーションは起動時にエラー"""
+        with pytest.raises(ValueError):
+            check_log_rotation({'LOG_ROTATION': rotation})
+        check_log_rotation({'LOG_ROTATION': 'watch'})
+
+
+class TestEventHubLifecycle:
+    """停止・fork 時のイベントハブのテストクラス"""
+
+    def test_close_ends_streams(self):
+        """close で待機中の SSE ストリームが終了する"""
+        hub = EventHub()
+        subscription = hub.subscribe(1)
+        stream = iter_sse(hub, subscription, heartbeat=30, retry_ms=3000)
+        next(stream)
+
+        hub.close()
+        assert list(stream) == [': keepalive\n\n']
+        assert hub.subscriber_count() == 0
+
+    def test_subscriber_limit(self, app, client, auth_headers):
+        """上限に達したプロセスへの接続は 503（Retry-After 付き）"""
+        hub = app.extensions['event_hub']
+        hub.max_subscribers = 1
+        hub.subscribe(1)
+
+        response = client.get('/api/events', headers=auth_headers)
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '3'
+        assert hub.subscriber_count() == 1
+
+    def test_closed_before_iteration(self, app, auth_headers):
+        """本文を読む前に閉じられたストリームの購読は解除され、上限に数えない"""
+        hub = app.extensions['event_hub']
+        hub.max_subscribers = 1
+        view = app.view_functions['events.stream_events']
+
+        for _ in range(2):
+            with app.test_request_context('/api/events', headers=auth_headers):
+                response = view()
+                assert response.status_code == 200
+                assert hub.subscriber_count() == 1
+                response.close()
+            assert hub.subscriber_count() == 0
+
+    def test_max_streams_per_worker(self):
+        """未指定はスレッド数の半分、スレッド数以上の指定はエラー"""
+        assert max_streams_per_worker({'SERVER_THREADS': 16, 'SERVER_MAX_STREAMS': None}) == 8
+        assert max_streams_per_worker({'SERVER_THREADS': 16, 'SERVER_MAX_STREAMS': 15}) == 15
+        with pytest.raises(ValueError):
+            max_streams_per_worker({'SERVER_THREADS': 16, 'SERVER_MAX_STREAMS': 16})
+
+
+class TestEventRelay:
+    """ワーカー間のイベント中継のテストクラス"""
+
+    def test_frame_reader(self):
+        """分割して届いたフレームを組み立てる"""
+        left, right = socket.socketpair()
+        send_frame(left, {'name': 'タスク'})
+        send_frame(left, {'name': 'b'})
+        data = right.recv(1024)
+        left.close()
+        right.close()
+
+        reader = FrameReader()
+        assert reader.feed(data[:3]) == []
+        assert reader.feed(data[3:]) == [{'name': 'タスク'}, {'name': 'b'}]
+
+    def test_relay_to_all_workers(self):
+        """1つのワーカーで発行したイベントが親プロセスで採番されて全ワーカーの購読者へ届く"""
+        master = EventHub()
+        relay = EventRelay(master)
+        workers = []
+        for pid in (1, 2):
+            master_socket, worker_socket = socket.socketpair()
+            relay.add_worker(pid, master_socket)
+            hub = EventHub()
+            hub.instance_id = master.instance_id
+            EventRelayClient(hub, worker_socket).start()
+            workers.append(hub)
+        subscriptions = [hub.subscribe(7) for hub in workers]
+
+        assert workers[0].publish(7, 'task.created', {'id': 1}) is None
+        relay.poll(5)
+        for subscription in subscriptions:
+            event = subscription.get(timeout=5)
+            assert (event.seq, event.name, event.payload) == (1, 'task.created', '{"id": 1}')
+
+        # 別のワーカーへ Last-Event-ID 付きで再接続しても続きを受け取れる
+        workers[1].publish(7, 'task.updated', {'id': 1})
+        relay.poll(5)
+        assert subscriptions[1].get(timeout=5).seq == 2
+        resumed = workers[1].subscribe(7, workers[0].event_id(event))
+        assert resumed.get(timeout=5).name == 'task.updated'
+
+        relay.close()
+        wait_until(lambda: all(hub.forward is None for hub in workers))
@@ -0,0 +1,34 @@
+"""
+SQLite ストレージ設定のテスト
+接続ごとの PRAGMA 設定のテスト
+"""
+from sqlalchemy import create_engine, text
+
+from app.config import Config
+from app.database import db, register_sqlite_pragmas
+
+
+class TestSQLitePragmas:
+    """接続ごとの PRAGMA のテストクラス"""
+
+    def test_pragmas_applied_to_new_connections(self, tmp_path):
+        """新しい接続すべてに WAL などの設定が適用される"""
+        engine = create_engine(f'sqlite:///{tmp_path / "storage.db"}')
+        register_sqlite_pragmas(engine, Config.SQLITE_PRAGMAS)
+        try:
+            for _ in range(2):
+                with engine.connect() as conn:
+                    assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+                    assert conn.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+                    assert conn.execute(text('PRAGMA busy_timeout')).scalar() == Config.SQLITE_PRAGMAS['busy_timeout']
+                    assert conn.execute(text('PRAGMA temp_store')).scalar() == 2  # MEMORY
+                    assert conn.execute(text('PRAGMA cache_size')).scalar() == -65536
+                engine.dispose()
+        finally:
+            engine.dispose()
+
+    def test_app_engine_uses_environment_profile(self, app):
+        """アプリケーションの接続には環境ごとの設定が適用される"""
+        pragmas = app.config['SQLITE_PRAGMAS']
+        assert db.session.execute(text('PRAGMA busy_timeout')).scalar() == pragmas['busy_timeout']
+        assert db.session.execute(text('PRAGMA journal_mode')).scalar() == pragmas['journal_mode'].lower()
@@ -0,0 +1,87 @@
+"""
+差分同期機能のテスト
+変更ログと /api/tasks/changes のテスト
+"""
+import pytest
+
+
+class TestSync:
+    """差分同期のテストクラス"""
+
+    def fetch_all(self, client, auth_headers, since=0, limit=100):
+        """has_more がなくなるまで変更を取得"""
+        changes = []
+        while True:
+            response = client.get(f'/api/tasks/changes?since={since}&limit={limit}', headers=auth_headers)
+            assert response.status_code == 200
+            data = response.get_json()
+            changes.extend(data['changes'])
+            since = data['next_since']
+            if not data['has_more']:
+                return changes, since
+
+    def test_changes_since_cursor(self, client, auth_headers, sample_category):
+        """カーソル以降の変更のみ返す"""
+        changes, since = self.fetch_all(client, auth_headers)
+        assert [(change['type'], change['id']) for change in changes] == [('category', sample_category['id'])]
+
+        task_id = client.post('/api/tasks/', json={"title": "同期タスク"}, headers=auth_headers).get_json()['task']['id']
+        client.put(f'/api/tasks/{task_id}', json={"status": "in_progress"}, headers=auth_headers)
+
+        changes, since = self.fetch_all(client, auth_headers, since)
+        # 同じタスクの変更は最新の1件にまとめられる
+        assert len(changes) == 1
+        assert changes[0]['type'] == 'task'
+        assert changes[0]['data']['status'] == 'in_progress'
+
+        # 変更がなければ空
+        changes, next_since = self.fetch_all(client, auth_headers, since)
+        assert changes == []
+        assert next_since == since
+
+    def test_changes_tombstones(self, client, auth_headers):
+        """削除は墓標として返る"""
+        task_id = client.post('/api/tasks/', json={"title": "削除タスク"}, headers=auth_headers).get_json()['task']['id']
+        category_id = client.post('/api/categories/', json={"name": "削除カテゴリ"}, headers=auth_headers).get_json()['category']['id']
+        _, since = self.fetch_all(client, auth_headers)
+
+        client.delete(f'/api/tasks/{task_id}', headers=auth_headers)
+        client.delete(f'/api/categories/{category_id}', headers=auth_headers)
+
+        changes, _ = self.fetch_all(client, auth_headers, since)
+        assert [(change['type'], change['id'], change['deleted'], change['data']) for change in changes] == [
+            ('task', task_id, True, None),
+            ('category', category_id, True, None),
+        ]
+
+    def test_changes_paging_and_bulk_writes(self, client, auth_headers):
+        """一括作成もログに残り、ページングで全件取得できる"""
+        operations = [{"op": "create", "data": {"title": f"同期{i}"}} for i in range(25)]
+        client.post('/api/tasks/batch', json={"operations": operations}, headers=auth_headers)
+
+        changes, _ = self.fetch_all(client, auth_headers, limit=10)
+        assert len(changes) == 25
+        seqs = [change['seq'] for change in changes]
+        assert seqs == sorted(seqs)
+        assert len(set(seqs)) == 25
+
+    def test_changes_only_own(self, client, auth_headers):
+        """他ユーザーの変更は返さない"""
+        client.post('/api/auth/register', json={
+            "username": "sync_other", "email": "sync_other@example.com", "password": "other_password"
+        })
+        token = client.post('/api/auth/login', json={
+            "username": "sync_other", "password": "other_password"
+        }).get_json()['access_token']
+        client.post('/api/tasks/', json={"title": "他人のタスク"}, headers={"Authorization": f"Bearer {token}"})
+
+        changes, _ = self.fetch_all(client, auth_headers)
+        assert changes == []
+
+    def test_changes_invalid_since(self, client, auth_headers):
+        """不正な since はエラー"""
+        response = client.get('/api/tasks/changes?since=abc', headers=auth_headers)
+        assert response.status_code == 400
+
+        response = client.get('/api/tasks/changes?since=-1', headers=auth_headers)
+        assert response.status_code == 400
@@ -2,6 +2,9 @@
 タスク機能のテスト
 CRUD操作と統計機能のテスト
 """
+import csv
+import io
+import json
 import pytest
 from datetime import datetime, timedelta
 
@@ -84,6 +87,73 @@ class TestTasks:
         assert len(data['tasks']) == 2
         assert all(task['priority'] == 'high' for task in data['tasks'])
 
+    def test_get_tasks_with_limit_and_cursor(self, client, auth_headers):
+        """limit と cursor によるキーセットページング"""
+        for i in range(5):
+            client.post('/api/tasks/', json={"title": f"ページタスク{i}"}, headers=auth_headers)
+        
+        # 1ページ目
+        response = client.get('/api/tasks/?limit=2', headers=auth_headers)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert [task['title'] for task in data['tasks']] == ['ページタスク4', 'ページタスク3']
+        assert data['next_cursor']
+        assert 'total' not in data  # ページング時は件数を集計しない
+        
+        # 2ページ目以降を辿る
+        titles = [task['title'] for task in data['tasks']]
+        cursor = data['next_cursor']
+        while cursor:
+            response = client.get(f'/api/tasks/?limit=2&cursor={cursor}', headers=auth_headers)
+            data = response.get_json()
+            titles.extend(task['title'] for task in data['tasks'])
+            cursor = data['next_cursor']
+        
+        assert titles == [f'ページタスク{i}' for i in range(4, -1, -1)]
+
+    def test_get_tasks_with_limit_include_total(self, client, auth_headers):
+        """include_total 指定時のみ総件数を返す"""
+        for i in range(3):
+            client.post('/api/tasks/', json={"title": f"件数タスク{i}"}, headers=auth_headers)
+        
+        response = client.get('/api/tasks/?limit=1&include_total=true', headers=auth_headers)
+        data = response.get_json()
+        assert len(data['tasks']) == 1
+        assert data['total'] == 3
+
+    def test_get_tasks_invalid_paging_params(self, client, auth_headers):
+        """不正な limit / cursor のエラー"""
+        response = client.get('/api/tasks/?limit=0', headers=auth_headers)
+        assert response.status_code == 400
+        
+        response = client.get('/api/tasks/?limit=abc', headers=auth_headers)
+        assert response.status_code == 400
+        
+        response = client.get('/api/tasks/?cursor=invalid', headers=auth_headers)
+        assert response.status_code == 400
+
+    def test_get_tasks_constant_query_count(self, client, auth_headers, record_queries):
+        """一覧取得のクエリ数がタスク件数・カテゴリ数に依存しない（N+1なし）"""
+        def create_tasks(prefix, count):
+            for i in range(count):
+                response = client.post('/api/categories/', json={"name": f"{prefix}カテゴリ{i}"}, headers=auth_headers)
+                category_id = response.get_json()['category']['id']
+                client.post('/api/tasks/', json={"title": f"{prefix}タスク{i}", "category_id": category_id}, headers=auth_headers)
+
+        create_tasks('少', 1)
+        with record_queries() as few:
+            response = client.get('/api/tasks/', headers=auth_headers)
+        assert len(response.get_json()['tasks']) == 1
+
+        create_tasks('多', 5)
+        with record_queries() as many:
+            response = client.get('/api/tasks/', headers=auth_headers)
+        data = response.get_json()
+        assert len(data['tasks']) == 6
+        assert all(task['category_name'] for task in data['tasks'])
+
+        assert len(many) == len(few)
+
     def test_update_task_success(self, client, auth_headers):
         """タスク更新の正常ケース"""
         # タスクを作成
@@ -106,6 +176,29 @@ class TestTasks:
         assert data['task']['status'] == 'completed'
         assert data['task']['completed_at'] is not None
 
+    @pytest.mark.parametrize('update_data', [
+        {"title": ""},
+        {"status": "unknown"},
+        {"priority": "critical"},
+        {"description": "x" * 1001},
+        {"due_date": "2024/01/01"},
+        {"category_id": "1"},
+    ])
+    def test_update_task_validation(self, client, auth_headers, update_data):
+        """単体の更新もバッチの更新と同じ入力を 400 で拒否し、タスクは変更しない"""
+        task_id = client.post('/api/tasks/', json={"title": "検証対象"}, headers=auth_headers).get_json()['task']['id']
+
+        response = client.put(f'/api/tasks/{task_id}', json=update_data, headers=auth_headers)
+        assert response.status_code == 400
+        response = client.post('/api/tasks/batch', json={"operations": [
+            {"op": "update", "id": task_id, "data": update_data}
+        ]}, headers=auth_headers)
+        assert response.get_json()['results'][0]['status'] == 400
+
+        task = client.get(f'/api/tasks/{task_id}', headers=auth_headers).get_json()['task']
+        assert task['title'] == '検証対象'
+        assert task['status'] == 'pending'
+
     def test_delete_task_success(self, client, auth_headers):
         """タスク削除の正常ケース"""
         # タスクを作成
@@ -155,6 +248,392 @@ class TestTasks:
         assert stats['completed_tasks'] >= 1  # 最低1つは完了
         assert 0 <= stats['completion_rate'] <= 100  # 割合は0-100%の範囲
 
+    def test_task_stats_matrix_and_overdue(self, client, auth_headers, record_queries):
+        """ステータス×優先度マトリクスと期限切れ件数"""
+        tasks = [
+            {"title": "高・未着手", "priority": "high"},
+            {"title": "高・進行中", "priority": "high", "status": "in_progress"},
+            {"title": "低・完了", "priority": "low", "status": "completed"}
+        ]
+        task_ids = []
+        for task_data in tasks:
+            response = client.post('/api/tasks/', json=task_data, headers=auth_headers)
+            task_ids.append(response.get_json()['task']['id'])
+        
+        # 期限切れ: 未完了タスクのみ対象
+        yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+        for task_id in task_ids:
+            client.put(f'/api/tasks/{task_id}', json={"due_date": yesterday}, headers=auth_headers)
+        
+        with record_queries() as statements:
+            response = client.get('/api/tasks/stats', headers=auth_headers)
+        assert response.status_code == 200
+        # データバージョン・カウンタ・期限日別カウンタの読み出しのみ（tasks テーブルは読まない）
+        assert len(statements) == 3
+        assert not any(' tasks' in sql for sql, _ in statements)
+        
+        stats = response.get_json()['stats']
+        assert stats['total_tasks'] == 3
+        assert stats['high_priority_tasks'] == 2
+        assert stats['status_priority_matrix']['pending']['high'] == 1
+        assert stats['status_priority_matrix']['in_progress']['high'] == 1
+        assert stats['status_priority_matrix']['completed']['low'] == 1
+        assert stats['status_priority_matrix']['cancelled']['urgent'] == 0
+        assert stats['by_status']['completed'] == 1
+        assert stats['overdue_tasks'] == 2
+        assert stats['overdue_by_priority']['high'] == 2
+        assert stats['overdue_by_priority']['low'] == 0
+
+    def test_task_stats_counters_follow_writes(self, app, client, auth_headers):
+        """作成・更新・削除でカウンタが再構築結果と一致する"""
+        from app.utils.task_stats import read_task_stats, rebuild_task_stats
+        
+        task_ids = []
+        for priority in ('low', 'high', 'high'):
+            response = client.post('/api/tasks/', json={"title": f"{priority}タスク", "priority": priority}, headers=auth_headers)
+            task_ids.append(response.get_json()['task']['id'])
+        
+        client.put(f'/api/tasks/{task_ids[0]}', json={"status": "completed", "priority": "urgent"}, headers=auth_headers)
+        client.put(f'/api/tasks/{task_ids[1]}', json={"title": "タイトルのみ変更"}, headers=auth_headers)
+        client.delete(f'/api/tasks/{task_ids[2]}', headers=auth_headers)
+        
+        stats = client.get('/api/tasks/stats', headers=auth_headers).get_json()['stats']
+        assert stats['total_tasks'] == 2
+        assert stats['status_priority_matrix']['completed']['urgent'] == 1
+        assert stats['status_priority_matrix']['pending']['high'] == 1
+        assert stats['status_priority_matrix']['pending']['low'] == 0
+        
+        user_id = client.get('/api/auth/me', headers=auth_headers).get_json()['user']['id']
+        rebuild_task_stats(user_id)
+        assert read_task_stats(user_id) == stats
+
+    def test_overdue_counters_follow_writes(self, app, client, auth_headers):
+        """期限日・ステータスの変更と削除で期限日別カウンタが再構築結果と一致し、0 件の行は残らない"""
+        from app.models import UserOpenDueStats
+        from app.utils.task_stats import read_task_stats, rebuild_task_stats
+        
+        yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+        tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        task_ids = []
+        for priority in ('low', 'high', 'high', 'urgent'):
+            response = client.post('/api/tasks/', json={"title": f"{priority}期限", "priority": priority}, headers=auth_headers)
+            task_ids.append(response.get_json()['task']['id'])
+            client.put(f'/api/tasks/{task_ids[-1]}', json={"due_date": yesterday}, headers=auth_headers)
+        
+        client.put(f'/api/tasks/{task_ids[0]}', json={"status": "completed"}, headers=auth_headers)
+        client.put(f'/api/tasks/{task_ids[1]}', json={"due_date": tomorrow}, headers=auth_headers)
+        client.delete(f'/api/tasks/{task_ids[2]}', headers=auth_headers)
+        client.put(f'/api/tasks/{task_ids[3]}', json={"priority": "medium"}, headers=auth_headers)
+        
+        stats = client.get('/api/tasks/stats', headers=auth_headers).get_json()['stats']
+        assert stats['overdue_tasks'] == 1
+        assert stats['overdue_by_priority'] == {'high': 0, 'low': 0, 'medium': 1, 'urgent': 0}
+        assert UserOpenDueStats.query.count() == 2
+        assert not UserOpenDueStats.query.filter(UserOpenDueStats.task_count <= 0).count()
+        
+        user_id = client.get('/api/auth/me', headers=auth_headers).get_json()['user']['id']
+        rebuild_task_stats(user_id)
+        assert read_task_stats(user_id) == stats
+        assert UserOpenDueStats.query.count() == 2
+
+    def test_rebuild_task_stats_command(self, app, client, auth_headers):
+        """再構築コマンドでずれたカウンタを回復"""
+        from app.models import UserTaskStats
+        from app.database import db
+        
+        client.post('/api/tasks/', json={"title": "再構築タスク"}, headers=auth_headers)
+        UserTaskStats.query.update({'task_count': 99})
+        db.session.commit()
+        
+        result = app.test_cli_runner().invoke(args=['rebuild-task-stats'])
+        assert result.exit_code == 0
+        
+        stats = client.get('/api/tasks/stats', headers=auth_headers).get_json()['stats']
+        assert stats['total_tasks'] == 1
+
+    def test_batch_tasks_success(self, client, auth_headers, sample_category, record_queries):
+        """作成・更新・削除の一括反映"""
+        task_ids = []
+        for i in range(2):
+            response = client.post('/api/tasks/', json={"title": f"既存タスク{i}"}, headers=auth_headers)
+            task_ids.append(response.get_json()['task']['id'])
+        
+        operations = [
+            {"op": "create", "data": {"title": f"一括タスク{i}", "category_id": sample_category['id']}}
+            for i in range(20)
+        ]
+        operations += [
+            {"op": "update", "id": task_ids[0], "data": {"status": "completed"}},
+            {"op": "delete", "id": task_ids[1]}
+        ]
+        
+        with record_queries() as statements:
+            response = client.post('/api/tasks/batch', json={"operations": operations}, headers=auth_headers)
+        assert response.status_code == 200
+        # 操作数に比例したクエリを発行しない（書き込み時のカテゴリの所有確認を含む）
+        assert len(statements) <= 11
+        
+        results = response.get_json()['results']
+        assert [result['status'] for result in results] == [201] * 20 + [200, 200]
+        assert [result['task']['title'] for result in results[:20]] == [f'一括タスク{i}' for i in range(20)]
+        assert results[0]['task']['category_name'] == 'テストカテゴリ'
+        assert results[20]['task']['status'] == 'completed'
+        assert results[20]['task']['completed_at'] is not None
+        
+        stats = client.get('/api/tasks/stats', headers=auth_headers).get_json()['stats']
+        assert stats['total_tasks'] == 21
+        assert stats['completed_tasks'] == 1
+
+    def test_batch_tasks_atomic_failure(self, client, auth_headers):
+        """不正な操作を含む場合は何も反映しない"""
+        operations = [
+            {"op": "create", "data": {"title": "反映されないタスク"}},
+            {"op": "create", "data": {"priority": "high"}},
+            {"op": "update", "id": 99999, "data": {"title": "存在しない"}},
+            {"op": "create", "data": {"title": "他人のカテゴリ", "category_id": 99999}}
+        ]
+        
+        response = client.post('/api/tasks/batch', json={"operations": operations}, headers=auth_headers)
+        assert response.status_code == 400
+        
+        results = response.get_json()['results']
+        assert [result['status'] for result in results] == [424, 400, 404, 404]
+        assert client.get('/api/tasks/', headers=auth_headers).get_json()['total'] == 0
+
+    def test_batch_tasks_partial(self, client, auth_headers):
+        """atomic=false では正常な操作のみ反映"""
+        operations = [
+            {"op": "create", "data": {"title": "反映されるタスク"}},
+            {"op": "create", "data": {"title": "x" * 201}},
+            {"op": "archive", "id": 1}
+        ]
+        
+        response = client.post('/api/tasks/batch', json={"operations": operations, "atomic": False}, headers=auth_headers)
+        assert response.status_code == 207
+        
+        results = response.get_json()['results']
+        assert [result['status'] for result in results] == [201, 400, 400]
+        assert client.get('/api/tasks/', headers=auth_headers).get_json()['total'] == 1
+
+    def test_batch_tasks_invalid_body(self, client, auth_headers):
+        """operations の形式エラー"""
+        response = client.post('/api/tasks/batch', json={"operations": []}, headers=auth_headers)
+        assert response.status_code == 400
+        
+        response = client.post('/api/tasks/batch', json={"operations": [{"op": "delete"}] * 501}, headers=auth_headers)
+        assert response.status_code == 400
+
+    def test_export_tasks_ndjson(self, client, auth_headers, sample_category):
+        """NDJSON 形式のストリーミングエクスポート"""
+        operations = [
+            {"op": "create", "data": {"title": f"エクスポート{i}", "category_id": sample_category['id'], "priority": "high" if i < 3 else "low"}}
+            for i in range(1200)
+        ]
+        for start in range(0, len(operations), 400):
+            client.post('/api/tasks/batch', json={"operations": operations[start:start + 400]}, headers=auth_headers)
+        
+        response = client.get('/api/tasks/export?format=ndjson', headers=auth_headers)
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.mimetype == 'application/x-ndjson'
+        assert 'attachment' in response.headers['Content-Disposition']
+        
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert len(rows) == 1200
+        assert rows[0]['title'] == 'エクスポート0'
+        assert rows[0]['category_name'] == 'テストカテゴリ'
+        
+        response = client.get('/api/tasks/export?priority=high', headers=auth_headers)
+        assert len(response.get_data(as_text=True).splitlines()) == 3
+
+    def test_export_tasks_csv(self, client, auth_headers):
+        """CSV 形式のエクスポート"""
+        client.post('/api/tasks/', json={"title": "CSV, \"引用符\"付き", "description": "改行\nあり"}, headers=auth_headers)
+        
+        response = client.get('/api/tasks/export?format=csv', headers=auth_headers)
+        assert response.status_code == 200
+        assert response.mimetype == 'text/csv'
+        
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        assert len(rows) == 1
+        assert rows[0]['title'] == 'CSV, "引用符"付き'
+        assert rows[0]['description'] == '改行\nあり'
+
+    def test_export_tasks_invalid_format(self, client, auth_headers):
+        """未対応の形式はエラー"""
+        response = client.get('/api/tasks/export?format=xml', headers=auth_headers)
+        assert response.status_code == 400
+
+    def test_import_tasks_ndjson(self, client, auth_headers, sample_category):
+        """NDJSON ボディからの一括インポートと却下行のサマリー"""
+        lines = [json.dumps({"title": f"取り込み{i}", "category_name": "テストカテゴリ"}, ensure_ascii=False) for i in range(1100)]
+        lines += [
+            '{"title": ""}',
+            'not json',
+            json.dumps({"title": "未知のカテゴリ", "category_name": "存在しない"}, ensure_ascii=False),
+            json.dumps({"title": "過去の期限", "due_date": "2020-01-01", "status": "completed"}),
+        ]
+        body = '\n'.join(lines).encode('utf-8')
+        
+        response = client.post('/api/tasks/import', data=body, content_type='application/x-ndjson', headers=auth_headers)
+        assert response.status_code == 200
+        
+        data = response.get_json()
+        assert data['imported'] == 1101
+        assert data['rejected'] == 3
+        assert [error['line'] for error in data['errors']] == [1101, 1102, 1103]
+        
+        stats = client.get('/api/tasks/stats', headers=auth_headers).get_json()['stats']
+        assert stats['total_tasks'] == 1101
+        assert stats['completed_tasks'] == 1
+        
+        category = client.get(f'/api/categories/{sample_category["id"]}/tasks?limit=1', headers=auth_headers).get_json()['category']
+        assert category['task_count'] == 1100
+
+    def test_import_tasks_csv_upload(self, client, auth_headers):
+        """CSV ファイルのアップロードとカテゴリの自動作成"""
+        content = '\ufeffid,title,priority,category_name\n1,CSVタスク1,high,新規カテゴリ\n2,CSVタスク2,low,\n'
+        
+        response = client.post(
+            '/api/tasks/import?create_categories=true',
+            data={'file': (io.BytesIO(content.encode('utf-8')), 'tasks.csv')},
+            content_type='multipart/form-data',
+            headers=auth_headers
+        )
+        assert response.status_code == 200
+        assert response.get_json()['imported'] == 2
+        
+        tasks = client.get('/api/tasks/', headers=auth_headers).get_json()['tasks']
+        by_title = {task['title']: task for task in tasks}
+        assert by_title['CSVタスク1']['category_name'] == '新規カテゴリ'
+        assert by_title['CSVタスク1']['priority'] == 'high'
+        assert by_title['CSVタスク2']['category_id'] is None
+
+    def test_import_malformed_csv(self, client, auth_headers):
+        """CSV の形式不正で中止した場合は 400 で、手前までに取り込んだ件数を返す"""
+        content = 'title,description\n正常な行,a\n大きすぎる列,' + 'x' * (csv.field_size_limit() + 1) + '\n後続の行,b\n'
+        response = client.post('/api/tasks/import', data=content.encode('utf-8'), content_type='text/csv', headers=auth_headers)
+        assert response.status_code == 400
+
+        data = response.get_json()
+        assert data['imported'] == 1
+        assert data['errors'][0]['line'] == 3
+        assert '3 行目' in data['error']
+        assert [task['title'] for task in client.get('/api/tasks/', headers=auth_headers).get_json()['tasks']] == ['正常な行']
+
+    def test_import_category_conflict(self, app, client, auth_headers):
+        """カテゴリの作成が他の処理と競合した場合はコミット済みのチャンクを残して中止する"""
+        from app.database import db
+        from app.models import Category
+        from app.utils.importer import ImportAborted, TaskImporter
+
+        user_id = client.get('/api/auth/me', headers=auth_headers).get_json()['user']['id']
+        lines = [json.dumps({"title": f"取り込み{i}"}) for i in range(3)]
+        lines.append(json.dumps({"title": "競合", "category_name": "同時に作成"}, ensure_ascii=False))
+
+        importer = TaskImporter(user_id, create_categories=True, chunk_size=2)
+        # 取り込み開始後に他の処理が同じ名前のカテゴリを作成
+        db.session.add(Category(name="同時に作成", user_id=user_id))
+        db.session.commit()
+        with pytest.raises(ImportAborted) as excinfo:
+            importer.run(io.BytesIO('\n'.join(lines).encode('utf-8')), 'ndjson')
+        assert excinfo.value.summary['imported'] == 2
+        assert client.get('/api/tasks/stats', headers=auth_headers).get_json()['stats']['total_tasks'] == 2
+
+    def test_export_import_round_trip(self, client, auth_headers, sample_category):
+        """エクスポートした NDJSON をそのままインポートできる"""
+        client.post('/api/tasks/', json={"title": "往復タスク", "category_id": sample_category['id']}, headers=auth_headers)
+        exported = client.get('/api/tasks/export', headers=auth_headers).get_data()
+        
+        response = client.post('/api/tasks/import', data=exported, content_type='application/x-ndjson', headers=auth_headers)
+        assert response.get_json()['imported'] == 1
+        
+        response = client.get('/api/tasks/search?q=往復タスク', headers=auth_headers)
+        assert len(response.get_json()['tasks']) == 2
+
+    def test_etag_revalidation(self, client, auth_headers, record_queries):
+        """ETag / If-None-Match による条件付き取得"""
+        client.post('/api/tasks/', json={"title": "ETagタスク"}, headers=auth_headers)
+        
+        response = client.get('/api/tasks/', headers=auth_headers)
+        assert response.status_code == 200
+        etag = response.headers['ETag']
+        assert response.headers['Cache-Control'] == 'private, no-cache'
+        
+        # 変更がなければバージョンの参照のみで 304
+        with record_queries() as statements:
+            response = client.get('/api/tasks/', headers={**auth_headers, 'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.headers['ETag'] == etag
+        assert len(statements) == 1
+        assert 'user_data_versions' in statements[0][0]
+        
+        # クエリ文字列が異なれば別の ETag
+        response = client.get('/api/tasks/?status=pending', headers=auth_headers)
+        assert response.headers['ETag'] != etag
+        
+        # 書き込み後は新しい内容を返す
+        client.post('/api/tasks/', json={"title": "追加タスク"}, headers=auth_headers)
+        response = client.get('/api/tasks/', headers={**auth_headers, 'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        assert response.get_json()['total'] == 2
+
+    def test_etag_changes_on_stats_after_batch(self, client, auth_headers):
+        """一括作成でもバージョンが進む"""
+        response = client.get('/api/tasks/stats', headers=auth_headers)
+        etag = response.headers['ETag']
+        
+        client.post('/api/tasks/batch', json={"operations": [{"op": "create", "data": {"title": "一括"}}]}, headers=auth_headers)
+        
+        response = client.get('/api/tasks/stats', headers={**auth_headers, 'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.get_json()['stats']['total_tasks'] == 1
+
+    def test_sparse_fields_projection(self, client, auth_headers, sample_category, record_queries):
+        """fields で指定した列だけを SELECT して返す"""
+        client.post('/api/tasks/', json={
+            "title": "項目指定タスク", "description": "長い説明" * 50, "category_id": sample_category['id']
+        }, headers=auth_headers)
+        
+        with record_queries() as statements:
+            response = client.get('/api/tasks/?fields=id,title,status&limit=10', headers=auth_headers)
+        assert response.status_code == 200
+        assert response.get_json()['tasks'] == [{'id': 1, 'title': '項目指定タスク', 'status': 'pending'}]
+        select_sql = next(statement for statement, _ in statements if 'FROM tasks' in statement)
+        assert 'tasks.description' not in select_sql
+        assert 'JOIN categories' not in select_sql
+        
+        # compact は一覧表示用の最小セット（カテゴリ名は JOIN で取得）
+        with record_queries() as statements:
+            response = client.get('/api/tasks/?fields=compact', headers=auth_headers)
+        task = response.get_json()['tasks'][0]
+        assert set(task) == {'id', 'title', 'status', 'priority', 'due_date', 'category_name'}
+        assert task['category_name'] == 'テストカテゴリ'
+        select_sql = next(statement for statement, _ in statements if 'FROM tasks' in statement)
+        assert 'tasks.description' not in select_sql
+        assert 'categories.color' not in select_sql
+        
+        response = client.get('/api/tasks/1?fields=title', headers=auth_headers)
+        assert response.get_json() == {'task': {'title': '項目指定タスク'}}
+        
+        response = client.get('/api/tasks/export?format=csv&fields=id,title', headers=auth_headers)
+        assert response.get_data(as_text=True).splitlines() == ['id,title', '1,項目指定タスク']
+
+    def test_sparse_fields_paging_and_invalid(self, client, auth_headers):
+        """fields 指定時もカーソルページングでき、不明なフィールドはエラー"""
+        for i in range(3):
+            client.post('/api/tasks/', json={"title": f"項目ページ{i}"}, headers=auth_headers)
+        
+        response = client.get('/api/tasks/?fields=title&limit=2', headers=auth_headers)
+        data = response.get_json()
+        response = client.get(f'/api/tasks/?fields=title&limit=2&cursor={data["next_cursor"]}', headers=auth_headers)
+        assert response.get_json()['tasks'] == [{'title': '項目ページ0'}]
+        
+        response = client.get('/api/tasks/?fields=title,password', headers=auth_headers)
+        assert response.status_code == 400
+        assert 'password' in response.get_json()['error']
+
     def test_unauthorized_access(self, client):
         """認証なしでのアクセステスト"""
         # 認証が必要なエンドポイントへの認証なしアクセス
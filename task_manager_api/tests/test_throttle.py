@@ -0,0 +1,107 @@
+"""
+認証のスロットリングのテスト
+トークンバケットとログイン・登録の試行回数制限のテスト
+"""
+import pytest
+
+from app.utils.throttle import TokenBucketLimiter, init_auth_throttle, per_worker_rate
+
+
+class FakeClock:
+    """テスト用の時計"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucketLimiter:
+    """TokenBucketLimiter のテストクラス"""
+
+    def test_refill(self):
+        """容量を使い切ると拒否し、時間経過で補充される"""
+        clock = FakeClock()
+        limiter = TokenBucketLimiter((2, 10), clock=clock)
+        assert limiter.consume('a') == 0
+        assert limiter.consume('a') == 0
+        assert limiter.consume('a') == 5
+        # 別のキーは独立
+        assert limiter.consume('b') == 0
+
+        clock.now = 5
+        assert limiter.consume('a') == 0
+        assert limiter.stats() == {'keys': 2, 'allowed': 4, 'rejected': 1}
+
+    def test_maxsize(self):
+        """保持するキー数は上限まで"""
+        limiter = TokenBucketLimiter((1, 60), maxsize=2)
+        for key in ('a', 'b', 'c'):
+            limiter.consume(key)
+        assert limiter.stats()['keys'] == 2
+        # 破棄されたキーは満タンから再開
+        assert limiter.consume('a') == 0
+
+    def test_per_worker_rate(self):
+        """ワーカー数で分けても全ワーカー合計の補充の速さは設定どおり"""
+        assert per_worker_rate((5, 60), 1) == (5, 60)
+        assert per_worker_rate((30, 60), 4) == (7, 56)
+        for rate, workers in [((5, 60), 4), ((30, 60), 4), ((10, 3600), 16)]:
+            capacity, period = per_worker_rate(rate, workers)
+            assert capacity >= 1
+            assert capacity / period * workers == pytest.approx(rate[0] / rate[1])
+
+
+class TestAuthThrottle:
+    """ログイン・登録の試行回数制限のテストクラス"""
+
+    def test_login_throttled_per_user(self, app, client, record_queries):
+        """同じユーザー名への試行が上限を超えるとハッシュ計算の前に 429"""
+        user = {"username": "throttle_user", "email": "throttle@example.com", "password": "password123"}
+        client.post('/api/auth/register', json=user)
+        app.config['LOGIN_THROTTLE_PER_USER'] = (3, 60)
+        init_auth_throttle(app)
+
+        for _ in range(3):
+            response = client.post('/api/auth/login', json={**user, "password": "wrong_password"})
+            assert response.status_code == 401
+
+        with record_queries() as statements:
+            response = client.post('/api/auth/login', json=user)
+        assert response.status_code == 429
+        assert int(response.headers['Retry-After']) >= 1
+        assert statements == []
+
+        # 他のユーザー名は制限されない
+        response = client.post('/api/auth/login', json={"username": "someone_else", "password": "password123"})
+        assert response.status_code == 401
+
+        stats = client.get('/health').get_json()['auth_throttle']
+        assert stats['login_user']['rejected'] == 1
+
+    def test_unknown_user_same_response(self, client):
+        """存在しないユーザーとパスワード誤りは同じ応答"""
+        user = {"username": "known_user", "email": "known@example.com", "password": "password123"}
+        client.post('/api/auth/register', json=user)
+
+        unknown = client.post('/api/auth/login', json={"username": "unknown_user", "password": "password123"})
+        wrong = client.post('/api/auth/login', json={**user, "password": "wrong_password"})
+        assert unknown.status_code == wrong.status_code == 401
+        assert unknown.get_json() == wrong.get_json()
+
+    def test_register_throttled_per_client(self, app, client):
+        """同じクライアントからの登録が上限を超えると 429"""
+        app.config['REGISTER_THROTTLE_PER_CLIENT'] = (2, 3600)
+        init_auth_throttle(app)
+
+        for i in range(2):
+            response = client.post('/api/auth/register', json={
+                "username": f"user{i}", "email": f"user{i}@example.com", "password": "password123"
+            })
+            assert response.status_code == 201
+
+        response = client.post('/api/auth/register', json={
+            "username": "user2", "email": "user2@example.com", "password": "password123"
+        })
+        assert response.status_code == 429
@@ -0,0 +1,105 @@
+"""
+バイナリ形式のテスト
+CBOR のエンコード・デコードと Accept / Content-Type によるネゴシエーションのテスト
+"""
+from datetime import datetime
+
+import pytest
+
+from app.utils.wire_formats import CBORError, cbor_dumps, cbor_loads
+
+
+def no_default(o):
+    raise TypeError(o)
+
+
+class TestCBOR:
+    """CBOR のテストクラス（RFC 8949 付録Aの例）"""
+
+    @pytest.mark.parametrize('value, encoded', [
+        (0, '00'),
+        (23, '17'),
+        (24, '1818'),
+        (1000, '1903e8'),
+        (1000000000000, '1b000000e8d4a51000'),
+        (-1, '20'),
+        (-1000, '3903e7'),
+        (1.1, 'fb3ff199999999999a'),
+        (False, 'f4'),
+        (True, 'f5'),
+        (None, 'f6'),
+        ('', '60'),
+        ('水', '63e6b0b4'),
+        ([1, [2, 3], [4, 5]], '8301820203820405'),
+        ({'a': 1, 'b': [2, 3]}, 'a26161016162820203'),
+    ])
+    def test_round_trip(self, value, encoded):
+        assert cbor_dumps(value, no_default).hex() == encoded
+        assert cbor_loads(bytes.fromhex(encoded)) == value
+
+    @pytest.mark.parametrize('encoded, value', [
+        ('f93e00', 1.5),
+        ('fa47c35000', 100000.0),
+        ('7f657374726561646d696e67ff', 'streaming'),
+        ('9f018202039f0405ffff', [1, [2, 3], [4, 5]]),
+        ('bf61610161629f0203ffff', {'a': 1, 'b': [2, 3]}),
+        ('c074323031332d30332d32315432303a30343a30305a', '2013-03-21T20:04:00Z'),
+    ])
+    def test_decode_other_forms(self, encoded, value):
+        """半精度・不定長・タグ付きの値もデコードできる"""
+        assert cbor_loads(bytes.fromhex(encoded)) == value
+
+    def test_default_and_invalid(self):
+        """エンコードできない値は default で変換し、不正なデータはエラー"""
+        assert cbor_loads(cbor_dumps({'at': datetime(2024, 1, 2)}, lambda o: o.isoformat())) == {'at': '2024-01-02T00:00:00'}
+        for data in (b'', b'\x63ab', b'\x01\x02', b'\xff'):
+            with pytest.raises(CBORError):
+                cbor_loads(data)
+
+
+class TestContentNegotiation:
+    """Accept / Content-Type によるネゴシエーションのテストクラス"""
+
+    def test_cbor_request_and_response(self, client, auth_headers, sample_category):
+        """CBOR で送信・受信しても JSON と同じ内容になる"""
+        body = cbor_dumps({"title": "CBORタスク", "priority": "high", "category_id": sample_category['id']}, no_default)
+        response = client.post('/api/tasks/', data=body, content_type='application/cbor',
+                               headers={**auth_headers, 'Accept': 'application/cbor'})
+        assert response.status_code == 201
+        assert response.mimetype == 'application/cbor'
+        task = cbor_loads(response.get_data())['task']
+        assert task['title'] == 'CBORタスク'
+        assert task['category_name'] == 'テストカテゴリ'
+
+        cbor_response = client.get('/api/tasks/', headers={**auth_headers, 'Accept': 'application/cbor'})
+        json_response = client.get('/api/tasks/', headers=auth_headers)
+        assert cbor_loads(cbor_response.get_data()) == json_response.get_json()
+        assert 'Accept' in cbor_response.headers['Vary']
+        # 表現ごとに ETag が異なる
+        assert cbor_response.headers['ETag'] != json_response.headers['ETag']
+
+    def test_json_by_default(self, client, auth_headers):
+        """Accept なし・*/* は JSON"""
+        for accept in (None, '*/*', 'application/json, application/cbor;q=0.5'):
+            headers = {**auth_headers, 'Accept': accept} if accept else auth_headers
+            response = client.get('/api/categories/', headers=headers)
+            assert response.mimetype == 'application/json'
+
+    def test_cbor_request_on_categories_and_batch(self, client, auth_headers):
+        """カテゴリ・バッチなど他のエンドポイントでも CBOR ボディを受け付ける"""
+        response = client.post('/api/categories/', data=cbor_dumps({"name": "CBORカテゴリ"}, no_default),
+                               content_type='application/cbor', headers=auth_headers)
+        assert response.status_code == 201
+        assert response.get_json()['category']['name'] == 'CBORカテゴリ'
+
+        operations = {"operations": [{"op": "create", "data": {"title": f"一括{i}"}} for i in range(3)]}
+        response = client.post('/api/tasks/batch', data=cbor_dumps(operations, no_default),
+                               content_type='application/cbor', headers=auth_headers)
+        assert response.status_code == 200
+        assert len(response.get_json()['results']) == 3
+
+    def test_unsupported_body_rejected(self, client, auth_headers):
+        """対応していない Content-Type は従来どおり 400"""
+        response = client.post('/api/tasks/', data=b'title=x', content_type='application/x-www-form-urlencoded',
+                               headers=auth_headers)
+        assert response.status_code == 400